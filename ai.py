@@ -4,8 +4,79 @@ Each AI class implements a decide() method that returns a vertical movement inte
 Designed as separate strategies for educational clarity and NEA justification.
 """
 
+import math
 import random
-from settings import WINDOW_WIDTH, WINDOW_HEIGHT
+import time
+from settings import WORLD_WIDTH, WORLD_HEIGHT, SIZE
+from simulation import BALL_SPEED_CAP
+
+BALL_RADIUS = SIZE['ball'][1] / 2  # ball bounces when its edge (not its center) touches a wall
+
+
+def ball_radius(ball):
+    """Radius the walls fold a ball's path at: its own if it has one (chaos balls are smaller), else BALL_RADIUS."""
+    return getattr(ball, 'radius', BALL_RADIUS)
+PADDLE_HALF_WIDTH = SIZE['paddle'][0] / 2
+
+
+def fold_into_range(y, low, high):
+    """
+    Reflect an unbounded Y back into [low, high], as if it bounced off both ends.
+    Equivalent to stepping wall to wall, but constant-time.
+    """
+    span = high - low
+    if span <= 0:
+        return low
+    t = (y - low) % (2 * span)
+    if t > span:
+        t = 2 * span - t
+    return low + t
+
+
+def predict_landing_y(paddle_x, pos_x, pos_y, dir_x, dir_y, radius=0.0):
+    """
+    Closed-form Y of the ball center when it reaches paddle_x, including wall reflections.
+    The ball center is confined to [radius, WORLD_HEIGHT - radius].
+    Returns pos_y unchanged if the ball moves vertically only or away from paddle_x.
+    """
+    if dir_x == 0:
+        return pos_y  # Ball moving vertically only, can't reach paddle_x
+    distance_x = paddle_x - pos_x
+    if distance_x * dir_x < 0:
+        return pos_y  # Ball is moving away from paddle_x
+    # straight-line Y with the walls "unfolded", then fold back into the window
+    unfolded_y = pos_y + dir_y * distance_x / dir_x
+    return fold_into_range(unfolded_y, radius, WORLD_HEIGHT - radius)
+
+
+class PredictionCache:
+    """
+    Mixin that caches the predicted landing Y for the current ball trajectory.
+    Ball exposes an 'epoch' that changes on every wall bounce, paddle hit and relaunch,
+    so a prediction stays valid until the epoch moves. Noise is applied by decide() on top.
+    """
+
+    def _clear_prediction_cache(self):
+        self._cache_key = None
+        self._cached_y = 0.0
+
+    def _is_cacheable(self, paddle_x, ball):
+        """Only an approaching ball has a landing Y that stays fixed along its straight path."""
+        return (paddle_x - ball.pos.x) * ball.direction.x > 0
+
+    def _cached_prediction(self, paddle_x, ball, predictor):
+        """Return predictor(paddle_x, ball), re-running it only when the trajectory changed."""
+        epoch = getattr(ball, 'epoch', None)
+        key = (epoch, paddle_x)
+        if epoch is not None and key == self._cache_key:
+            return self._cached_y
+        predicted_y = predictor(paddle_x, ball)
+        if epoch is not None and self._is_cacheable(paddle_x, ball):
+            self._cache_key = key
+            self._cached_y = predicted_y
+        else:
+            self._cache_key = None
+        return predicted_y
 
 
 class EasyAI:
@@ -14,7 +85,7 @@ class EasyAI:
     Suitable for beginner-level opponent.
     """
 
-    def __init__(self, reaction_time=0.25, max_speed_factor=0.6, inaccuracy=0.2):
+    def __init__(self, reaction_time=0.25, max_speed_factor=0.6, inaccuracy=0.2, rng=None):
         """
         Args:
             reaction_time: Delay (seconds) before reacting to ball movement.
@@ -22,10 +93,13 @@ class EasyAI:
                              Helps simulate slower, less capable opponent.
             inaccuracy: Noise magnitude applied to target Y position.
                        Larger values = more missed shots. Range: 0.0 (perfect) to ~0.5
+            rng: random.Random used for noise (seeded per match for determinism).
+                 Defaults to the global random module.
         """
         self.reaction_time = reaction_time
         self.max_speed_factor = max_speed_factor
         self.inaccuracy = inaccuracy
+        self.rng = rng if rng is not None else random
         self.elapsed_time = 0.0
         self.last_direction = 0.0
         self.last_predicted_y = 0.0
@@ -42,7 +116,7 @@ class EasyAI:
             return self.last_direction  # Continue last direction during reaction delay
 
         # Calculate ball position and distance
-        target_y = ball.pos.y + random.uniform(-self.inaccuracy, self.inaccuracy) * paddle.rect.height
+        target_y = ball.pos.y + self.rng.uniform(-self.inaccuracy, self.inaccuracy) * paddle.height
         self.last_predicted_y = target_y  # Store for debugging
         delta = target_y - paddle.pos.y
         # If too close, don't move to reduce jittering
@@ -58,31 +132,42 @@ class EasyAI:
 
 
 
-class MediumAI:
+class MediumAI(PredictionCache):
     """
     Predictive AI that estimates ball landing Y without considering wall bounces.
     Includes human-like reaction delay and modest inaccuracy.
     Good balance for NEA: simple prediction logic but noticeably smarter than EasyAI.
     """
 
-    def __init__(self, reaction_time=0.15, prediction_horizon_limit=5.0, inaccuracy=0.08):
+    def __init__(self, reaction_time=0.15, prediction_horizon_limit=5.0, inaccuracy=0.08, rng=None):
         """
         Args:
             reaction_time: Delay before reacting (seconds).
             prediction_horizon_limit: Max time window (seconds) to look ahead.
                                      Prevents wild predictions if ball is slow/far away.
             inaccuracy: Small noise added to predicted Y to avoid perfect play.
+            rng: random.Random used for noise. Defaults to the global random module.
         """
         self.reaction_time = reaction_time
         self.prediction_horizon_limit = prediction_horizon_limit
         self.inaccuracy = inaccuracy
+        self.rng = rng if rng is not None else random
         self.elapsed_time = 0.0
         self.last_direction = 0.0
         self.last_predicted_y = 0.0
+        self._clear_prediction_cache()
 
     def reset(self):
         """Reset internal state."""
         self.elapsed_time = 0.0
+        self._clear_prediction_cache()
+
+    def _is_cacheable(self, paddle_x, ball):
+        """Clamped predictions move with the ball, so only cache unclamped ones."""
+        if not super()._is_cacheable(paddle_x, ball):
+            return False
+        time_to_reach = (paddle_x - ball.pos.x) / (ball.direction.x * ball.speed)
+        return time_to_reach <= self.prediction_horizon_limit
 
     def _predict_landing_y_no_bounces(self, paddle_x, ball):
         """
@@ -108,8 +193,8 @@ class MediumAI:
             return self.last_direction  # Continue last direction during reaction delay
         
         # Calculate ball position and distance
-        predicted_y = self._predict_landing_y_no_bounces(paddle.pos.x, ball)
-        predicted_y += random.uniform(-self.inaccuracy, self.inaccuracy) * paddle.rect.height
+        predicted_y = self._cached_prediction(paddle.pos.x, ball, self._predict_landing_y_no_bounces)
+        predicted_y += self.rng.uniform(-self.inaccuracy, self.inaccuracy) * paddle.height
         self.last_predicted_y = predicted_y  # Store for debugging
         delta = predicted_y - paddle.pos.y
         # If too close, don't move to reduce jittering
@@ -124,70 +209,41 @@ class MediumAI:
         return self.last_direction
 
 
-class HardAI:
+class HardAI(PredictionCache):
     """
     Advanced predictive AI that includes top/bottom wall reflections.
-    Simulates ball trajectory step-by-step, bouncing at walls, until ball reaches paddle X.
-    Demonstrates geometric reflection logic suitable for advanced NEA.
+    "Unfolds" the walls: follows the straight line to paddle X, then folds the result
+    back into the window by reflection. Demonstrates geometric reflection logic suitable for advanced NEA.
     """
 
-    def __init__(self, reaction_time=0.08, inaccuracy=0.02, max_simulation_steps=1000):
+    def __init__(self, reaction_time=0.08, inaccuracy=0.02, rng=None):
         """
         Args:
             reaction_time: Very small delay (AI is nearly instant).
             inaccuracy: Tiny noise (AI is nearly perfect).
-            max_simulation_steps: Safety limit to prevent infinite loops during simulation.
+            rng: random.Random used for noise. Defaults to the global random module.
         """
         self.reaction_time = reaction_time
         self.inaccuracy = inaccuracy
-        self.max_simulation_steps = max_simulation_steps
+        self.rng = rng if rng is not None else random
         self.elapsed_time = 0.0
         self.last_direction = 0.0
         self.last_predicted_y = 0.0
+        self._clear_prediction_cache()
 
     def reset(self):
         """Reset internal state."""
         self.elapsed_time = 0.0
+        self._clear_prediction_cache()
 
     def _simulate_to_paddle_x(self, paddle_x, ball):
         """
-        Simulate ball trajectory including top/bottom wall reflections.
-        Returns the estimated Y position when ball reaches paddle_x.
+        Predict ball Y at paddle_x including top/bottom wall reflections.
+        Uses the closed-form unfolding in predict_landing_y, so the cost does not
+        depend on how many times the ball bounces.
         """
-        pos_x = ball.pos.x
-        pos_y = ball.pos.y
-        dir_x = ball.direction.x
-        dir_y = ball.direction.y
-        
-        for i in range(self.max_simulation_steps):
-            if dir_x == 0:
-                return pos_y # Ball moving vertically only, can't reach paddle_x
-            time_to_paddle_x = (paddle_x - pos_x) / (dir_x * ball.speed) 
-            if time_to_paddle_x >= 0: 
-                # Compute where the ball would be in Y when it reaches paddle_x
-                y_at_paddle = pos_y + (dir_y * ball.speed * time_to_paddle_x)
-                if 0 <= y_at_paddle <= WINDOW_HEIGHT:
-                    return y_at_paddle # Ball reaches paddle_x without hitting wall
-                else:
-                    # Ball will hit wall before reaching paddle_x
-                    time_to_wall = None
-                    if dir_y > 0:
-                        # Time until hitting bottom wall
-                        time_to_wall = (WINDOW_HEIGHT - pos_y) / (dir_y * ball.speed)
-                    elif dir_y < 0:
-                        # Time until hitting top wall
-                        time_to_wall = -pos_y / (dir_y * ball.speed)
-                    else:
-                        # dir_y == 0 means ball is moving horizontally, so it won't hit walls
-                        return pos_y  # No vertical movement 
-                    pos_x += dir_x * ball.speed * time_to_wall # Move to wall collision point
-                    pos_y += dir_y * ball.speed * time_to_wall # Move to wall collision point
-                    pos_y = max(0, min(WINDOW_HEIGHT, pos_y))  # Clamp
-                    dir_y = -dir_y  # Reflect
-            else:
-                # Ball is moving away from paddle_x; we can either return current pos_y or handle bounce-back logic
-                 return pos_y
-        return pos_y  # Fallback if max_simulation_steps exhausted
+        return predict_landing_y(paddle_x, ball.pos.x, ball.pos.y,
+                                 ball.direction.x, ball.direction.y, ball_radius(ball))
 
     def decide(self, paddle, ball, dt, game_state=None):
         """
@@ -200,8 +256,8 @@ class HardAI:
             return self.last_direction  # Continue last direction during reaction delay
         
         # Calculate ball position and distance
-        predicted_y = self._simulate_to_paddle_x(paddle.pos.x, ball)
-        predicted_y += random.uniform(-self.inaccuracy, self.inaccuracy) * paddle.rect.height
+        predicted_y = self._cached_prediction(paddle.pos.x, ball, self._simulate_to_paddle_x)
+        predicted_y += self.rng.uniform(-self.inaccuracy, self.inaccuracy) * paddle.height
         self.last_predicted_y = predicted_y  # Store for debugging
         delta = predicted_y - paddle.pos.y
         # If too close, don't move to reduce jittering
@@ -213,4 +269,379 @@ class HardAI:
             self.last_direction = 1
 
         self.elapsed_time = 0  # Reset timer after making a decision
-        return self.last_direction
\ No newline at end of file
+        return self.last_direction
+
+
+class SearchNode:
+    """Statistics for one sequence of macro-moves in the ExpertAI search tree."""
+
+    __slots__ = ('visits', 'total', 'children')
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0
+        self.children = {}  # move (-1, 0, +1) -> SearchNode
+
+
+class ExpertAI:
+    """
+    Lookahead search AI: open-loop Monte Carlo tree search over paddle moves.
+    Each iteration picks a sequence of moves (up / stay / down, each held for a while) down the
+    tree with UCB1 and plays the rally out under one sampled set of paddle deflections, with the
+    speed ramp applied on every hit: the ball flies between paddle faces in closed form, this
+    paddle follows the moves and then goes for the ball, and the other paddle is assumed to
+    track perfectly. Winning the rally scores 1, losing it 0, and a rally still going scores by
+    the tightest intercept margin.
+    The search is anytime and time-budgeted: each decision searches for `budget` seconds and
+    keeps the subtree under the move being played for the next decision. It plays the tracking
+    move HardAI would make unless the search finds a clearly better one. The time budget makes
+    headless results depend on CPU speed; set max_iterations for reproducible seeded matches.
+    """
+
+    MOVES = (-1, 0, 1)
+
+    def __init__(self, reaction_time=1 / 60, inaccuracy=0.0, budget=0.002, macro_time=0.05, depth=4,
+                 exploration=0.7, tolerance=0.02, rally_legs=4, max_iterations=None, rng=None, clock=time.perf_counter):
+        """
+        Args:
+            reaction_time: Seconds between decisions; the search runs once per decision.
+            inaccuracy: Noise on the observed ball Y (fraction of paddle height) at each decision.
+            budget: Wall-clock seconds of search per decision (ignored if max_iterations is set).
+            macro_time: Shortest time a move in the tree is held for (see _move_time).
+            depth: Moves per tree path; the rollout policy takes over after that.
+            exploration: UCB1 exploration constant.
+            tolerance: How much better (in mean rollout value) a move must score to override tracking.
+            rally_legs: Paddle-to-paddle flights simulated per rollout.
+            max_iterations: Fixed search iterations per decision instead of a time budget.
+            rng: random.Random used for sampling deflections and noise. Defaults to the global random module.
+            clock: Time source for the budget.
+        """
+        self.reaction_time = reaction_time
+        self.inaccuracy = inaccuracy
+        self.budget = budget
+        self.macro_time = macro_time
+        self.depth = depth
+        self.exploration = exploration
+        self.tolerance = tolerance
+        self.rally_legs = rally_legs
+        self.max_iterations = max_iterations
+        self.rng = rng if rng is not None else random
+        self.clock = clock
+        self.elapsed_time = 0.0
+        self.last_direction = 0
+        self.last_predicted_y = 0.0
+        self.iterations = 0        # search iterations in the last decision
+        self.total_iterations = 0
+        self.search_time = 0.0     # wall-clock seconds spent searching
+        self._reset_tree()
+
+    def reset(self):
+        """Reset internal state."""
+        self.elapsed_time = 0.0
+        self._reset_tree()
+
+    def _reset_tree(self):
+        self.root = SearchNode()
+        self.scenarios = []
+        self.macro_elapsed = 0.0   # game time already spent in the root's first move
+        self.move_time = None      # seconds per move in the current tree, set by the first search
+        self._last_dx_sign = 0
+        self._last_speed = 0.0
+
+    def _advance_tree(self, dt, ball):
+        """Keep the subtree of the move being played; start over when the rally changed under us."""
+        dx_sign = (ball.direction.x > 0) - (ball.direction.x < 0)
+        if dx_sign != self._last_dx_sign or ball.speed < self._last_speed:
+            # a paddle hit or a relaunch: statistics gathered for the old flight no longer apply
+            self.root = SearchNode()
+            self.scenarios = []
+            self.macro_elapsed = 0.0
+            self.move_time = None
+        elif self.move_time is not None:
+            self.macro_elapsed += dt
+            while self.macro_elapsed >= self.move_time:
+                self.macro_elapsed -= self.move_time
+                self.root = self.root.children.get(self.last_direction) or SearchNode()
+        self._last_dx_sign = dx_sign
+        self._last_speed = ball.speed
+
+    def _world(self, paddle, ball, game_state):
+        """Flat tuple of everything a rollout needs, read once per decision."""
+        side = 1 if paddle.pos.x > WORLD_WIDTH / 2 else -1  # +1: this paddle defends the right edge
+        other = None
+        if game_state is not None:
+            other = getattr(game_state, 'opponent' if side == 1 else 'player', None)
+        other_x = WORLD_WIDTH - paddle.pos.x if other is None else other.pos.x
+        other_y = ball.pos.y if other is None else other.pos.y
+        other_half = paddle.height / 2 if other is None else other.height / 2
+        other_speed = paddle.speed if other is None else other.speed
+        accel = getattr(ball, 'ball_accel', 0)
+        observed_y = ball.pos.y + self.rng.uniform(-self.inaccuracy, self.inaccuracy) * paddle.height
+        return (side, ball.pos.x, observed_y, ball.direction.x, ball.direction.y, ball.speed, accel,
+                paddle.pos.y, paddle.speed, paddle.height / 2, paddle.pos.x - side * (PADDLE_HALF_WIDTH + BALL_RADIUS),
+                other_y, other_speed, other_half, other_x + side * (PADDLE_HALF_WIDTH + BALL_RADIUS))
+
+    def _move_time(self, world):
+        """
+        How long each move in a new tree lasts. While the ball heads away the tree spreads its
+        moves over the time until the other paddle's return, so the search plans where to wait;
+        while it approaches, moves are macro_time long so it can line up the intercept.
+        """
+        side, x, dx, speed, other_face = world[0], world[1], world[3], world[5], world[14]
+        if dx * side > 0 or dx == 0:
+            return self.macro_time
+        return max(self.macro_time, (other_face - x) / (dx * speed) / self.depth)
+
+    def _follow(self, y, speed, half, moves, start, end, target):
+        """
+        This paddle's Y at time `end` after being at `y` at time `start`: it plays `moves`
+        (from the tree root on), then heads for `target` (or holds still if target is None).
+        """
+        low, high = half, WORLD_HEIGHT - half
+        first = self.move_time - self.macro_elapsed  # the first move is already partly played
+        t = start
+        for index, move in enumerate(moves):
+            segment_end = first + index * self.move_time
+            if segment_end <= t:
+                continue
+            until = min(segment_end, end)
+            y = min(high, max(low, y + move * speed * (until - t)))
+            t = until
+            if t >= end:
+                return y
+        if target is not None and end > t:
+            reach = speed * (end - t)
+            y = min(high, max(low, target if abs(target - y) <= reach else y + math.copysign(reach, target - y)))
+        return y
+
+    def _scenario(self, index):
+        """
+        The index-th sampled set of paddle deflections. The n-th visit of every node replays
+        scenario n, so sibling moves are compared on the same luck rather than on different draws.
+        """
+        while len(self.scenarios) <= index:
+            uniform = self.rng.uniform
+            self.scenarios.append(tuple(uniform(-0.3, 0.3) for _ in range(self.rally_legs)))
+        return self.scenarios[index]
+
+    def _rollout(self, world, moves, deflections):
+        """Play the rally out under one set of deflections; 1 = rally won, 0 = lost."""
+        (side, x, y, dx, dy, speed, accel, own_y, own_speed, own_half, own_face,
+         other_y, other_speed, other_half, other_face) = world
+        t = 0.0
+        margin = None
+        for deflection in deflections:
+            if dx == 0:
+                break
+            towards_us = dx * side > 0
+            face = own_face if towards_us else other_face
+            flight = (face - x) / (dx * speed)
+            if flight < 0:
+                # already past that paddle's face: the point is decided
+                return 0.0 if towards_us else 1.0
+            landing = predict_landing_y(face, x, y, dx, dy, BALL_RADIUS)
+            if towards_us:
+                own_y = self._follow(own_y, own_speed, own_half, moves, t, t + flight, landing)
+                leg_margin = own_half + BALL_RADIUS - abs(landing - own_y)
+                if leg_margin < 0:
+                    return 0.0
+                margin = leg_margin if margin is None else min(margin, leg_margin)
+            else:
+                own_y = self._follow(own_y, own_speed, own_half, moves, t, t + flight, None)
+                gap = abs(landing - other_y) - other_half - BALL_RADIUS
+                if gap > other_speed * flight:
+                    return 1.0
+                other_y = landing if gap <= 0 else other_y + math.copysign(gap, landing - other_y)
+            # paddle hit: same response as simulation.deflect_off_paddle
+            x, y = face, landing
+            dx = -dx
+            dy += deflection
+            speed = min(speed + accel, BALL_SPEED_CAP)
+            t += flight
+        if margin is None:
+            return 0.5
+        return 0.5 + 0.1 * math.tanh(margin / (2 * own_half))
+
+    def _iterate(self, world):
+        node = self.root
+        path = [node]
+        moves = []
+        while len(moves) < self.depth:
+            untried = [move for move in self.MOVES if move not in node.children]
+            if untried:
+                move = untried[0]
+                node.children[move] = child = SearchNode()
+                path.append(child)
+                moves.append(move)
+                break
+            log_visits = math.log(node.visits)
+            move, node = max(node.children.items(), key=lambda item: item[1].total / item[1].visits
+                             + self.exploration * math.sqrt(log_visits / item[1].visits))
+            path.append(node)
+            moves.append(move)
+        value = self._rollout(world, moves, self._scenario(path[1].visits))
+        for visited in path:
+            visited.visits += 1
+            visited.total += value
+
+    def search(self, paddle, ball, game_state=None, greedy_move=0):
+        """
+        Run one budgeted search from the current state and return the move with the best mean
+        value, or greedy_move if it scores within `tolerance` of that.
+        """
+        world = self._world(paddle, ball, game_state)
+        if self.move_time is None:
+            self.move_time = self._move_time(world)
+        start = self.clock()
+        deadline = start + self.budget
+        iterations = 0
+        while True:
+            self._iterate(world)
+            iterations += 1
+            if self.max_iterations is not None:
+                if iterations >= self.max_iterations:
+                    break
+            elif self.clock() >= deadline:
+                break
+        self.iterations = iterations
+        self.total_iterations += iterations
+        self.search_time += self.clock() - start
+        best_value, best_move = max((child.total / child.visits, move) for move, child in self.root.children.items())
+        greedy = self.root.children.get(greedy_move)
+        if greedy is not None and greedy.total / greedy.visits >= best_value - self.tolerance:
+            return greedy_move  # the tracking move is as good as anything the search found
+        return best_move
+
+    def decide(self, paddle, ball, dt, game_state=None):
+        """Return vertical movement intent from a time-budgeted lookahead search."""
+        self._advance_tree(dt, ball)
+        self.elapsed_time += dt
+        if self.elapsed_time < self.reaction_time:
+            return self.last_direction  # Continue last direction until the next decision
+        self.elapsed_time = 0
+        # the tracking move HardAI would make: the search only overrides it when it finds better
+        self.last_predicted_y = predict_landing_y(paddle.pos.x, ball.pos.x, ball.pos.y,
+                                                  ball.direction.x, ball.direction.y, ball_radius(ball))
+        delta = self.last_predicted_y - paddle.pos.y
+        greedy_move = 0 if abs(delta) < 5 else (1 if delta > 0 else -1)
+        self.last_direction = self.search(paddle, ball, game_state, greedy_move)
+        return self.last_direction
+
+
+# What a learned policy sees, always from the side of the paddle it moves: x is the ball's distance
+# from that paddle's goal line and direction x is positive when the ball heads away from it
+OBSERVATION_FIELDS = ('ball_x', 'ball_y', 'direction_x', 'direction_y', 'speed', 'paddle_y', 'other_paddle_y')
+# policy action index -> vertical intent
+ACTIONS = (-1, 0, 1)
+# PolicyAI's default policy holds still within this distance of the ball (5 px, in observation units)
+POLICY_DEAD_ZONE = 5 / WORLD_HEIGHT
+
+
+def observe(paddle, ball, other_y):
+    """
+    The observation for the paddle's side, scaled to roughly [0, 1] (world size, speed cap).
+    Mirrored for the right paddle so one policy can play either side. env.py builds the same
+    observations in batches.
+    """
+    x, direction_x = ball.pos.x, ball.direction.x
+    if paddle.pos.x > WORLD_WIDTH / 2:
+        x, direction_x = WORLD_WIDTH - x, -direction_x
+    return (x / WORLD_WIDTH, ball.pos.y / WORLD_HEIGHT, direction_x, ball.direction.y,
+            ball.speed / BALL_SPEED_CAP, paddle.pos.y / WORLD_HEIGHT, other_y / WORLD_HEIGHT)
+
+
+class PolicyAI:
+    """
+    Strategy wrapper for a policy trained in env.py: policy(observation) returns an index into
+    ACTIONS. Pass the policy in, or subclass and override policy() (e.g. to load trained weights)
+    so the class can be entered in tournaments as 'module:Class'. Without either it tracks the
+    ball's Y, a baseline to compare trained policies against.
+    """
+
+    def __init__(self, policy=None, reaction_time=0.0, inaccuracy=0.0, rng=None):
+        """
+        Args:
+            policy: Callable mapping an observation tuple (see observe) to an action index
+                    (None: follow the ball's Y).
+            reaction_time: Seconds between decisions (the env steps it was trained with).
+            inaccuracy: Noise on the observed ball Y, as a fraction of paddle height.
+            rng: random.Random used for noise. Defaults to the global random module.
+        """
+        if policy is not None:
+            self.policy = policy
+        self.reaction_time = reaction_time
+        self.inaccuracy = inaccuracy
+        self.rng = rng if rng is not None else random
+        self.elapsed_time = 0.0
+        self.last_direction = 0
+        self.last_predicted_y = 0.0
+
+    def policy(self, observation):
+        """Default policy: move toward the ball's Y, holding still inside a small dead zone."""
+        offset = observation[1] - observation[5]  # ball y - paddle y, as fractions of the world height
+        if abs(offset) <= POLICY_DEAD_ZONE:
+            return ACTIONS.index(0)
+        return ACTIONS.index(1 if offset > 0 else -1)
+
+    def reset(self):
+        """Reset internal state."""
+        self.elapsed_time = 0.0
+
+    def decide(self, paddle, ball, dt, game_state=None):
+        """Return the trained policy's vertical movement intent."""
+        self.elapsed_time += dt
+        if self.elapsed_time < self.reaction_time:
+            return self.last_direction  # Continue last direction until the next decision
+        self.elapsed_time = 0
+        other_y = WORLD_HEIGHT / 2
+        if game_state is not None:
+            other_y = (game_state.opponent if paddle.pos.x > WORLD_WIDTH / 2 else game_state.player).pos.y
+        observation = observe(paddle, ball, other_y)
+        if self.inaccuracy:
+            noise = self.rng.uniform(-self.inaccuracy, self.inaccuracy) * paddle.height / WORLD_HEIGHT
+            observation = observation[:1] + (observation[1] + noise,) + observation[2:]
+        self.last_predicted_y = observation[1] * WORLD_HEIGHT  # Store for debugging
+        self.last_direction = ACTIONS[int(self.policy(observation))]
+        return self.last_direction
+
+
+# Strategy class and default reaction time the opponent uses at each difficulty
+DIFFICULTY_AI = {
+    'easy': (EasyAI, 0.3),
+    'normal': (MediumAI, 0.15),
+    'hard': (HardAI, 0.05),
+    'expert': (ExpertAI, 1 / 60),
+}
+
+
+def create_ai(ai_class, difficulty_settings, reaction_time=None, rng=None):
+    """
+    Build a strategy configured from a difficulty preset: 'ai_error' becomes its inaccuracy and
+    the preset's 'reaction_time' (if any) overrides reaction_time. A reaction_time of None keeps
+    the class default. Custom strategies must accept the same keyword arguments.
+    """
+    kwargs = {'inaccuracy': difficulty_settings.get('ai_error', 0.10), 'rng': rng}
+    reaction_time = difficulty_settings.get('reaction_time', reaction_time)
+    if reaction_time is not None:
+        kwargs['reaction_time'] = reaction_time
+    return ai_class(**kwargs)
+
+
+def create_difficulty_ai(difficulty, difficulty_settings, rng=None):
+    """The opponent strategy for a difficulty name ('easy', 'normal', 'hard', 'expert'), or None if unknown."""
+    if difficulty not in DIFFICULTY_AI:
+        return None
+    ai_class, reaction_time = DIFFICULTY_AI[difficulty]
+    return create_ai(ai_class, difficulty_settings, reaction_time, rng)
+
+
+# ExpertAI search per decision in headless tools (tuner, tournament): a fixed number of iterations
+# instead of the wall-clock budget, so seeded results are the same on every machine
+HEADLESS_SEARCH_ITERATIONS = 30
+
+
+def make_reproducible(strategy):
+    """Give a time-budgeted strategy (ExpertAI) a fixed search size; other strategies are returned unchanged."""
+    if isinstance(strategy, ExpertAI) and strategy.max_iterations is None:
+        strategy.max_iterations = HEADLESS_SEARCH_ITERATIONS
+    return strategy
@@ -0,0 +1,264 @@
+"""
+Asynchronous AI decisions for Pong game.
+AsyncAI wraps any ai.py strategy and runs its decide() in a worker thread or process, so an
+expensive strategy no longer adds to frame time. Each step the paddle sends the worker a
+GameState snapshot and applies the intent computed from the previous step's snapshot. The
+paddle waits at most `deadline` seconds for that answer. If the answer is not ready in time,
+the paddle keeps its last direction and the step counts as a late decision.
+
+The worker keeps its own copy of the match, restored from each snapshot, and its own strategy
+instance, so nothing is shared with the render loop. The thread backend is cheap to start but
+still shares the GIL with the render loop. The process backend gives the strategy a core of
+its own; the strategy must be picklable, which every ai.py strategy is (seeded ones included).
+If the worker dies or its pipe breaks, AsyncAI warns once and decides inline from then on, so
+a broken worker never leaves the paddle frozen.
+
+The deadline bounds how long decide() waits for an answer, not how long decide() takes. With
+the thread backend, handing a snapshot to a busy worker can leave the render thread waiting for
+the GIL for up to sys.getswitchinterval() (5 ms by default). With the process backend on a
+machine with no idle core, the worker takes the CPU for its search as soon as a snapshot
+arrives. Either way a single call can exceed the deadline, although the paddle never waits for
+a late answer.
+
+Usage:
+    python aiworker.py bench --difficulty expert --backend process --seconds 10
+"""
+
+import argparse
+import multiprocessing
+import threading
+import time
+import warnings
+
+import ai
+from settings import WORLD_WIDTH, DIFFICULTY_PRESETS
+from simulation import GameState, FIXED_DT, step
+
+BACKENDS = ('thread', 'process')
+DEFAULT_DEADLINE = 0.002  # seconds the render loop waits for a decision before falling back
+
+
+def serve(connection, strategy):
+    """
+    Worker loop: answer ('decide', snapshot, side, dt) requests with the strategy's intent, its debug
+    values and the time the answer was ready (time.perf_counter, a system-wide clock on Linux,
+    macOS and Windows, so it compares across processes).
+    """
+    state = None
+    try:
+        while True:
+            message = connection.recv()
+            command = message[0]
+            if command == 'decide':
+                _, snapshot, side, dt = message
+                state.restore(snapshot)
+                intent = strategy.decide(getattr(state, side), state.ball, dt, state)
+                connection.send((intent, getattr(strategy, 'last_predicted_y', 0.0), getattr(strategy, 'elapsed_time', 0.0),
+                                 time.perf_counter()))
+            elif command == 'match':
+                _, difficulty, difficulty_settings, seed = message
+                state = GameState(difficulty, difficulty_settings, seed=seed)
+            elif command == 'reset':
+                strategy.reset()
+            else:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+
+class AsyncAI:
+    """
+    Strategy wrapper with the usual decide() interface that runs the wrapped strategy in a worker.
+    One request is in flight at a time: while the worker is busy with a late answer, steps fall back
+    to the last direction and no new snapshot is sent. The answer is used when it arrives.
+    """
+
+    def __init__(self, strategy, backend='thread', deadline=DEFAULT_DEADLINE):
+        """
+        Args:
+            strategy: The ai.py strategy to run in the worker (moved there; don't call it directly).
+            backend: 'thread' or 'process'.
+            deadline: Seconds decide() waits for the previous step's answer before falling back.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, not {backend!r}")
+        self.strategy = strategy
+        self.backend = backend
+        self.deadline = deadline
+        self.connection, worker_connection = multiprocessing.Pipe()
+        if backend == 'thread':
+            self.worker = threading.Thread(target=serve, args=(worker_connection, strategy), daemon=True)
+        else:
+            self.worker = multiprocessing.get_context().Process(target=serve, args=(worker_connection, strategy), daemon=True)
+        self.worker.start()
+        if backend == 'process':
+            worker_connection.close()  # the child has its own copy
+        self.match = None          # (difficulty, settings, seed) the worker's copy was built for
+        self.in_flight = False
+        self.sent_at = 0.0
+        self.waited = False        # already waited the deadline for the request in flight
+        self.pending_dt = 0.0      # game time since the last request, handed to the next one
+        self.closed = False
+        self.failure = None        # why the worker stopped answering; decisions then run inline
+        self.last_direction = 0
+        self.last_predicted_y = 0.0
+        self.elapsed_time = 0.0
+        # metrics
+        self.decisions = 0         # answers received
+        self.late_decisions = 0    # steps that fell back because the answer missed the deadline
+        self.latency_total = 0.0
+        self.worst_latency = 0.0
+
+    @property
+    def reaction_time(self):
+        return getattr(self.strategy, 'reaction_time', 0.0)
+
+    def reset(self):
+        """Reset the strategy in the worker (or inline once the worker has failed)."""
+        if self.failure is None and not self.closed:
+            try:
+                self.connection.send(('reset',))
+                return
+            except (BrokenPipeError, OSError) as error:
+                self._fail(f"pipe broke: {error}")
+        self.strategy.reset()
+
+    def _fail(self, reason):
+        """Give up on the worker: warn once and run the strategy inline from now on."""
+        self.failure = reason
+        self.in_flight = False
+        warnings.warn(f"AsyncAI {self.backend} worker failed ({reason}); deciding inline instead", RuntimeWarning, stacklevel=3)
+
+    def _decide_inline(self, paddle, ball, game_state):
+        """The wrapped strategy's decision on this thread, with the game time since the last answer."""
+        self.last_direction = self.strategy.decide(paddle, ball, self.pending_dt, game_state)
+        self.last_predicted_y = getattr(self.strategy, 'last_predicted_y', 0.0)
+        self.elapsed_time = getattr(self.strategy, 'elapsed_time', 0.0)
+        self.pending_dt = 0.0
+        return self.last_direction
+
+    def _receive(self):
+        self.last_direction, self.last_predicted_y, self.elapsed_time, finished_at = self.connection.recv()
+        latency = finished_at - self.sent_at  # submission to answer ready, not to when we picked it up
+        self.decisions += 1
+        self.latency_total += latency
+        self.worst_latency = max(self.worst_latency, latency)
+        self.in_flight = False
+
+    def decide(self, paddle, ball, dt, game_state=None):
+        """Return the intent decided from the previous step's snapshot, then send this step's."""
+        if game_state is None:
+            raise ValueError("AsyncAI needs the GameState to snapshot")
+        if self.closed:
+            return self.last_direction
+        self.pending_dt += dt
+        if self.failure is None and not self.worker.is_alive():
+            self._fail(f"worker exited (exit code {getattr(self.worker, 'exitcode', None)})")
+        if self.failure is not None:
+            return self._decide_inline(paddle, ball, game_state)
+        try:
+            return self._exchange(paddle, game_state)
+        except (EOFError, BrokenPipeError, OSError) as error:
+            self._fail(f"pipe broke: {error!r}")
+            return self._decide_inline(paddle, ball, game_state)
+
+    def _exchange(self, paddle, game_state):
+        """Pick up the answer in flight (waiting up to the deadline once) and send this step's snapshot."""
+        if self.in_flight:
+            # wait out the deadline once per request; after that only pick the answer up when it's there
+            if self.connection.poll(0 if self.waited else self.deadline):
+                self._receive()
+            else:
+                self.waited = True
+                self.late_decisions += 1
+                return self.last_direction  # fall back until the worker catches up
+        match = (game_state.difficulty, game_state.difficulty_settings, game_state.seed)
+        if match != self.match:
+            self.match = match
+            self.connection.send(('match', *match))
+        side = 'player' if paddle.pos.x > WORLD_WIDTH / 2 else 'opponent'
+        self.sent_at = time.perf_counter()
+        self.connection.send(('decide', game_state.snapshot(), side, self.pending_dt))
+        self.in_flight = True
+        self.waited = False
+        self.pending_dt = 0.0
+        return self.last_direction
+
+    def metrics(self):
+        """Decision counts and latencies (seconds) so far."""
+        steps = self.decisions + self.late_decisions
+        return {
+            'backend': self.backend,
+            'decisions': self.decisions,
+            'late_decisions': self.late_decisions,
+            'late_fraction': self.late_decisions / steps if steps else 0.0,
+            'mean_latency': self.latency_total / self.decisions if self.decisions else 0.0,
+            'worst_latency': self.worst_latency,
+            'failure': self.failure,
+        }
+
+    def close(self):
+        """Stop the worker; later decide() calls keep the last direction."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.connection.send(('close',))
+        except (BrokenPipeError, OSError):
+            pass
+        self.worker.join(timeout=1.0)
+        if self.backend == 'process' and self.worker.is_alive():
+            self.worker.terminate()
+        self.connection.close()
+
+
+def bench(args):
+    """Play a headless match with the difficulty's opponent in a worker, timing decide() on the calling thread."""
+    state = GameState(args.difficulty, seed=1)
+    player_ai = ai.create_ai(ai.HardAI, state.difficulty_settings, rng=state.make_rng('player'))
+    strategy = ai.create_difficulty_ai(args.difficulty, state.difficulty_settings, state.make_rng('opponent'))
+    opponent_ai = AsyncAI(strategy, args.backend, args.deadline)
+    worst_call = 0.0
+    call_total = 0.0
+    steps = 0
+    start = time.perf_counter()
+    try:
+        while state.winner is None and state.time < args.seconds:
+            call_start = time.perf_counter()
+            opponent_intent = opponent_ai.decide(state.opponent, state.ball, FIXED_DT, state)
+            call = time.perf_counter() - call_start
+            call_total += call
+            worst_call = max(worst_call, call)
+            step(state, {'player': player_ai.decide(state.player, state.ball, FIXED_DT, state),
+                         'opponent': opponent_intent}, FIXED_DT)
+            steps += 1
+            # pace the match in real time so the worker has the gaps a render loop would leave it
+            delay = start + state.time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        opponent_ai.close()
+    metrics = opponent_ai.metrics()
+    print(f"{args.backend} worker, {type(strategy).__name__}, {steps} steps")
+    print(f"  decide() on the render thread: mean {call_total / max(steps, 1) * 1000:.3f} ms, worst {worst_call * 1000:.3f} ms")
+    print(f"  answers {metrics['decisions']}, late steps {metrics['late_decisions']} ({metrics['late_fraction']:.1%})")
+    print(f"  answer latency (submitted to computed): mean {metrics['mean_latency'] * 1000:.3f} ms, worst {metrics['worst_latency'] * 1000:.3f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars asynchronous AI worker")
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench_parser = commands.add_parser('bench', help="measure render-thread cost and late decisions of an AI in a worker")
+    bench_parser.add_argument('--difficulty', default='expert', choices=list(DIFFICULTY_PRESETS))
+    bench_parser.add_argument('--backend', default='thread', choices=BACKENDS)
+    bench_parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE, help="seconds to wait for a decision")
+    bench_parser.add_argument('--seconds', type=float, default=10.0, help="simulated (and real) seconds to play")
+    args = parser.parse_args(argv)
+    bench(args)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,214 @@
+"""
+Vectorized batch simulator for Pong game.
+Stores N independent matches in NumPy arrays and advances all of them with one
+vectorized step, mirroring the rules in simulation.py (move, wall bounce,
+scoring + relaunch, paddle bounce). Used for AI evaluation at millions of
+match-steps per second instead of one Python object per match.
+"""
+
+import numpy as np
+from settings import WORLD_WIDTH, WORLD_HEIGHT, SIZE, POS, DIFFICULTY_PRESETS
+from simulation import BALL_SPEED_CAP, WIN_SCORE
+
+
+class BatchSim:
+    """
+    N matches advanced in lockstep. Every per-match quantity is a 1D array of length n.
+    Finished matches (either side reached WIN_SCORE) are frozen until reset() is called for them.
+    """
+
+    def __init__(self, n, difficulty='normal', difficulty_settings=None, seed=None):
+        """
+        Args:
+            n: Number of independent matches.
+            difficulty: Key into DIFFICULTY_PRESETS (ignored if difficulty_settings is given).
+            difficulty_settings: Preset dict shared by every match in the batch.
+            seed: Seed for the batch's NumPy random generator.
+        """
+        if difficulty_settings is None:
+            difficulty_settings = DIFFICULTY_PRESETS.get(difficulty, DIFFICULTY_PRESETS['normal'])
+        self.n = n
+        self.difficulty_settings = difficulty_settings
+        self.rng = np.random.default_rng(seed)
+
+        self.base_speed = float(difficulty_settings.get('ball', 300))
+        self.ball_accel = float(difficulty_settings.get('ball_accel', 5))
+        self.half_ball_w = SIZE['ball'][0] / 2
+        self.half_ball_h = SIZE['ball'][1] / 2
+        self.half_paddle_w = SIZE['paddle'][0] / 2
+        self.half_paddle_h = difficulty_settings.get('paddle_height', SIZE['paddle'][1]) / 2
+        self.player_x = float(POS['player'][0])
+        self.opponent_x = float(POS['opponent'][0])
+        self.player_speed = float(difficulty_settings.get('player', 300))
+        self.opponent_speed = float(difficulty_settings.get('opponent', 300))
+
+        # ball state
+        self.x = np.empty(n)
+        self.y = np.empty(n)
+        self.dx = np.empty(n)
+        self.dy = np.empty(n)
+        self.speed = np.empty(n)
+        # paddle state (x is shared, only y moves)
+        self.player_y = np.empty(n)
+        self.opponent_y = np.empty(n)
+        # scores and match status
+        self.player_score = np.zeros(n, dtype=np.int32)
+        self.opponent_score = np.zeros(n, dtype=np.int32)
+        self.done = np.zeros(n, dtype=bool)
+        self.steps = 0
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Start fresh matches for every index in mask (all matches if mask is None)."""
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.player_y[mask] = POS['player'][1]
+        self.opponent_y[mask] = POS['opponent'][1]
+        self.player_score[mask] = 0
+        self.opponent_score[mask] = 0
+        self.done[mask] = False
+        self.launch(mask)
+
+    def launch(self, mask, direction_x=None):
+        """
+        Relaunch the ball from center for every index in mask (see simulation.launch).
+        direction_x: optional array of +1/-1 per match in mask. If None, choose randomly.
+        """
+        count = int(np.count_nonzero(mask))
+        if count == 0:
+            return
+        if direction_x is None:
+            direction_x = self.rng.choice((-1.0, 1.0), size=count)
+        angle = self.rng.uniform(-0.5, 0.5, size=count)
+        length = np.hypot(direction_x, angle)
+        self.x[mask] = WORLD_WIDTH // 2
+        self.y[mask] = WORLD_HEIGHT // 2
+        self.dx[mask] = direction_x / length
+        self.dy[mask] = angle / length
+        self.speed[mask] = self.base_speed
+
+    def step(self, player_dir, opponent_dir, dt):
+        """
+        Advance every unfinished match by dt seconds.
+        player_dir/opponent_dir: arrays (or scalars) of vertical intents (-1, 0, +1).
+        Returns a dict of boolean masks describing what happened this step:
+        'wall', 'player_scored', 'opponent_scored', 'paddle_hit', 'finished'.
+        """
+        active = ~self.done
+        step_dt = np.where(active, dt, 0.0)
+
+        # ball first, then paddles (same order as simulation.step).
+        # The step is swept: walls are folded in closed form and paddle faces are found by
+        # their exact crossing time, so large dt can't tunnel or leave a ball stuck in a wall.
+        low = self.half_ball_h
+        high = WORLD_HEIGHT - self.half_ball_h
+        reach_x = self.half_ball_w + self.half_paddle_w
+        reach_y = self.half_ball_h + self.half_paddle_h
+        travel = self.speed * step_dt
+        end_x = self.x + self.dx * travel
+
+        # paddle faces crossed this step (opponent on the left, player on the right)
+        opponent_face = self.opponent_x + reach_x
+        player_face = self.player_x - reach_x
+        cross_opponent = active & (self.dx < 0) & (self.x >= opponent_face) & (end_x < opponent_face)
+        cross_player = active & (self.dx > 0) & (self.x <= player_face) & (end_x > player_face)
+        crossing = cross_opponent | cross_player
+        face_x = np.where(cross_opponent, opponent_face, player_face)
+        fraction = np.divide(face_x - self.x, end_x - self.x, out=np.ones(self.n), where=crossing)
+        y_at_face, _, _ = fold_into_range(self.y + self.dy * travel * fraction, low, high)
+        paddle_y = np.where(cross_opponent, self.opponent_y, self.player_y)
+        hit = crossing & (np.abs(y_at_face - paddle_y) < reach_y)
+
+        # first leg: up to the paddle face for hits, the whole step otherwise
+        fraction = np.where(hit, fraction, 1.0)
+        self.x += self.dx * travel * fraction
+        self.y, flipped, wall = fold_into_range(self.y + self.dy * travel * fraction, low, high)
+        self.dy = np.where(flipped, -self.dy, self.dy)
+
+        # second leg: deflect off the paddle and spend the rest of the step moving away
+        count = int(np.count_nonzero(hit))
+        if count:
+            self.dx[hit] *= -1
+            self.dy[hit] += self.rng.uniform(-0.3, 0.3, size=count)  # small vertical variation
+            self.speed[hit] = np.minimum(self.speed[hit] + self.ball_accel, BALL_SPEED_CAP)
+            rest = np.where(hit, self.speed * step_dt * (1.0 - fraction), 0.0)
+            self.x += self.dx * rest
+            self.y, flipped, wall_after = fold_into_range(self.y + self.dy * rest, low, high)
+            self.dy = np.where(flipped, -self.dy, self.dy)
+            wall |= wall_after
+        wall &= active
+
+        player_scored = active & (self.x - self.half_ball_w <= 0)
+        opponent_scored = active & ~player_scored & (self.x + self.half_ball_w >= WORLD_WIDTH)
+        self.player_score += player_scored
+        self.opponent_score += opponent_scored
+        if player_scored.any():
+            self.launch(player_scored, np.ones(int(np.count_nonzero(player_scored))))
+        if opponent_scored.any():
+            self.launch(opponent_scored, -np.ones(int(np.count_nonzero(opponent_scored))))
+
+        self.player_y += np.asarray(player_dir) * self.player_speed * step_dt
+        self.opponent_y += np.asarray(opponent_dir) * self.opponent_speed * step_dt
+        np.clip(self.player_y, self.half_paddle_h, WORLD_HEIGHT - self.half_paddle_h, out=self.player_y)
+        np.clip(self.opponent_y, self.half_paddle_h, WORLD_HEIGHT - self.half_paddle_h, out=self.opponent_y)
+
+        finished = active & ((self.player_score >= WIN_SCORE) | (self.opponent_score >= WIN_SCORE))
+        self.done |= finished
+        self.steps += 1
+        return {
+            'wall': wall,
+            'player_scored': player_scored,
+            'opponent_scored': opponent_scored,
+            'paddle_hit': hit,
+            'finished': finished,
+        }
+
+    def winners(self):
+        """Array of +1 (player won), -1 (opponent won) or 0 (still playing) per match."""
+        return np.where(self.player_score >= WIN_SCORE, 1, np.where(self.opponent_score >= WIN_SCORE, -1, 0))
+
+
+def fold_into_range(y, low, high):
+    """
+    Vectorized ai.fold_into_range. Returns (folded_y, flipped, reflected):
+    flipped marks an odd number of bounces (direction reversed), reflected any bounce at all.
+    """
+    span = high - low
+    t = np.mod(y - low, 2 * span)
+    flipped = t > span
+    folded_y = low + np.where(flipped, 2 * span - t, t)
+    reflected = (y < low) | (y > high)
+    return folded_y, flipped, reflected
+
+
+def predict_landing_y(paddle_x, pos_x, pos_y, dir_x, dir_y, radius=0.0):
+    """
+    Vectorized ai.predict_landing_y: closed-form landing Y for an array of balls.
+    paddle_x may be a scalar or an array; balls moving away (or purely vertically)
+    keep their current Y.
+    """
+    pos_y = np.asarray(pos_y, dtype=float)
+    distance_x = paddle_x - np.asarray(pos_x, dtype=float)
+    dir_x = np.asarray(dir_x, dtype=float)
+    approaching = (dir_x != 0) & (distance_x * dir_x >= 0)
+    safe_dir_x = np.where(dir_x == 0, 1.0, dir_x)
+    unfolded_y = pos_y + dir_y * distance_x / safe_dir_x
+    folded_y, _, _ = fold_into_range(unfolded_y, radius, WORLD_HEIGHT - radius)
+    return np.where(approaching, folded_y, pos_y)
+
+
+def intercept_ball(sim, side='opponent', dead_zone=5):
+    """Vectorized HardAI-style policy: move each paddle toward the predicted landing Y."""
+    if side == 'opponent':
+        paddle_x, paddle_y = sim.opponent_x, sim.opponent_y
+    else:
+        paddle_x, paddle_y = sim.player_x, sim.player_y
+    target_y = predict_landing_y(paddle_x, sim.x, sim.y, sim.dx, sim.dy, sim.half_ball_h)
+    return track_ball(paddle_y, target_y, dead_zone)
+
+
+def track_ball(paddle_y, ball_y, dead_zone=5):
+    """Vectorized EasyAI-style policy: move each paddle toward the ball's current Y."""
+    delta = ball_y - paddle_y
+    return np.where(np.abs(delta) < dead_zone, 0, np.sign(delta))
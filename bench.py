@@ -0,0 +1,348 @@
+"""
+Benchmark suite for the simulation, AI and rendering hot paths of Pong game.
+Runs under the SDL dummy video driver (no display needed), writes results to JSON and
+compares them against a stored baseline, failing if anything regressed beyond a threshold.
+
+Usage:
+    python bench.py                              # run, write bench_results.json
+    python bench.py --save-baseline              # run and store as the new baseline
+    python bench.py --baseline bench_baseline.json --threshold 0.15
+"""
+
+import argparse
+import copy
+import json
+import os
+import pickle
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from settings import WINDOW_WIDTH, WINDOW_HEIGHT, WORLD_WIDTH, WORLD_HEIGHT, POS, DIFFICULTY_PRESETS
+from simulation import GameState, Vec2, step, FIXED_DT
+from ai import EasyAI, MediumAI, HardAI, ExpertAI, create_difficulty_ai
+
+DEFAULT_RESULTS = 'bench_results.json'
+DEFAULT_BASELINE = 'bench_baseline.json'
+
+
+def best_rate(func, count, repeats):
+    """Run func() (which performs `count` operations) `repeats` times; return the best ops/second."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+class FrameLimitClock:
+    """Stand-in for pygame.time.Clock: never sleeps, reports a fixed 60 fps frame time and stops the game after a number of frames."""
+
+    def __init__(self, frames, on_done):
+        self.frames = frames
+        self.on_done = on_done
+        self.ticks = 0
+
+    def tick(self, framerate=0):
+        self.ticks += 1
+        if self.ticks >= self.frames:
+            self.on_done()
+        return 1000 // 60
+
+    def get_fps(self):
+        return 60.0
+
+
+class MenuClock:
+    """Clock for blocking menus: never sleeps, optionally forces a full redraw each frame and exits after a number of frames."""
+
+    def __init__(self, frames, force_redraw):
+        self.frames = frames
+        self.force_redraw = force_redraw
+        self.ticks = 0
+
+    def tick(self, framerate=0):
+        self.ticks += 1
+        if self.force_redraw:
+            pygame.event.post(pygame.event.Event(pygame.WINDOWEXPOSED))
+        if self.ticks >= self.frames:
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE, mod=0, unicode='\x1b', scancode=0))
+        return 1000 // 60
+
+
+# --- Benchmarks: each returns (value, unit) where higher is better ---
+def bench_ball_update(steps=20000, repeats=3):
+    """Ball sprite physics step (swept move, walls, paddles, scoring)."""
+    from sprites import Ball, Paddle
+    group = pygame.sprite.Group()
+    paddles = pygame.sprite.Group()
+    ball = Ball((group,), POS['ball'], paddles=paddles)
+    Paddle((paddles,), POS['player'], is_player=True, ball=ball)
+    Paddle((paddles,), POS['opponent'], ball=ball)
+    ball.launch()
+
+    def run():
+        for _ in range(steps):
+            ball.step(FIXED_DT)
+    return best_rate(run, steps, repeats), 'steps/s'
+
+
+def bench_simulation_step(steps=20000, repeats=3):
+    """Headless simulation.step with both paddles idle."""
+    state = GameState(seed=1)
+    inputs = {'player': 0, 'opponent': 0}
+
+    def run():
+        for _ in range(steps):
+            step(state, inputs, FIXED_DT)
+    return best_rate(run, steps, repeats), 'steps/s'
+
+
+def _check_copies(state):
+    """Seeded states and strategies must survive pickle (process workers) and deepcopy with the same random streams."""
+    strategy = create_difficulty_ai('hard', state.difficulty_settings, state.make_rng('opponent'))
+    for copy_of in (copy.deepcopy, lambda value: pickle.loads(pickle.dumps(value))):
+        copied = copy_of(state)
+        if copied.snapshot() != state.snapshot() or copied.rng.random() != copy.copy(state.rng).random():
+            raise AssertionError("copied GameState differs from the original")
+        if copy_of(strategy).rng.getstate() != strategy.rng.getstate():
+            raise AssertionError("copied strategy has a different random stream")
+
+
+def bench_snapshot_restore(count=50000, repeats=3):
+    """GameState.snapshot() + restore() round trip (rollback, search and replay seeking)."""
+    state = GameState(seed=1)
+    step(state, {'player': 0, 'opponent': 0}, FIXED_DT)
+    _check_copies(state)
+
+    def run():
+        for _ in range(count):
+            state.restore(state.snapshot())
+    return best_rate(run, count, repeats), 'round trips/s'
+
+
+def _decide_bench(ai, ball_state, paddle_state, calls, repeats):
+    def run():
+        for _ in range(calls):
+            ai.decide(paddle_state, ball_state, FIXED_DT)
+    return best_rate(run, calls, repeats), 'decisions/s'
+
+
+def _approaching_ball(direction_y):
+    state = GameState(seed=1)
+    ball = state.ball
+    ball.pos = Vec2(WORLD_WIDTH * 0.75, WORLD_HEIGHT / 2)
+    ball.direction = Vec2(-1, direction_y).normalize()
+    ball.speed = 600
+    return ball, state.opponent
+
+
+def bench_easy_decide(calls=50000, repeats=3):
+    ball, paddle = _approaching_ball(0.3)
+    return _decide_bench(EasyAI(reaction_time=0), ball, paddle, calls, repeats)
+
+
+def bench_medium_decide(calls=50000, repeats=3):
+    ball, paddle = _approaching_ball(0.3)
+    return _decide_bench(MediumAI(reaction_time=0), ball, paddle, calls, repeats)
+
+
+def bench_hard_decide(calls=50000, repeats=3):
+    ball, paddle = _approaching_ball(0.3)
+    return _decide_bench(HardAI(reaction_time=0), ball, paddle, calls, repeats)
+
+
+def bench_hard_decide_many_bounces(calls=50000, repeats=3):
+    """HardAI with a steep, fast ball that bounces dozens of times before reaching the paddle."""
+    ball, paddle = _approaching_ball(40.0)
+    return _decide_bench(HardAI(reaction_time=0), ball, paddle, calls, repeats)
+
+
+def bench_hard_decide_uncached(calls=50000, repeats=3):
+    """HardAI prediction forced to recompute every call (trajectory epoch bumped each time)."""
+    ball, paddle = _approaching_ball(40.0)
+    ai = HardAI(reaction_time=0)
+
+    def run():
+        for _ in range(calls):
+            ball.epoch += 1
+            ai.decide(paddle, ball, FIXED_DT)
+    return best_rate(run, calls, repeats), 'decisions/s'
+
+
+def bench_expert_search(iterations=20000, repeats=3):
+    """ExpertAI search iterations (tree walk + one sampled rally) from a fixed position, tree kept between runs."""
+    ball, paddle = _approaching_ball(0.3)
+    ai = ExpertAI(max_iterations=iterations)
+
+    def run():
+        ai.search(paddle, ball)
+    return best_rate(run, iterations, repeats), 'iterations/s'
+
+
+def bench_game_frames(frames=600, repeats=3):
+    """Full Game.run frames (simulation, AI, dirty-rect drawing, display update) with no frame cap."""
+    import main
+
+    def run():
+        game = main.Game('hard', seed=1)
+        game.clock = FrameLimitClock(frames, lambda: setattr(game, 'running', False))
+        game.run()
+    return best_rate(run, frames, repeats), 'frames/s'
+
+
+def bench_game_reset(resets=500, repeats=3):
+    """Rematch setup: Game.reset on the existing window and sprites, cycling through difficulties."""
+    import main
+    game = main.Game('hard', seed=1)
+    difficulties = list(DIFFICULTY_PRESETS)
+
+    def run():
+        for index in range(resets):
+            game.reset(difficulties[index % len(difficulties)], seed=index)
+    return best_rate(run, resets, repeats), 'resets/s'
+
+
+def bench_vector_env_step(envs=4096, steps=200, repeats=3):
+    """SyncVectorEnv step over 4096 matches (batch physics, opponent policy, observations, auto-reset)."""
+    import numpy as np
+    import env
+    vector_env = env.SyncVectorEnv(envs, seed=1)
+    vector_env.reset()
+    actions = np.random.default_rng(1).integers(0, 3, size=(steps, envs))
+
+    def run():
+        for index in range(steps):
+            vector_env.step(actions[index])
+    return best_rate(run, envs * steps, repeats), 'env steps/s'
+
+
+def bench_chaos_step(balls=1000, steps=600, repeats=3):
+    """Chaos mode physics step with 1000 balls (grid rebuild, paddle and ball-ball collisions)."""
+    import chaos
+    state = chaos.ChaosState(balls, 'hard', seed=1)
+    inputs = {'player': 0, 'opponent': 0}
+
+    def run():
+        for _ in range(steps):
+            chaos.step(state, inputs, FIXED_DT)
+    return best_rate(run, steps, repeats), 'steps/s'
+
+
+def bench_chaos_frames(balls=1000, frames=300, repeats=3):
+    """Full ChaosGame.run frames with 1000 balls and no frame cap; 60 fps needs at least 60."""
+    import chaos
+
+    def run():
+        game = chaos.ChaosGame('hard', balls, seed=1)
+        game.clock = FrameLimitClock(frames, lambda: setattr(game, 'running', False))
+        game.run()
+    return best_rate(run, frames, repeats), 'frames/s'
+
+
+def bench_menu_frame(frames=300, repeats=3, force_redraw=False):
+    import ui
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    def run():
+        ui.main_menu(screen, MenuClock(frames, force_redraw))
+    return best_rate(run, frames, repeats), 'frames/s'
+
+
+def bench_menu_idle_frame(frames=300, repeats=3):
+    """Main menu frame when nothing changes (should skip drawing)."""
+    return bench_menu_frame(frames, repeats, force_redraw=False)
+
+
+def bench_menu_redraw_frame(frames=300, repeats=3):
+    """Main menu frame forced to redraw fully every frame."""
+    return bench_menu_frame(frames, repeats, force_redraw=True)
+
+
+BENCHMARKS = {
+    'ball_update': bench_ball_update,
+    'simulation_step': bench_simulation_step,
+    'snapshot_restore': bench_snapshot_restore,
+    'easy_decide': bench_easy_decide,
+    'medium_decide': bench_medium_decide,
+    'hard_decide': bench_hard_decide,
+    'hard_decide_many_bounces': bench_hard_decide_many_bounces,
+    'hard_decide_uncached': bench_hard_decide_uncached,
+    'expert_search': bench_expert_search,
+    'game_frames': bench_game_frames,
+    'game_reset': bench_game_reset,
+    'vector_env_step': bench_vector_env_step,
+    'chaos_step': bench_chaos_step,
+    'chaos_frames': bench_chaos_frames,
+    'menu_idle_frame': bench_menu_idle_frame,
+    'menu_redraw_frame': bench_menu_redraw_frame,
+}
+
+
+def run_benchmarks(names):
+    pygame.init()
+    pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    results = {}
+    for name in names:
+        value, unit = BENCHMARKS[name]()
+        results[name] = {'value': value, 'unit': unit}
+        print(f"{name:<28} {value:>14,.0f} {unit}")
+    pygame.quit()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (name, current, baseline, change) for every benchmark slower than baseline by more than threshold."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]['value']
+        change = (result['value'] - old) / old
+        marker = 'REGRESSION' if change < -threshold else ''
+        print(f"{name:<28} {change:>+8.1%} vs baseline {marker}")
+        if change < -threshold:
+            regressions.append((name, result['value'], old, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars benchmark suite")
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help="JSON file for this run's results")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="JSON baseline to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15, help="allowed slowdown before failing (fraction, default 0.15)")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = run_benchmarks(args.names or list(BENCHMARKS))
+    with open(args.output, 'w') as handle:
+        json.dump(results, handle, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,415 @@
+"""
+Multi-ball chaos mode for Pong game.
+Hundreds to thousands of balls at once. Balls live in NumPy arrays (one entry per ball, no
+Sprite per ball) and are stepped with vectorized code. A uniform-grid spatial hash, rebuilt
+every step, finds ball-vs-paddle candidates and nearby ball pairs, so collisions cost about
+O(balls) instead of O(balls^2). The opponent AI targets the most threatening ball, picked
+from a batched landing prediction over every approaching ball.
+
+Run with:
+    python main.py --chaos 1000
+"""
+
+import random
+
+import numpy as np
+import pygame
+
+import batch
+from settings import WORLD_WIDTH, WORLD_HEIGHT, POS, COLORS, DIFFICULTY_PRESETS
+from simulation import BALL_SPEED_CAP, FIXED_DT, MAX_FRAME_TIME, PaddleState, Scoreboard, Vec2, move_paddle
+from sprites import Paddle, StaticSprite, TextSprite
+from ai import create_difficulty_ai
+from textcache import GlyphAtlas
+from resources import assets, display_surface
+from profiler import FrameProfiler
+
+CHAOS_BALL_SIZE = 10        # balls are smaller than in a normal match so a thousand fit on the court
+CHAOS_POINTS_PER_BALL = 10  # win score per ball: with a thousand balls points come in by the hundred each second
+CHAOS_MIN_SPEED = 0.5       # fraction of the base speed below which collisions can't slow a ball
+CELL_SIZE = 32              # spatial hash cell (px); must be at least the ball diameter
+# neighbour cells checked for ball pairs: own cell plus half the ring, so each pair is seen once
+PAIR_OFFSETS = ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+class SpatialHash:
+    """
+    Uniform grid over the court. build() sorts ball indices by cell, so the balls in any cell
+    (and, because keys are row-major, in any horizontal run of cells) are one contiguous slice.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE, width=WORLD_WIDTH, height=WORLD_HEIGHT):
+        self.cell_size = cell_size
+        self.cols = int(np.ceil(width / cell_size))
+        self.rows = int(np.ceil(height / cell_size))
+        self._cells = np.arange(self.cols * self.rows)
+
+    def build(self, x, y):
+        """Bucket balls at (x, y) into cells."""
+        self.cx = np.clip((x // self.cell_size).astype(np.int64), 0, self.cols - 1)
+        self.cy = np.clip((y // self.cell_size).astype(np.int64), 0, self.rows - 1)
+        keys = self.cy * self.cols + self.cx
+        self.order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[self.order]
+        self.starts = np.searchsorted(sorted_keys, self._cells, side='left')
+        self.ends = np.searchsorted(sorted_keys, self._cells, side='right')
+
+    def query_rect(self, left, top, right, bottom):
+        """Indices of balls whose cell overlaps the rectangle (a superset of the balls touching it)."""
+        c0 = max(0, int(left // self.cell_size))
+        c1 = min(self.cols - 1, int(right // self.cell_size))
+        r0 = max(0, int(top // self.cell_size))
+        r1 = min(self.rows - 1, int(bottom // self.cell_size))
+        if c0 > c1 or r0 > r1:
+            return np.empty(0, dtype=np.int64)
+        slices = [self.order[self.starts[row * self.cols + c0]:self.ends[row * self.cols + c1]] for row in range(r0, r1 + 1)]
+        return np.concatenate(slices)
+
+    def candidate_pairs(self):
+        """(i, j) arrays of balls sharing a cell or in neighbouring cells, every unordered pair once."""
+        n = len(self.cx)
+        balls = np.arange(n)
+        pairs_i, pairs_j = [], []
+        for dx, dy in PAIR_OFFSETS:
+            ncx = self.cx + dx
+            ncy = self.cy + dy
+            valid = (ncx >= 0) & (ncx < self.cols) & (ncy < self.rows)
+            cells = (ncy * self.cols + ncx)[valid]
+            starts = self.starts[cells]
+            counts = self.ends[cells] - starts
+            total = counts.sum()
+            if total == 0:
+                continue
+            # expand each ball into one row per ball in its neighbour cell
+            i = np.repeat(balls[valid], counts)
+            first = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            j = self.order[first + np.arange(total)]
+            if dx == 0 and dy == 0:
+                keep = i < j
+                i, j = i[keep], j[keep]
+            pairs_i.append(i)
+            pairs_j.append(j)
+        if not pairs_i:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+class BallArray:
+    """Structure-of-arrays storage for many balls: position, direction, speed and a trajectory epoch per ball."""
+
+    def __init__(self, count, base_speed, rng, size=CHAOS_BALL_SIZE):
+        self.count = count
+        self.radius = size / 2
+        self.base_speed = base_speed
+        self.rng = rng
+        self.x = np.empty(count)
+        self.y = np.empty(count)
+        self.dx = np.empty(count)
+        self.dy = np.empty(count)
+        self.speed = np.full(count, float(base_speed))
+        self.epoch = np.zeros(count, dtype=np.int64)  # bumped on every bounce, hit and relaunch (AI caching)
+        # spread the opening serve over the middle of the court so the balls don't start overlapping
+        self.x[:] = rng.uniform(WORLD_WIDTH * 0.3, WORLD_WIDTH * 0.7, count)
+        self.y[:] = rng.uniform(self.radius, WORLD_HEIGHT - self.radius, count)
+        self.launch(np.ones(count, dtype=bool), rng.choice((-1.0, 1.0), count))
+
+    def launch(self, mask, direction_x):
+        """Give the masked balls base speed and a fresh direction (like simulation.launch, without moving them)."""
+        count = int(mask.sum())
+        if count == 0:
+            return
+        angle = self.rng.uniform(-0.5, 0.5, count)
+        length = np.hypot(direction_x, angle)
+        self.dx[mask] = direction_x / length
+        self.dy[mask] = angle / length
+        self.speed[mask] = self.base_speed
+        self.epoch[mask] += 1
+
+    def respawn(self, mask, direction_x):
+        """Relaunch the masked balls from the centre line at random heights."""
+        count = int(mask.sum())
+        if count == 0:
+            return
+        self.x[mask] = WORLD_WIDTH / 2
+        self.y[mask] = self.rng.uniform(self.radius, WORLD_HEIGHT - self.radius, count)
+        self.launch(mask, direction_x)
+
+
+class ChaosState:
+    """
+    A chaos match: BallArray, the two paddles (simulation.PaddleState, as in a normal match)
+    and the scoreboard. Every ball that leaves the court scores a point and is relaunched
+    from the centre line, so the ball count stays constant.
+    """
+
+    def __init__(self, balls=1000, difficulty='normal', difficulty_settings=None, seed=None, win_score=None):
+        if difficulty_settings is None:
+            difficulty_settings = DIFFICULTY_PRESETS.get(difficulty, DIFFICULTY_PRESETS['normal'])
+        self.difficulty = difficulty
+        self.difficulty_settings = difficulty_settings
+        self.rng = np.random.default_rng(seed)
+        self.ball_accel = difficulty_settings.get('ball_accel', 5)
+        self.balls = BallArray(balls, difficulty_settings.get('ball', 300), self.rng)
+        self.player = PaddleState(POS['player'], difficulty_settings)
+        self.opponent = PaddleState(POS['opponent'], difficulty_settings)
+        self.paddles = (self.player, self.opponent)
+        self.scoreboard = Scoreboard()
+        self.win_score = win_score if win_score is not None else balls * CHAOS_POINTS_PER_BALL
+        self.winner = None
+        self.time = 0.0
+        self.frame = 0
+        self.grid = SpatialHash()
+
+    def threat(self, paddle):
+        """
+        Index of the most threatening ball for a paddle, or None if nothing is coming its way.
+        One batched landing prediction covers every approaching ball; the threat is the soonest
+        arrival the paddle can still reach in time (or simply the soonest if none is reachable).
+        """
+        b = self.balls
+        distance = paddle.pos.x - b.x
+        approaching = np.flatnonzero(distance * b.dx > 0)
+        if len(approaching) == 0:
+            return None
+        landing = batch.predict_landing_y(paddle.pos.x, b.x[approaching], b.y[approaching],
+                                          b.dx[approaching], b.dy[approaching], b.radius)
+        arrival = (np.abs(distance[approaching]) - paddle.width / 2 - b.radius) / (np.abs(b.dx[approaching]) * b.speed[approaching])
+        travel = np.maximum(0.0, np.abs(landing - paddle.pos.y) - paddle.height / 2) / paddle.speed
+        reachable = arrival >= travel
+        candidates = np.where(reachable, arrival, np.inf) if reachable.any() else arrival
+        return int(approaching[np.argmin(candidates)])
+
+    def ball_view(self, index):
+        """A read-only ball for the AI classes (pos, direction, speed, epoch) showing one array entry."""
+        return BallView(self.balls, index)
+
+
+class BallView:
+    """Looks like a simulation.BallState to the AI; epoch changes when the target ball or its trajectory does."""
+
+    def __init__(self, balls, index):
+        if index is None:
+            # nothing approaching: a resting ball in the middle sends the paddle back to the centre
+            self.pos = Vec2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+            self.direction = Vec2()
+            self.speed = 0.0
+            self.epoch = None
+        else:
+            self.pos = Vec2(float(balls.x[index]), float(balls.y[index]))
+            self.direction = Vec2(float(balls.dx[index]), float(balls.dy[index]))
+            self.speed = float(balls.speed[index])
+            self.epoch = (index, int(balls.epoch[index]))
+        self.width = self.height = balls.radius * 2
+        self.radius = balls.radius  # the AI folds predictions off the walls at this radius (see ai.ball_radius)
+
+
+def _paddle_collisions(state):
+    """Bounce balls off both paddle faces, checking only the balls the grid puts near each paddle."""
+    b = state.balls
+    r = b.radius
+    for paddle in state.paddles:
+        near = state.grid.query_rect(paddle.left - r, paddle.top - r, paddle.right + r, paddle.bottom + r)
+        if len(near) == 0:
+            continue
+        overlap = ((b.x[near] - r < paddle.right) & (b.x[near] + r > paddle.left)
+                   & (b.y[near] - r < paddle.bottom) & (b.y[near] + r > paddle.top))
+        approaching = (paddle.pos.x - b.x[near]) * b.dx[near] > 0
+        hit = near[overlap & approaching]
+        if len(hit) == 0:
+            continue
+        # same response as simulation.deflect_off_paddle, then move the ball out in front of the face
+        b.dx[hit] *= -1
+        b.dy[hit] += state.rng.uniform(-0.3, 0.3, len(hit))
+        b.speed[hit] = np.minimum(b.speed[hit] + state.ball_accel, BALL_SPEED_CAP)
+        b.epoch[hit] += 1
+        b.x[hit] = np.where(b.dx[hit] > 0, paddle.right + r, paddle.left - r)
+
+
+def _ball_collisions(state):
+    """Elastic collisions between touching balls (equal mass: swap velocity along the contact normal)."""
+    b = state.balls
+    i, j = state.grid.candidate_pairs()
+    if len(i) == 0:
+        return 0
+    nx = b.x[j] - b.x[i]
+    ny = b.y[j] - b.y[i]
+    distance_sq = nx * nx + ny * ny
+    diameter = 2 * b.radius
+    touching = (distance_sq < diameter * diameter) & (distance_sq > 0)
+    i, j, nx, ny, distance_sq = i[touching], j[touching], nx[touching], ny[touching], distance_sq[touching]
+    if len(i) == 0:
+        return 0
+    distance = np.sqrt(distance_sq)
+    nx /= distance
+    ny /= distance
+    vxi, vyi = b.dx[i] * b.speed[i], b.dy[i] * b.speed[i]
+    vxj, vyj = b.dx[j] * b.speed[j], b.dy[j] * b.speed[j]
+    closing = (vxi - vxj) * nx + (vyi - vyj) * ny
+    # only pairs moving towards each other exchange momentum; all of them get pushed apart
+    impulse = np.where(closing > 0, closing, 0.0)
+    vx = b.dx * b.speed
+    vy = b.dy * b.speed
+    np.add.at(vx, i, -impulse * nx)
+    np.add.at(vy, i, -impulse * ny)
+    np.add.at(vx, j, impulse * nx)
+    np.add.at(vy, j, impulse * ny)
+    push = (diameter - distance) / 2
+    np.add.at(b.x, i, -push * nx)
+    np.add.at(b.y, i, -push * ny)
+    np.add.at(b.x, j, push * nx)
+    np.add.at(b.y, j, push * ny)
+    speed = np.hypot(vx, vy)
+    moving = speed > 0
+    b.dx[moving] = vx[moving] / speed[moving]
+    b.dy[moving] = vy[moving] / speed[moving]
+    b.speed[:] = np.clip(speed, b.base_speed * CHAOS_MIN_SPEED, BALL_SPEED_CAP)
+    b.epoch[i] += 1
+    b.epoch[j] += 1
+    return len(i)
+
+
+def step(state, inputs, dt):
+    """
+    Advance a chaos match by dt seconds (vectorized over all balls).
+    inputs: mapping with optional 'player' and 'opponent' intents (-1, 0, +1), as in simulation.step.
+    Returns the number of points scored this step as (player, opponent).
+    """
+    b = state.balls
+    r = b.radius
+    b.x += b.dx * b.speed * dt
+    b.y += b.dy * b.speed * dt
+
+    # top/bottom walls: reflect position and direction
+    top = (b.y < r) & (b.dy < 0)
+    bottom = (b.y > WORLD_HEIGHT - r) & (b.dy > 0)
+    b.y[top] = 2 * r - b.y[top]
+    b.y[bottom] = 2 * (WORLD_HEIGHT - r) - b.y[bottom]
+    walls = top | bottom
+    b.dy[walls] *= -1
+    b.epoch[walls] += 1
+
+    state.grid.build(b.x, b.y)
+    _paddle_collisions(state)
+    _ball_collisions(state)
+
+    # scoring: left exit is a point for the player, right exit for the opponent (as in simulation)
+    player_scored = b.x - r <= 0
+    opponent_scored = b.x + r >= WORLD_WIDTH
+    points = (int(player_scored.sum()), int(opponent_scored.sum()))
+    state.scoreboard.player += points[0]
+    state.scoreboard.opponent += points[1]
+    b.respawn(player_scored, 1.0)
+    b.respawn(opponent_scored, -1.0)
+
+    state.player.direction.y = inputs.get('player', 0)
+    state.opponent.direction.y = inputs.get('opponent', 0)
+    move_paddle(state.player, dt)
+    move_paddle(state.opponent, dt)
+
+    state.time += dt
+    state.frame += 1
+    if state.scoreboard.player >= state.win_score:
+        state.winner = "Player"
+    elif state.scoreboard.opponent >= state.win_score:
+        state.winner = "Opponent"
+    return points
+
+
+def _chaos_ball_surface():
+    size = CHAOS_BALL_SIZE
+    surface = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(surface, COLORS['ball'], (size / 2, size / 2), size / 2)
+    return surface.convert_alpha()
+
+
+class ChaosGame:
+    """
+    Window for chaos matches. Paddles and scores are sprites like in Game; the balls are drawn
+    straight from the arrays with one Surface.blits call per frame. Like Game it is a long-lived
+    session: reset() starts the next match on the same window and sprites.
+    """
+
+    def __init__(self, difficulty='normal', balls=1000, seed=None, profiler=None):
+        self.displaySurface = display_surface()
+        self.clock = pygame.time.Clock()
+        pygame.display.set_caption("Pong Wars - Chaos")
+        self.running = True
+        self.closed = False
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.balls = balls
+
+        self.allSprites = pygame.sprite.LayeredUpdates()
+        self.player = Paddle((self.allSprites,), POS['player'], is_player=True)
+        # the opponent is steered here (towards the threat), not by the sprite's own AI
+        self.opponent = Paddle((self.allSprites,), POS['opponent'], difficulty=None)
+        self.scoreboard = Scoreboard()  # the score sprites read whichever scoreboard reset() installs
+        font = assets.font(20)
+        white = assets.color('white')
+        atlas = GlyphAtlas(font, white)
+        TextSprite((self.allSprites,), font, lambda: str(self.scoreboard.opponent), white, 'midtop', (WORLD_WIDTH // 4, 10), layer=2, atlas=atlas)
+        TextSprite((self.allSprites,), font, lambda: str(self.scoreboard.player), white, 'midtop', (WORLD_WIDTH * 3 // 4, 10), layer=2, atlas=atlas)
+        TextSprite((self.allSprites,), font, lambda: f"{self.clock.get_fps():.0f} fps", white, 'topleft', (10, 10), layer=2, atlas=atlas)
+        StaticSprite((self.allSprites,), assets.surface('middle line'), (WORLD_WIDTH // 2 - 2, 0), layer=1)
+
+        self.ballSurf = assets.surface('chaos ball', _chaos_ball_surface)
+        self.background = assets.surface('background')
+        self.reset(difficulty, seed)
+
+    def reset(self, difficulty='normal', seed=None):
+        """Start a new chaos match with the same number of balls."""
+        self.running = True
+        self.state = ChaosState(self.balls, difficulty, seed=seed)
+        self.scoreboard = self.state.scoreboard
+        self.accumulator = 0.0
+        self.opponentAI = create_difficulty_ai(difficulty, self.state.difficulty_settings, random.Random(seed))
+        settings = self.state.difficulty_settings
+        self.player.configure(self.state.player, is_player=True, difficulty_settings=settings)
+        self.opponent.configure(self.state.opponent, difficulty=None, difficulty_settings=settings)
+
+    def draw_balls(self):
+        b = self.state.balls
+        left = (b.x - b.radius).astype(np.int32).tolist()
+        top = (b.y - b.radius).astype(np.int32).tolist()
+        surface = self.ballSurf
+        self.displaySurface.blits([(surface, position) for position in zip(left, top)], doreturn=False)
+
+    def run(self):
+        state = self.state
+        profiler = self.profiler
+        while self.running:
+            delta_time = self.clock.tick(60) / 1000
+            profiler.begin_frame(delta_time)
+            with profiler.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.running = False
+                        self.closed = True
+
+            if state.winner:
+                self.running = False
+                return state.winner
+
+            self.accumulator += min(delta_time, MAX_FRAME_TIME)
+            while self.accumulator >= FIXED_DT and not state.winner:
+                with profiler.phase('events'):
+                    player_intent = self.player.read_intent(FIXED_DT, state)
+                with profiler.phase('ai'):
+                    opponent_intent = 0
+                    if self.opponentAI:
+                        target = state.ball_view(state.threat(state.opponent))
+                        opponent_intent = self.opponentAI.decide(state.opponent, target, FIXED_DT, state)
+                with profiler.phase('update'):
+                    step(state, {'player': player_intent, 'opponent': opponent_intent}, FIXED_DT)
+                self.accumulator -= FIXED_DT
+
+            # every ball moves every frame, so the whole window is redrawn instead of dirty rects
+            with profiler.phase('draw'):
+                self.displaySurface.blit(self.background, (0, 0))
+                self.allSprites.update()
+                self.draw_balls()
+                self.allSprites.draw(self.displaySurface)
+            with profiler.phase('flip'):
+                pygame.display.flip()
+            profiler.end_frame()
+        return state.winner
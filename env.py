@@ -0,0 +1,414 @@
+"""
+Reinforcement-learning environments for Pong game.
+Gym-style reset()/step() over one paddle: the agent picks an index into ai.ACTIONS every step,
+the other paddle is driven by a built-in strategy, and the reward is the change in the score
+difference (+1 when the agent's side scores, -1 when it concedes).
+
+PongEnv plays one match on the exact headless simulation. The vectorized environments step
+many matches per call on batch.BatchSim: SyncVectorEnv in-process as one batch, and
+AsyncVectorEnv split over worker processes that read actions from and write observations to
+shared memory, so nothing is pickled per step. Observations are ai.observe() tuples, so a
+policy trained here plays in the game, tournaments and the server through ai.PolicyAI.
+
+Usage:
+    python env.py bench --envs 4096 --workers 4 --steps 500
+"""
+
+import argparse
+import ctypes
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+import ai
+from batch import BatchSim, intercept_ball, track_ball
+from settings import WORLD_WIDTH, WORLD_HEIGHT, DIFFICULTY_PRESETS
+from simulation import GameState, BALL_SPEED_CAP, FIXED_DT, step
+
+OBSERVATION_SIZE = len(ai.OBSERVATION_FIELDS)
+ACTION_INTENTS = np.array(ai.ACTIONS, dtype=np.int8)
+SIDES = ('player', 'opponent')
+DEFAULT_MAX_TIME = 600.0  # simulated seconds before an episode is truncated
+
+
+def _other(side):
+    return 'opponent' if side == 'player' else 'player'
+
+
+class PongEnv:
+    """
+    One match on the headless simulation (simulation.step), with an ai.py strategy on the other
+    side. Slower than the vector environments but exactly the game's physics; use it to check
+    a policy trained on the batch simulator.
+    """
+
+    def __init__(self, difficulty='normal', side='opponent', opponent=None, reaction_time=None,
+                 seed=None, dt=FIXED_DT, frame_skip=1, max_time=DEFAULT_MAX_TIME):
+        """
+        Args:
+            difficulty: Key into DIFFICULTY_PRESETS.
+            side: Paddle the agent moves ('player' on the right or 'opponent' on the left).
+            opponent: Strategy class for the other paddle (built with ai.create_ai each episode).
+                      Defaults to the difficulty's own opponent strategy.
+            reaction_time: Reaction time for that strategy (None keeps the difficulty default).
+            seed: Seed of the first episode; each reset() without a seed moves on to the next one.
+            dt: Simulation step in seconds.
+            frame_skip: Simulation steps each action is held for.
+            max_time: Simulated seconds before an episode is truncated.
+        """
+        if side not in SIDES:
+            raise ValueError(f"side must be one of {SIDES}, not {side!r}")
+        self.difficulty = difficulty
+        self.difficulty_settings = DIFFICULTY_PRESETS.get(difficulty, DIFFICULTY_PRESETS['normal'])
+        self.side = side
+        default_class, default_reaction = ai.DIFFICULTY_AI.get(difficulty, ai.DIFFICULTY_AI['normal'])
+        self.opponent_class = opponent or default_class
+        self.reaction_time = reaction_time if reaction_time is not None else default_reaction
+        self.next_seed = seed
+        self.dt = dt
+        self.frame_skip = frame_skip
+        self.max_time = max_time
+        self.state = None
+        self.strategy = None
+
+    def observation(self):
+        paddle = getattr(self.state, self.side)
+        other = getattr(self.state, _other(self.side))
+        return np.array(ai.observe(paddle, self.state.ball, other.pos.y), dtype=np.float32)
+
+    def _score_difference(self):
+        scoreboard = self.state.scoreboard
+        own, other = getattr(scoreboard, self.side), getattr(scoreboard, _other(self.side))
+        return own - other
+
+    def reset(self, seed=None):
+        """Start a new match. Returns (observation, info)."""
+        if seed is not None:
+            self.next_seed = seed
+        self.state = GameState(self.difficulty, self.difficulty_settings, seed=self.next_seed)
+        if self.next_seed is not None:
+            self.next_seed += 1
+        other_side = _other(self.side)
+        # a fixed search size for ExpertAI, so seeded episodes don't depend on CPU speed
+        self.strategy = ai.make_reproducible(ai.create_ai(self.opponent_class, self.difficulty_settings, self.reaction_time,
+                                                          self.state.make_rng(other_side)))
+        return self.observation(), {'seed': self.state.seed}
+
+    def step(self, action):
+        """Hold ACTIONS[action] for frame_skip steps. Returns (observation, reward, terminated, truncated, info)."""
+        state = self.state
+        other_side = _other(self.side)
+        other_paddle = getattr(state, other_side)
+        before = self._score_difference()
+        for _ in range(self.frame_skip):
+            inputs = {self.side: ai.ACTIONS[int(action)],
+                      other_side: self.strategy.decide(other_paddle, state.ball, self.dt, state)}
+            step(state, inputs, self.dt)
+            if state.winner is not None:
+                break
+        terminated = state.winner is not None
+        truncated = not terminated and state.time >= self.max_time
+        return self.observation(), float(self._score_difference() - before), terminated, truncated, {}
+
+
+def batch_observations(sim, side, out):
+    """Vectorized ai.observe for every match in a BatchSim, written into out (n x OBSERVATION_SIZE)."""
+    if side == 'player':
+        # mirrored, as ai.observe does for the right paddle
+        np.subtract(WORLD_WIDTH, sim.x, out=out[:, 0])
+        np.negative(sim.dx, out=out[:, 2])
+        own_y, other_y = sim.player_y, sim.opponent_y
+    else:
+        out[:, 0] = sim.x
+        out[:, 2] = sim.dx
+        own_y, other_y = sim.opponent_y, sim.player_y
+    out[:, 0] /= WORLD_WIDTH
+    np.divide(sim.y, WORLD_HEIGHT, out=out[:, 1])
+    out[:, 3] = sim.dy
+    np.divide(sim.speed, BALL_SPEED_CAP, out=out[:, 4])
+    np.divide(own_y, WORLD_HEIGHT, out=out[:, 5])
+    np.divide(other_y, WORLD_HEIGHT, out=out[:, 6])
+    return out
+
+
+# vectorized strategies for the other paddle: name -> f(sim, side) -> intents
+BATCH_OPPONENTS = {
+    'track': lambda sim, side: track_ball(sim.player_y if side == 'player' else sim.opponent_y, sim.y),
+    'intercept': lambda sim, side: intercept_ball(sim, side),
+}
+
+
+class SyncVectorEnv:
+    """
+    num_envs matches stepped together in one BatchSim. Actions, observations, rewards and flags
+    are arrays over the matches. Finished matches are reset automatically inside step(); the
+    observation they ended on is in info['final_observation'] for the rows that ended.
+    """
+
+    def __init__(self, num_envs, difficulty='normal', side='opponent', opponent='intercept', seed=None,
+                 dt=FIXED_DT, frame_skip=1, max_time=DEFAULT_MAX_TIME, buffers=None):
+        """
+        Args:
+            num_envs: Matches in the batch.
+            difficulty: Key into DIFFICULTY_PRESETS.
+            side: Paddle the agent moves in every match.
+            opponent: Name in BATCH_OPPONENTS, or f(sim, side) returning the other paddle's intents.
+            seed: Seed for the batch's random generator.
+            dt: Simulation step in seconds.
+            frame_skip: Simulation steps each action is held for.
+            max_time: Simulated seconds before a match is truncated.
+            buffers: Optional (observations, final_observations, rewards, terminated, truncated)
+                     arrays to write results into (AsyncVectorEnv passes shared memory here).
+        """
+        if side not in SIDES:
+            raise ValueError(f"side must be one of {SIDES}, not {side!r}")
+        self.num_envs = num_envs
+        self.sim = BatchSim(num_envs, difficulty, seed=seed)
+        self.side = side
+        self.opponent = BATCH_OPPONENTS[opponent] if isinstance(opponent, str) else opponent
+        self.dt = dt
+        self.frame_skip = frame_skip
+        self.max_time = max_time
+        if buffers is None:
+            buffers = (np.zeros((num_envs, OBSERVATION_SIZE), dtype=np.float32),
+                       np.zeros((num_envs, OBSERVATION_SIZE), dtype=np.float32),
+                       np.zeros(num_envs, dtype=np.float32),
+                       np.zeros(num_envs, dtype=bool),
+                       np.zeros(num_envs, dtype=bool))
+        self.observations, self.final_observations, self.rewards, self.terminated, self.truncated = buffers
+        self.elapsed = np.zeros(num_envs)
+        self.episode_returns = np.zeros(num_envs)
+
+    def reset(self, seed=None):
+        """Start every match over. Returns (observations, info)."""
+        if seed is not None:
+            self.sim.rng = np.random.default_rng(seed)
+        self.sim.reset()
+        self.elapsed[:] = 0.0
+        self.episode_returns[:] = 0.0
+        return batch_observations(self.sim, self.side, self.observations), {}
+
+    def step(self, actions):
+        """Hold each match's action for frame_skip steps. Returns (observations, rewards, terminated, truncated, info)."""
+        sim = self.sim
+        intents = ACTION_INTENTS[np.asarray(actions)]
+        own_key, other_key = ('player_scored', 'opponent_scored') if self.side == 'player' else ('opponent_scored', 'player_scored')
+        self.rewards[:] = 0.0
+        for _ in range(self.frame_skip):
+            other_intents = self.opponent(sim, _other(self.side))
+            if self.side == 'player':
+                events = sim.step(intents, other_intents, self.dt)
+            else:
+                events = sim.step(other_intents, intents, self.dt)
+            self.rewards += events[own_key]
+            self.rewards -= events[other_key]
+        self.elapsed += self.dt * self.frame_skip
+        np.copyto(self.terminated, sim.done)
+        np.greater_equal(self.elapsed, self.max_time, out=self.truncated)
+        self.truncated &= ~self.terminated
+        self.episode_returns += self.rewards
+
+        ended = self.terminated | self.truncated
+        batch_observations(sim, self.side, self.observations)
+        info = {'final_observation': self.final_observations}
+        if ended.any():
+            self.final_observations[ended] = self.observations[ended]
+            info['episode_returns'] = self.episode_returns[ended].copy()
+            sim.reset(ended)
+            self.elapsed[ended] = 0.0
+            self.episode_returns[ended] = 0.0
+            batch_observations(sim, self.side, self.observations)
+        return self.observations, self.rewards, self.terminated, self.truncated, info
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _shared_array(context, shape, dtype, ctype):
+    """A NumPy array over a RawArray, so worker processes started with it see the same memory."""
+    raw = context.RawArray(ctype, int(np.prod(shape)))
+    return raw, np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+
+def _view(raw, shape, dtype, start, stop):
+    return np.frombuffer(raw, dtype=dtype).reshape(shape)[start:stop]
+
+
+def _worker(connection, raws, num_envs, start, stop, seed, kwargs):
+    """Run one shard of an AsyncVectorEnv: matches start..stop, reading and writing the shared arrays."""
+    actions = _view(raws[0], num_envs, np.int8, start, stop)
+    buffers = (_view(raws[1], (num_envs, OBSERVATION_SIZE), np.float32, start, stop),
+               _view(raws[2], (num_envs, OBSERVATION_SIZE), np.float32, start, stop),
+               _view(raws[3], num_envs, np.float32, start, stop),
+               _view(raws[4], num_envs, np.bool_, start, stop),
+               _view(raws[5], num_envs, np.bool_, start, stop))
+    env = SyncVectorEnv(stop - start, seed=seed, buffers=buffers, **kwargs)
+    try:
+        while True:
+            command, argument = connection.recv()
+            if command == 'step':
+                _, _, _, _, info = env.step(actions)
+                connection.send(info.get('episode_returns'))
+            elif command == 'reset':
+                env.reset(argument)
+                connection.send(None)
+            else:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+
+class AsyncVectorEnv:
+    """
+    SyncVectorEnv split over worker processes. Each worker owns a contiguous shard of the matches
+    and steps it in its own BatchSim; actions, observations, rewards and flags live in shared
+    memory, so a step only sends a short command to each worker. step_async()/step_wait() let
+    the caller run its policy while the workers step.
+    """
+
+    def __init__(self, num_envs, workers=None, seed=None, copy=True, **kwargs):
+        """
+        Args:
+            num_envs: Matches over all workers.
+            workers: Worker processes (defaults to one per core, at most one per match).
+            seed: Seed the per-worker seeds are derived from.
+            copy: Return copies of the shared arrays (False returns views the next step overwrites).
+            kwargs: Passed to each worker's SyncVectorEnv (difficulty, side, opponent, dt, ...).
+                    A custom opponent must be picklable (a module-level function).
+        """
+        workers = max(1, min(workers or os.cpu_count() or 1, num_envs))
+        self.num_envs = num_envs
+        self.copy = copy
+        context = multiprocessing.get_context()
+        shapes = ((num_envs,), (num_envs, OBSERVATION_SIZE), (num_envs, OBSERVATION_SIZE),
+                  (num_envs,), (num_envs,), (num_envs,))
+        types = ((np.int8, ctypes.c_int8), (np.float32, ctypes.c_float), (np.float32, ctypes.c_float),
+                 (np.float32, ctypes.c_float), (np.bool_, ctypes.c_bool), (np.bool_, ctypes.c_bool))
+        shared = [_shared_array(context, shape, dtype, ctype) for shape, (dtype, ctype) in zip(shapes, types)]
+        raws = [raw for raw, _ in shared]
+        (self.actions, self.observations, self.final_observations,
+         self.rewards, self.terminated, self.truncated) = [array for _, array in shared]
+
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int)
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        self.connections = []
+        self.processes = []
+        for index in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker, daemon=True,
+                                      args=(child, raws, num_envs, bounds[index], bounds[index + 1], seeds[index], kwargs))
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.closed = False
+
+    def _results(self, *arrays):
+        return tuple(array.copy() for array in arrays) if self.copy else arrays
+
+    def reset(self, seed=None):
+        """Start every match over. Returns (observations, info)."""
+        worker_seeds = np.random.SeedSequence(seed).spawn(len(self.connections)) if seed is not None else [None] * len(self.connections)
+        for connection, worker_seed in zip(self.connections, worker_seeds):
+            connection.send(('reset', worker_seed))
+        for connection in self.connections:
+            connection.recv()
+        return self._results(self.observations)[0], {}
+
+    def step_async(self, actions):
+        """Hand the actions to the workers and return at once."""
+        self.actions[:] = actions
+        for connection in self.connections:
+            connection.send(('step', None))
+
+    def step_wait(self):
+        """Wait for the step started by step_async. Returns (observations, rewards, terminated, truncated, info)."""
+        returns = [connection.recv() for connection in self.connections]
+        info = {'final_observation': self._results(self.final_observations)[0]}
+        returns = [shard for shard in returns if shard is not None]
+        if returns:
+            info['episode_returns'] = np.concatenate(returns)
+        return (*self._results(self.observations, self.rewards, self.terminated, self.truncated), info)
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for connection in self.connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for connection in self.connections:
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _measure(env, steps, rng):
+    """Environment steps per second under a random policy (policy time included)."""
+    env.reset(seed=1)
+    if isinstance(env, PongEnv):
+        start = time.perf_counter()
+        for action in rng.integers(0, len(ai.ACTIONS), size=steps):
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated:
+                env.reset()
+        return steps / (time.perf_counter() - start)
+    actions = rng.integers(0, len(ai.ACTIONS), size=(steps, env.num_envs))
+    start = time.perf_counter()
+    for index in range(steps):
+        env.step(actions[index])
+    return steps * env.num_envs / (time.perf_counter() - start)
+
+
+def bench(args):
+    rng = np.random.default_rng(0)
+    kwargs = {'difficulty': args.difficulty, 'frame_skip': args.frame_skip}
+    results = {'single': _measure(PongEnv(**kwargs), args.steps, rng)}
+    with SyncVectorEnv(args.envs, **kwargs) as env:
+        results['sync'] = _measure(env, args.steps, rng)
+    with AsyncVectorEnv(args.envs, workers=args.workers, **kwargs) as env:
+        results['async'] = _measure(env, args.steps, rng)
+    for name, rate in results.items():
+        print(f"{name:<8} {rate:>14,.0f} env steps/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars reinforcement-learning environments")
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench_parser = commands.add_parser('bench', help="measure env steps per second for each backend")
+    bench_parser.add_argument('--envs', type=int, default=4096, help="matches in the vector environments")
+    bench_parser.add_argument('--workers', type=int, default=None, help="async worker processes (default: one per core)")
+    bench_parser.add_argument('--steps', type=int, default=500, help="steps per measurement")
+    bench_parser.add_argument('--frame-skip', type=int, default=1)
+    bench_parser.add_argument('--difficulty', default='normal', choices=list(DIFFICULTY_PRESETS))
+    args = parser.parse_args(argv)
+    bench(args)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,123 +1,366 @@
+import time
+START_TIME = time.perf_counter()  # taken before the heavy imports (pygame) so the startup report includes them
+import argparse
+import math
+import os
+import socket
 import pygame
-from random import randint, uniform
+from random import randint
 from os.path import join
 from settings import *
 from sprites import *
+from simulation import GameState, Scoreboard, step, FIXED_DT, MAX_FRAME_TIME, WIN_SCORE
+from textcache import text_cache, GlyphAtlas
+from profiler import FrameProfiler, ProfilerOverlay, StartupTimer
+from resources import assets, display_surface
+from replay import ReplayWriter
+from netplay import DEFAULT_PORT, RollbackSession, UdpTransport, LossyTransport, host_match, join_match, match_settings
 from ui import main_menu, difficulty_menu, game_over_menu
-from ai import EasyAI, MediumAI, HardAI
 
 class Game:
-    def __init__(self, difficulty='normal'):
+    """
+    Long-lived game session: owns the window, fonts and sprites, and plays one match per run().
+    reset() sets up the next match (new difficulty, seed, recording or network peer) on the
+    existing sprites, so a rematch costs a fresh GameState and an AI instead of a rebuilt scene.
+
+    render_scale draws the match on an internal surface of the world size times the scale and scales
+    the changed areas up to the window, trading pixels for frame time. Sprites only read the
+    simulation, so the match itself is the same at every scale.
+    """
+
+    def __init__(self, difficulty='normal', seed=None, profiler=None, record_path=None, connection=None, input_delay=2, ai_worker=None,
+                 render_scale=RENDER_SCALE):
         # pygame.init()  # Removed: handled in if __name__
-        self.displaySurface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        if render_scale <= 0:
+            raise ValueError(f"render_scale must be positive, not {render_scale}")
+        # reuse the window the menus drew in; set_mode again would recreate it
+        self.window = display_surface()
+        # everything is drawn on displaySurface: the window itself, or a smaller surface scaled up to it in present()
+        self.renderScale = render_scale
+        render_size = (round(WORLD_WIDTH * render_scale), round(WORLD_HEIGHT * render_scale))
+        if render_size == self.window.get_size():
+            self.displaySurface = self.window
+        else:
+            self.displaySurface = pygame.Surface(render_size).convert(self.window)
+            # smallest blocks of render and window pixels that line up exactly (3 and 4 at scale 0.75);
+            # present() scales whole blocks so neighbouring updates never disagree about a pixel edge
+            window_width, window_height = self.window.get_size()
+            self.renderBlock = (render_size[0] // math.gcd(render_size[0], window_width), render_size[1] // math.gcd(render_size[1], window_height))
+            self.windowBlock = (window_width // math.gcd(render_size[0], window_width), window_height // math.gcd(render_size[1], window_height))
         self.clock = pygame.time.Clock()
         pygame.display.set_caption("Pong Wars")
         self.running = True
+        # set when the window is closed; the session should end instead of showing the next menu
+        self.closed = False
+
+        # run the opponent AI in a worker thread/process instead of the render loop (None: inline)
+        self.aiWorker = ai_worker
 
-        # Load difficulty settings
-        from settings import DIFFICULTY_PRESETS
-        self.difficulty_settings = DIFFICULTY_PRESETS.get(difficulty, DIFFICULTY_PRESETS['normal'])
-        
         # Debug mode flag (can be toggled with 'D' key during gameplay)
         self.debug_mode = False  # Set to True to enable debug features (e.g., predicted ball landing spot)
+        # Per-phase frame timings; always collected, shown with the debug overlay
+        self.profiler = profiler if profiler is not None else FrameProfiler()
 
-        # Sprite groups
-        self.allSprites = pygame.sprite.Group()
+        # Sprite groups: LayeredDirty only redraws (and pushes to the screen) what changed
+        self.allSprites = pygame.sprite.LayeredDirty()
         self.paddleSprites = pygame.sprite.Group()
 
+        # Ball and paddles are created once and pointed at each new match's state by reset()
+        # The paddle needs the ball reference to track the ball's position for AI logic (e.g., opponent movement).
+        scale = render_scale
+        self.ball = Ball((self.allSprites,), POS['ball'], paddles=self.paddleSprites, scale=scale)
+        self.player = Paddle((self.allSprites, self.paddleSprites), POS['player'], is_player=True, ball=self.ball, scale=scale)
+        self.opponent = Paddle((self.allSprites, self.paddleSprites), POS['opponent'], ball=self.ball, scale=scale)
+        self.scoreboard = Scoreboard()  # the score sprites read whichever scoreboard reset() installs
+
+        # Font and middle line come from the shared asset manager (loaded once per process)
+        self.font = assets.font(max(1, round(20 * scale)))
+        self.middleLineSurf = assets.scaled_surface('middle line', scale)
+
+        # Overlay sprites, layered in the original draw order: debug < scores < middle line
+        white = assets.color('white')
+        yellow = assets.color('yellow')
+        # every possible score is rendered once up front; debug numbers come from a glyph atlas
+        text_cache.preload(self.font, [str(score) for score in range(WIN_SCORE + 1)], white)
+        self.debugAtlas = GlyphAtlas(self.font, yellow)
+        # overlay positions are in world units like the sprites, converted to pixels of the render surface
+        def at(x, y):
+            return round(x * scale), round(y * scale)
+        # Corrected: opponent score on left, player score on right
+        self.opponentScoreSprite = TextSprite((self.allSprites,), self.font, lambda: str(self.scoreboard.opponent), white, 'midtop', at(WORLD_WIDTH // 4, 10), layer=2)
+        self.playerScoreSprite = TextSprite((self.allSprites,), self.font, lambda: str(self.scoreboard.player), white, 'midtop', at(WORLD_WIDTH * 3 // 4, 10), layer=2)
+        self.middleLine = StaticSprite((self.allSprites,), self.middleLineSurf, at(WORLD_WIDTH // 2 - 2, 0), layer=3)
+        # Display Ai's last predicted landing spot, current paddle direction and reaction timer for debugging
+        self.profilerFont = assets.font(max(1, round(14 * scale)))
+        self.debugSprites = [ProfilerOverlay((self.allSprites,), self.profiler, GlyphAtlas(self.profilerFont, white), at(WORLD_WIDTH - 330, WORLD_HEIGHT - 210),
+                                             size=at(320, 200), layer=4)]
+        # AI readouts only exist while the opponent has an AI (not in network matches)
+        self.aiDebugSprites = [
+            MarkerSprite((self.allSprites,), lambda: (int(self.opponent.pos.x), int(self.opponent.ai.last_predicted_y)), pygame.Color('red'), layer=1, scale=scale),
+            TextSprite((self.allSprites,), self.font, lambda: f"Reaction Time: {self.opponent.ai.elapsed_time:.2f}s", yellow, 'topleft', at(10, WORLD_HEIGHT - 30), layer=1, atlas=self.debugAtlas),
+            TextSprite((self.allSprites,), self.font, lambda: f"Direction: {self.opponent.direction.y}", yellow, 'topleft', at(10, WORLD_HEIGHT - 60), layer=1, atlas=self.debugAtlas),
+            TextSprite((self.allSprites,), self.font, lambda: f"Late AI decisions: {getattr(self.opponent.ai, 'late_decisions', 0)}", yellow, 'topleft', at(10, WORLD_HEIGHT - 90), layer=1, atlas=self.debugAtlas),
+        ]
+
+        # Background the dirty areas are cleared with
+        self.background = assets.scaled_surface('background', scale)
+        self.allSprites.clear(self.displaySurface, self.background)
+
+        self.matchEnded = True  # nothing to finish before the first reset
+        self.reset(difficulty, seed, record_path, connection, input_delay)
+
+    def reset(self, difficulty='normal', seed=None, record_path=None, connection=None, input_delay=2):
+        """Set up a new match on the existing window and sprites (finishing the previous one if needed)."""
+        self.end_match()
+        self.matchEnded = False
+        self.running = True
+        # Load difficulty settings
+        self.difficulty_settings = DIFFICULTY_PRESETS.get(difficulty, DIFFICULTY_PRESETS['normal'])
+        # Network match (netplay.Connection): both paddles at player speed, the peer controls the other one
+        self.connection = connection
+        if connection:
+            self.difficulty_settings = match_settings(difficulty)
+
+        # Headless simulation state; the sprites only render from it
+        # a seed makes the match reproducible (same seed + same inputs = same match)
+        # the ball is launched once by GameState at start (preserve prior behavior)
+        self.state = GameState(difficulty, self.difficulty_settings, seed=seed)
+        # leftover real time not yet simulated in whole FIXED_DT steps
+        self.accumulator = 0.0
+        # optional binary replay of every step's inputs (needs a seeded match to be replayable)
+        self.recorder = ReplayWriter(record_path, self.state) if record_path else None
+        # rollback netcode session stepping the state in network matches
+        self.session = None
+        if connection:
+            self.session = RollbackSession(self.state, connection.side, connection.transport, connection.peer,
+                                           input_delay=input_delay, welcome=connection.welcome)
         # Scoreboard manages scores
-        self.scoreboard = Scoreboard()
+        self.scoreboard = self.state.scoreboard
 
-        # Create the ball first so we can pass it to paddles for simple AI.
-        # The paddle needs the ball reference to track the ball's position for AI logic (e.g., opponent movement).
-        self.ball = Ball((self.allSprites,), POS['ball'], paddles=self.paddleSprites, scoreboard=self.scoreboard, difficulty_settings=self.difficulty_settings)
-        # pass the ball instance into paddles so opponent AI can read ball.pos
-        self.player = Paddle((self.allSprites, self.paddleSprites), POS['player'], is_player=True, ball=self.ball, difficulty_settings=self.difficulty_settings, difficulty=difficulty)
-        self.opponent = Paddle((self.allSprites, self.paddleSprites), POS['opponent'], is_player=False, ball=self.ball, difficulty_settings=self.difficulty_settings, difficulty=difficulty)
-
-        # Font (create once; render score surfaces each frame)
-        self.font = pygame.font.Font(join("assets", "AlfaSlabOne-Regular.ttf"), 20)
-        # launch once at start (preserve prior behavior)
-        self.ball.launch()
-        # middle line (create once; reuse each frame)
-        self.middleLineColor = (*pygame.Color('white')[:3], 128)  # RGBA with alpha for transparency
-        self.middleLineSurf = pygame.Surface((4, WINDOW_HEIGHT), pygame.SRCALPHA)
-        self.middleLineSurf.fill(self.middleLineColor)
-        # second launch preserved from original behavior  # Removed: duplicate
+        self.ball.configure(self.state.ball, self.scoreboard, self.difficulty_settings)
+        # over the network neither paddle has an AI: the local one reads the keyboard, the remote one follows the peer
+        local_side = connection.side if connection else 'player'
+        ai_difficulty = None if connection else difficulty
+        self.player.configure(self.state.player, is_player=local_side == 'player', difficulty=ai_difficulty, difficulty_settings=self.difficulty_settings)
+        self.opponent.configure(self.state.opponent, is_player=local_side == 'opponent', difficulty=ai_difficulty, difficulty_settings=self.difficulty_settings, rng=self.state.make_rng('opponent'), ai_worker=self.aiWorker)
+        self.localPaddle = self.player if local_side == 'player' else self.opponent
+        self.set_debug_mode(self.debug_mode)
+
+    def set_debug_mode(self, enabled):
+        """Show or hide the debug overlay sprites."""
+        self.debug_mode = enabled
+        for sprite in self.debugSprites:
+            sprite.visible = int(enabled)
+        for sprite in self.aiDebugSprites:
+            sprite.visible = int(enabled and self.opponent.ai is not None)
+
+    @property
+    def winner(self):
+        """Match winner; in a network match only once the peer's inputs confirm it."""
+        if self.session:
+            return self.session.winner
+        return self.state.winner
+
+    def end_match(self):
+        """Finish the replay file and tell a network peer we are leaving (once per match)."""
+        if self.matchEnded:
+            return
+        self.matchEnded = True
+        if self.recorder:
+            self.recorder.close()
+        if self.session:
+            self.session.close()
+        self.opponent.release_ai()
+
+    def repaint(self):
+        """Redraw the whole window on the next frame (first frame, or after the window was exposed)."""
+        self.displaySurface.blit(self.background, (0, 0))
+        self.allSprites.repaint_rect(self.displaySurface.get_rect())
+
+    def present(self, dirty_rects):
+        """
+        Scale the dirty areas of the render surface up into the window; returns the window rects to update.
+        Areas are widened to whole blocks (see __init__), so every window pixel comes out the same as
+        scaling the whole surface would make it.
+        """
+        if self.displaySurface is self.window:
+            return dirty_rects
+        (block_x, block_y), (window_block_x, window_block_y) = self.renderBlock, self.windowBlock
+        window_rects = []
+        for rect in dirty_rects:
+            left, top = rect.left // block_x, rect.top // block_y
+            right, bottom = -(-rect.right // block_x), -(-rect.bottom // block_y)
+            if right <= left or bottom <= top:
+                continue
+            source = pygame.Rect(left * block_x, top * block_y, (right - left) * block_x, (bottom - top) * block_y)
+            target = pygame.Rect(left * window_block_x, top * window_block_y, (right - left) * window_block_x, (bottom - top) * window_block_y)
+            self.window.blit(pygame.transform.scale(self.displaySurface.subsurface(source), target.size), target)
+            window_rects.append(target)
+        return window_rects
 
 
     def run(self):
+        self.repaint()
+        profiler = self.profiler
         while self.running:
             delta_time = self.clock.tick(60) / 1000
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_d:
-                        self.debug_mode = not self.debug_mode  # Toggle debug mode
+            profiler.begin_frame(delta_time)
+            with profiler.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.running = False
+                        self.closed = True
+                    elif event.type == pygame.WINDOWEXPOSED:
+                        self.repaint()
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_d:
+                            self.set_debug_mode(not self.debug_mode)  # Toggle debug mode
 
             # Check for first-to-10 win condition
-            if self.scoreboard.player >= 10:
-                self.running = False
-                return "Player"
-            elif self.scoreboard.opponent >= 10:
+            if self.winner or (self.session and self.session.peer_left):
                 self.running = False
-                return "Opponent"
-
-            # Update the sprites once per frame
-            self.allSprites.update(delta_time)
-
-            # update score surfaces each frame so the display reflects changes
-            self.playerScoreSurf = self.font.render(str(self.scoreboard.player), True, pygame.Color('white'))
-            self.opponentScoreSurf = self.font.render(str(self.scoreboard.opponent), True, pygame.Color('white'))
-            # Corrected: opponent score on left, player score on right
-            self.opponentScoreRect = self.opponentScoreSurf.get_rect(midtop=(WINDOW_WIDTH // 4, 10))
-            self.playerScoreRect = self.playerScoreSurf.get_rect(midtop=(WINDOW_WIDTH * 3 // 4, 10))
-            self.middleLineSurf.fill(self.middleLineColor)
-
-            # Draw everything
-            self.displaySurface.fill(COLORS['bg'])
-            self.allSprites.draw(self.displaySurface)
-            if self.debug_mode:
-                # Display Ai's last predicted landing spot, current paddle direction and reaction timer for debugging
-                if self.opponent.ai:
-                    predicted_y = self.opponent.ai.last_predicted_y
-                    pygame.draw.circle(self.displaySurface, pygame.Color('red'), (int(self.opponent.pos.x), int(predicted_y)), 5)
-                    # Display reaction timer
-                    reaction_time_text = self.font.render(f"Reaction Time: {self.opponent.ai.elapsed_time:.2f}s", True, pygame.Color('yellow'))
-                    self.displaySurface.blit(reaction_time_text, (10, WINDOW_HEIGHT - 30))
-                    # Display current direction
-                    direction_text = self.font.render(f"Direction: {self.opponent.direction.y}", True, pygame.Color('yellow'))
-                    self.displaySurface.blit(direction_text, (10, WINDOW_HEIGHT - 60))
-            self.displaySurface.blit(self.playerScoreSurf, self.playerScoreRect)
-            self.displaySurface.blit(self.opponentScoreSurf, self.opponentScoreRect)
-            self.displaySurface.blit(self.middleLineSurf, (WINDOW_WIDTH // 2 - 2, 0))
-            pygame.display.flip()
-
-        # Quit pygame
-        pygame.quit()
+                self.end_match()
+                return self.winner
+
+            # Advance the simulation in fixed steps, then sync sprites to it
+            self.accumulator += min(delta_time, MAX_FRAME_TIME)
+            while self.accumulator >= FIXED_DT and not self.winner:
+                for sprite in (self.ball, self.player, self.opponent):
+                    sprite.remember_position()
+                if self.session:
+                    with profiler.phase('events'):
+                        local_intent = self.localPaddle.read_intent(FIXED_DT, self.state)
+                    with profiler.phase('update'):
+                        scored = self.session.advance(local_intent)  # may roll back and re-simulate
+                else:
+                    with profiler.phase('events'):
+                        player_intent = self.player.read_intent(FIXED_DT, self.state)
+                    with profiler.phase('ai'):
+                        opponent_intent = self.opponent.read_intent(FIXED_DT, self.state)
+                    inputs = {'player': player_intent, 'opponent': opponent_intent}
+                    if self.recorder:
+                        self.recorder.record(self.state, inputs)
+                    with profiler.phase('update'):
+                        scored = step(self.state, inputs, FIXED_DT)
+                if scored:
+                    self.ball.remember_position()  # relaunched: don't interpolate across the screen
+                self.accumulator -= FIXED_DT
+            with profiler.phase('update'):
+                # blend between the last two physics steps for smooth rendering
+                self.allSprites.update(delta_time, alpha=self.accumulator / FIXED_DT)
+
+            # Draw only what changed and push just those rects to the screen
+            with profiler.phase('draw'):
+                dirty_rects = self.allSprites.draw(self.displaySurface)
+            with profiler.phase('flip'):
+                pygame.display.update(self.present(dirty_rects))
+            profiler.end_frame()
+
+        # window closed: the caller owns pygame and decides whether to quit
+        self.end_match()
 
 if __name__ == '__main__':
-    pygame.init()
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    parser = argparse.ArgumentParser(description="Pong Wars")
+    parser.add_argument('--profile-csv', metavar='PATH', help="write per-frame phase timings to this CSV file on exit")
+    parser.add_argument('--record-dir', metavar='DIR', help="save a binary replay of every match in this directory (see replay.py)")
+    parser.add_argument('--startup-report', action='store_true', help="print startup and screen transition times on exit")
+    parser.add_argument('--chaos', type=int, metavar='BALLS', help="multi-ball chaos mode with this many balls (e.g. 1000)")
+    parser.add_argument('--host', type=int, nargs='?', const=DEFAULT_PORT, metavar='PORT', help="host a two-player network match")
+    parser.add_argument('--connect', metavar='HOST[:PORT]', help="join a network match")
+    parser.add_argument('--difficulty', default='normal', choices=list(DIFFICULTY_PRESETS), help="ball and paddle preset for a hosted match")
+    parser.add_argument('--input-delay', type=int, default=2, help="initial network input delay in frames (tuned automatically)")
+    parser.add_argument('--sim-latency', type=float, default=0.0, metavar='MS', help="testing: add this one-way latency to outgoing packets")
+    parser.add_argument('--sim-jitter', type=float, default=0.0, metavar='MS', help="testing: vary the added latency by ± this much")
+    parser.add_argument('--sim-loss', type=float, default=0.0, metavar='FRACTION', help="testing: drop this fraction of outgoing packets")
+    parser.add_argument('--ai-worker', choices=('thread', 'process'), help="decide the opponent's moves in a worker so slow AIs can't stall frames")
+    parser.add_argument('--render-scale', type=float, default=RENDER_SCALE, metavar='SCALE', help="draw matches at this fraction of the window resolution and scale up (e.g. 0.5)")
+    args = parser.parse_args()
+    if args.render_scale <= 0:
+        parser.error("--render-scale must be positive")
+    if args.chaos and args.render_scale != 1:
+        parser.error("--render-scale isn't supported in chaos mode")
+
+    timer = StartupTimer(START_TIME)
+    timer.mark('imports')
+    # only what the game uses: initializing audio and the other subsystems can take a while on kiosk hardware
+    pygame.display.init()
+    pygame.font.init()
+    screen = display_surface()
     clock = pygame.time.Clock()
-    
-    while True:
-        # Show main menu
-        start_game = main_menu(screen, clock, title_text="Pong Wars")
-        if not start_game:
-            pygame.quit()
-            break
-        
-        # Show difficulty selection menu
-        difficulty = difficulty_menu(screen, clock)
-        
-        # Run the game and get the winner
-        winner = Game(difficulty=difficulty).run()
-        print(winner)
-        # Show game over menu
-        play_again = game_over_menu(screen, clock, winner)
-        if not play_again:
+    timer.mark('window')
+    # fonts and text for every screen load during idle menu frames
+    assets.queue_defaults()
+    # one profiler across all matches so the CSV covers the whole session
+    profiler = FrameProfiler(keep_samples=bool(args.profile_csv))
+
+    try:
+        if args.host is not None or args.connect:
+            # two-player network match, then exit
+            if args.sim_latency or args.sim_jitter or args.sim_loss:
+                transport = LossyTransport.bind('0.0.0.0', args.host or 0, latency=args.sim_latency / 1000,
+                                                jitter=args.sim_jitter / 1000, loss=args.sim_loss)
+            else:
+                transport = UdpTransport.bind('0.0.0.0', args.host or 0)
+            if args.host is not None:
+                print(f"waiting for a player on port {args.host}...")
+                connection = host_match(transport, args.difficulty)
+            else:
+                host, _, port = args.connect.partition(':')
+                connection = join_match(transport, (socket.gethostbyname(host), int(port or DEFAULT_PORT)))
+            game = Game(difficulty=connection.difficulty, seed=connection.seed, profiler=profiler,
+                        connection=connection, input_delay=args.input_delay, render_scale=args.render_scale)
+            print(game.run())
+            print(game.session.stats())
+            transport.close()
             pygame.quit()
-            break
+        else:
+            game = None
+            while True:
+                # Show main menu
+                start_game = main_menu(screen, clock, title_text="Pong Wars", on_first_frame=lambda: timer.mark('main menu'))
+                if not start_game:
+                    pygame.quit()
+                    break
+
+                # Show difficulty selection menu
+                timer.begin('difficulty menu')
+                difficulty = difficulty_menu(screen, clock, on_first_frame=lambda: timer.mark('difficulty menu'))
 
+                # Run the game and get the winner
+                record_path = None
+                seed = None
+                if args.record_dir:
+                    # replays need a seeded match
+                    seed = randint(0, 2 ** 32 - 1)
+                    os.makedirs(args.record_dir, exist_ok=True)
+                    record_path = join(args.record_dir, f"match-{time.strftime('%Y%m%d-%H%M%S')}-{seed}.pwr")
+                # one session for the whole run: later matches reset it in place
+                timer.begin('match ready')
+                if game is None and args.chaos:
+                    from chaos import ChaosGame  # numpy-backed; only imported when chaos mode is asked for
+                    game = ChaosGame(difficulty, balls=args.chaos, seed=seed, profiler=profiler)
+                elif game is None:
+                    game = Game(difficulty=difficulty, seed=seed, profiler=profiler, record_path=record_path, ai_worker=args.ai_worker,
+                                render_scale=args.render_scale)
+                elif args.chaos:
+                    game.reset(difficulty, seed=seed)
+                else:
+                    game.reset(difficulty, seed=seed, record_path=record_path)
+                timer.mark('match ready')
+                winner = game.run()
+                print(winner)
+                if game.closed:
+                    pygame.quit()
+                    break
+                # Show game over menu
+                timer.begin('game over menu')
+                play_again = game_over_menu(screen, clock, winner, on_first_frame=lambda: timer.mark('game over menu'))
+                if not play_again:
+                    pygame.quit()
+                    break
+    finally:
+        if args.profile_csv:
+            profiler.write_csv(args.profile_csv)
+        if args.startup_report:
+            print(timer.report())
+            print(f"assets: {assets.load_time * 1000:.1f} ms loading, {assets.preload_time * 1000:.1f} ms preloading in idle frames, {assets.pending} still queued")
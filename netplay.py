@@ -0,0 +1,519 @@
+"""
+Two-player network play over UDP with rollback netcode for Pong game.
+Both peers simulate the whole match from the shared seed and only exchange paddle inputs.
+Your own paddle responds after a small input delay. The other paddle's missing inputs are
+predicted (it keeps doing what it last did). When the real inputs arrive and differ, the
+session restores the state saved at the first wrong frame and re-simulates to the present
+(a rollback). The input delay is tuned from the measured round-trip time and jitter, so it
+acts as a jitter buffer: it absorbs the late part of the input stream instead of rolling back.
+
+The host plays the right paddle ('player'), the client the left one ('opponent'); both
+paddles move at the preset's player speed.
+
+Usage:
+    python main.py --host 7777
+    python main.py --connect 192.168.1.20:7777
+    python netplay.py loopback --latency 60 --jitter 15 --loss 0.05 --seconds 120
+"""
+
+import argparse
+import heapq
+import math
+import random
+import socket
+import struct
+import time
+import zlib
+
+import ai
+from settings import DIFFICULTY_PRESETS
+from simulation import GameState, FIXED_DT, step
+from replay import pack_snapshot
+
+DEFAULT_PORT = 7777
+HELLO, WELCOME, INPUT, BYE = 1, 2, 3, 4
+# type, timestamp ms, echoed peer timestamp ms, sender frame, inputs received from peer (ack),
+# checksum frame, checksum, first input frame, input count; followed by `count` signed intent bytes
+INPUT_HEADER = struct.Struct('<BIIIIIIIB')
+WELCOME_PACKET = struct.Struct('<BQ16s')  # type, seed, difficulty
+CHECKSUM_INTERVAL = 120  # frames between state checksums exchanged for desync detection
+SYNC_TOLERANCE = 2       # frames a peer may run ahead of the other before it waits a tick
+MAX_PACKET = 2048
+
+
+def match_settings(difficulty):
+    """Preset for a network match: like the local preset, but both paddles get the player speed."""
+    settings = dict(DIFFICULTY_PRESETS.get(difficulty, DIFFICULTY_PRESETS['normal']))
+    settings['opponent'] = settings['player']
+    return settings
+
+
+class UdpTransport:
+    """Non-blocking UDP socket. send() never raises; receive() returns (data, address) or None."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.sock.setblocking(False)
+        self.sent = 0
+        self.received = 0
+
+    @classmethod
+    def bind(cls, host='0.0.0.0', port=0, **kwargs):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+        return cls(sock, **kwargs)
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def send(self, data, address):
+        try:
+            self.sock.sendto(data, address)
+            self.sent += 1
+        except OSError:
+            pass  # unreachable peer or full buffer: UDP may drop anyway, the protocol resends
+
+    def receive(self):
+        try:
+            data, address = self.sock.recvfrom(MAX_PACKET)
+        except (BlockingIOError, ConnectionError):
+            return None
+        self.received += 1
+        return data, address
+
+    def flush(self):
+        """Send anything queued (nothing for a plain socket)."""
+
+    def close(self):
+        self.sock.close()
+
+
+class LossyTransport(UdpTransport):
+    """
+    UdpTransport that simulates a bad network on the sending side, for testing over loopback:
+    drops outgoing packets with probability `loss` and delays the rest by latency ± jitter
+    seconds (so packets also arrive out of order). Queued packets go out on flush().
+    """
+
+    def __init__(self, sock, latency=0.0, jitter=0.0, loss=0.0, rng=None, clock=time.monotonic):
+        super().__init__(sock)
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = rng if rng is not None else random.Random()
+        self.clock = clock
+        self.dropped = 0
+        self._queue = []
+        self._sequence = 0
+
+    def send(self, data, address):
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        due = self.clock() + max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        self._sequence += 1
+        heapq.heappush(self._queue, (due, self._sequence, data, address))
+
+    def flush(self):
+        now = self.clock()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, data, address = heapq.heappop(self._queue)
+            UdpTransport.send(self, data, address)
+
+
+class Connection:
+    """Result of the handshake: everything needed to start a RollbackSession."""
+
+    def __init__(self, transport, peer, side, seed, difficulty, welcome=None):
+        self.transport = transport
+        self.peer = peer
+        self.side = side
+        self.seed = seed
+        self.difficulty = difficulty
+        self.welcome = welcome  # host only: resent if the client's HELLO shows it was lost
+
+
+def host_match(transport, difficulty='normal', seed=None, timeout=None):
+    """Wait for a client's HELLO and answer with the match seed and difficulty. Returns a Connection (host plays 'player')."""
+    if seed is None:
+        seed = random.getrandbits(32)
+    welcome = WELCOME_PACKET.pack(WELCOME, seed, difficulty.encode()[:16])
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while deadline is None or time.monotonic() < deadline:
+        transport.flush()
+        packet = transport.receive()
+        if packet is None:
+            time.sleep(0.005)
+            continue
+        data, address = packet
+        if data[:1] == bytes((HELLO,)):
+            transport.send(welcome, address)
+            return Connection(transport, address, 'player', seed, difficulty, welcome)
+    raise TimeoutError("no client joined")
+
+
+def join_match(transport, address, timeout=10.0, retry=0.2):
+    """Send HELLO to a host until it answers with WELCOME. Returns a Connection (client plays 'opponent')."""
+    deadline = time.monotonic() + timeout
+    next_hello = 0.0
+    while time.monotonic() < deadline:
+        now = time.monotonic()
+        if now >= next_hello:
+            transport.send(bytes((HELLO,)), address)
+            next_hello = now + retry
+        transport.flush()
+        packet = transport.receive()
+        if packet is None:
+            time.sleep(0.005)
+            continue
+        data, sender = packet
+        if sender == address and len(data) == WELCOME_PACKET.size and data[0] == WELCOME:
+            _, seed, difficulty = WELCOME_PACKET.unpack(data)
+            return Connection(transport, address, 'opponent', seed, difficulty.rstrip(b'\0').decode())
+    raise TimeoutError(f"no answer from {address[0]}:{address[1]}")
+
+
+class RollbackSession:
+    """
+    Runs one side of a networked match on top of a GameState.
+    Call advance(local_intent) once per fixed step. It reads the network, rolls back and
+    re-simulates if a predicted remote input was wrong, schedules the local input
+    `input_delay` frames ahead, steps the state and sends our unacknowledged inputs.
+    Every packet carries all inputs the peer hasn't acknowledged, so a lost packet is covered
+    by the next one.
+
+    Args:
+        state: GameState built from the connection's seed and match_settings(difficulty).
+        side: 'player' or 'opponent', the paddle this peer controls.
+        input_delay: initial local input delay in frames (tuned from then on if adaptive_delay).
+        rollback_window: frames of one-way latency left to rollback instead of input delay.
+        max_rollback: the session waits rather than run further ahead of the peer's inputs.
+    """
+
+    def __init__(self, state, side, transport, peer, input_delay=2, min_delay=1, max_delay=12,
+                 rollback_window=6, max_rollback=24, adaptive_delay=True, dt=FIXED_DT,
+                 clock=time.monotonic, welcome=None):
+        self.state = state
+        self.side = side
+        self.remote_side = 'opponent' if side == 'player' else 'player'
+        self.transport = transport
+        self.peer = peer
+        self.welcome = welcome
+        self.dt = dt
+        self.clock = clock
+        self.start_time = clock()
+        self.input_delay = input_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.rollback_window = rollback_window
+        self.max_rollback = max_rollback
+        self.adaptive_delay = adaptive_delay
+
+        self.local_inputs = [0] * input_delay  # our intent for every frame scheduled so far
+        self.peer_ack = 0                      # the peer has all our inputs before this frame
+        self.remote_inputs = {}                # peer intents received, by frame
+        self.remote_confirmed = 0              # we have every peer input before this frame
+        self.predicted = {}                    # frame -> guessed peer intent used for frames not yet confirmed
+        self.snapshots = {}                    # frame -> GameState.snapshot() before that frame was stepped
+        self.oldest_snapshot = 0
+        self.peer_frame = 0
+        self.peer_left = False
+
+        # round trip time estimate (RFC 6298 style smoothing), seconds
+        self.srtt = None
+        self.rttvar = 0.0
+        self._peer_timestamp = 0
+        self._peer_timestamp_at = 0
+
+        # desync detection: crc32 of the confirmed state every CHECKSUM_INTERVAL frames
+        self.checked_frame = 0
+        self.local_checksums = {}
+        self.remote_checksums = {}
+        self.last_checksum = (0, 0)
+
+        # statistics
+        self.rollbacks = 0
+        self.resimulated_frames = 0
+        self.max_rollback_depth = 0
+        self.stalls = 0
+        self.desyncs = 0
+        self.delay_frames_total = 0
+
+    # --- Inputs and simulation ---
+    def _predict_remote(self):
+        """The peer keeps doing what its latest confirmed input said."""
+        return self.remote_inputs.get(self.remote_confirmed - 1, 0)
+
+    def _schedule_local(self, intent):
+        target = self.state.frame + self.input_delay
+        if len(self.local_inputs) > target:
+            return  # delay just shrank: these frames' inputs were already sent, drop this one
+        while len(self.local_inputs) < target:
+            self.local_inputs.append(self.local_inputs[-1] if self.local_inputs else 0)  # delay grew: hold last input
+        self.local_inputs.append(int(intent))
+
+    def _simulate_frame(self):
+        frame = self.state.frame
+        remote = self.remote_inputs.get(frame)
+        if remote is None:
+            remote = self._predict_remote()
+            self.predicted[frame] = remote
+        else:
+            self.predicted.pop(frame, None)
+        self.snapshots[frame] = self.state.snapshot()
+        inputs = {self.side: self.local_inputs[frame], self.remote_side: remote}
+        return step(self.state, inputs, self.dt)
+
+    def _rollback(self, frame):
+        """Restore the state before `frame` and re-simulate up to the present with the corrected inputs."""
+        present = self.state.frame
+        self.state.restore(self.snapshots[frame])
+        while self.state.frame < present:
+            self._simulate_frame()
+        depth = present - frame
+        self.rollbacks += 1
+        self.resimulated_frames += depth
+        self.max_rollback_depth = max(self.max_rollback_depth, depth)
+
+    def advance(self, local_intent):
+        """
+        One fixed step. Returns 'player'/'opponent' if a point was scored in the new frame, else None.
+        Doesn't step (but still talks to the peer) while too far ahead of the peer or once the
+        local state has a winner that isn't confirmed yet.
+        """
+        self.poll()
+        scored = None
+        if self.state.winner is None:
+            if self._should_wait():
+                self.stalls += 1
+            else:
+                self._schedule_local(local_intent)
+                scored = self._simulate_frame()
+                self.delay_frames_total += self.input_delay
+                if self.adaptive_delay and self.state.frame % round(1 / self.dt) == 0:
+                    self._tune_delay()
+        self.send()
+        return scored
+
+    def _should_wait(self):
+        if self.state.frame - self.remote_confirmed >= self.max_rollback:
+            return True
+        # time sync: let the peer catch up if we are ahead of where it should be by now
+        one_way = (self.srtt or 0.0) / 2 / self.dt
+        return self.state.frame - (self.peer_frame + one_way) > SYNC_TOLERANCE
+
+    def _tune_delay(self):
+        """Move the input delay one frame towards one-way latency + jitter margin, minus the rollback window."""
+        if self.srtt is None:
+            return
+        needed = math.ceil((self.srtt / 2 + 2 * self.rttvar) / self.dt) - self.rollback_window
+        target = max(self.min_delay, min(self.max_delay, needed))
+        if target > self.input_delay:
+            self.input_delay += 1
+        elif target < self.input_delay:
+            self.input_delay -= 1
+
+    @property
+    def winner(self):
+        """The match winner, once every input up to the winning frame is confirmed."""
+        if self.state.winner and self.remote_confirmed >= self.state.frame:
+            return self.state.winner
+        return None
+
+    # --- Network ---
+    def _now_ms(self):
+        return (int((self.clock() - self.start_time) * 1000) + 1) & 0xFFFFFFFF
+
+    def send(self):
+        now = self._now_ms()
+        echo = (self._peer_timestamp + now - self._peer_timestamp_at) & 0xFFFFFFFF if self._peer_timestamp else 0
+        first = self.peer_ack
+        payload = self.local_inputs[first:first + 255]
+        header = INPUT_HEADER.pack(INPUT, now, echo, self.state.frame, self.remote_confirmed,
+                                   self.last_checksum[0], self.last_checksum[1], first, len(payload))
+        self.transport.send(header + struct.pack(f'<{len(payload)}b', *payload), self.peer)
+        self.transport.flush()
+
+    def poll(self):
+        """Read every waiting packet, then roll back if a prediction turned out wrong."""
+        self.transport.flush()
+        rollback_from = None
+        while True:
+            packet = self.transport.receive()
+            if packet is None:
+                break
+            data, address = packet
+            if address != self.peer or not data:
+                continue
+            if data[0] == INPUT and len(data) >= INPUT_HEADER.size:
+                frame = self._handle_input(data)
+                if frame is not None and (rollback_from is None or frame < rollback_from):
+                    rollback_from = frame
+            elif data[0] == HELLO and self.welcome:
+                self.transport.send(self.welcome, self.peer)  # our WELCOME was lost
+            elif data[0] == BYE:
+                self.peer_left = True
+        if rollback_from is not None:
+            self._rollback(rollback_from)
+        self._update_checksums()
+        self._prune()
+
+    def _handle_input(self, data):
+        """Apply one INPUT packet; returns the earliest mispredicted frame, or None."""
+        (_, timestamp, echo, peer_frame, ack, checksum_frame, checksum,
+         first, count) = INPUT_HEADER.unpack_from(data)
+        now = self._now_ms()
+        if timestamp:
+            self._peer_timestamp, self._peer_timestamp_at = timestamp, now
+        if echo:
+            rtt = ((now - echo) & 0xFFFFFFFF) / 1000
+            if rtt < 10.0:
+                self._sample_rtt(rtt)
+        self.peer_frame = max(self.peer_frame, peer_frame)
+        self.peer_ack = max(self.peer_ack, ack)
+        if checksum_frame:
+            self.remote_checksums[checksum_frame] = checksum
+            self._compare_checksum(checksum_frame)
+
+        mispredicted = None
+        intents = struct.unpack_from(f'<{count}b', data, INPUT_HEADER.size)
+        for frame, intent in enumerate(intents, first):
+            if frame < self.remote_confirmed or frame in self.remote_inputs:
+                continue
+            self.remote_inputs[frame] = intent
+            guess = self.predicted.pop(frame, None)
+            if guess is not None and guess != intent and (mispredicted is None or frame < mispredicted):
+                mispredicted = frame
+        while self.remote_confirmed in self.remote_inputs:
+            self.remote_confirmed += 1
+        return mispredicted
+
+    def _sample_rtt(self, rtt):
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def _update_checksums(self):
+        confirmed = min(self.remote_confirmed, self.state.frame)
+        frame = (self.checked_frame // CHECKSUM_INTERVAL + 1) * CHECKSUM_INTERVAL
+        while frame <= confirmed:
+            snapshot = self.snapshots[frame] if frame < self.state.frame else self.state.snapshot()
+            self.local_checksums[frame] = zlib.crc32(pack_snapshot(snapshot))
+            self.last_checksum = (frame, self.local_checksums[frame])
+            self._compare_checksum(frame)
+            frame += CHECKSUM_INTERVAL
+        self.checked_frame = max(self.checked_frame, confirmed)
+
+    def _compare_checksum(self, frame):
+        if frame in self.local_checksums and frame in self.remote_checksums:
+            if self.local_checksums.pop(frame) != self.remote_checksums.pop(frame):
+                self.desyncs += 1
+
+    def _prune(self):
+        """Forget snapshots and inputs that can no longer be rolled back to."""
+        keep = min(self.checked_frame, min(self.predicted, default=self.state.frame))
+        while self.oldest_snapshot < keep:
+            self.snapshots.pop(self.oldest_snapshot, None)
+            self.remote_inputs.pop(self.oldest_snapshot - 1, None)  # keep the latest for prediction
+            self.oldest_snapshot += 1
+        for checksums in (self.local_checksums, self.remote_checksums):
+            for frame in [frame for frame in checksums if frame < keep - 16 * CHECKSUM_INTERVAL]:
+                del checksums[frame]
+
+    def close(self, repeats=5):
+        """Tell the peer we are leaving (a few times, since UDP can lose it)."""
+        for _ in range(repeats):
+            self.transport.send(bytes((BYE,)), self.peer)
+        self.transport.flush()
+
+    def stats(self):
+        frames = max(1, self.state.frame)
+        return {
+            'frames': self.state.frame,
+            'input_delay': self.input_delay,
+            'perceived_latency_ms': self.delay_frames_total / frames * self.dt * 1000,
+            'rtt_ms': (self.srtt or 0.0) * 1000,
+            'jitter_ms': self.rttvar * 1000,
+            'rollbacks': self.rollbacks,
+            'resimulated_frames': self.resimulated_frames,
+            'max_rollback_depth': self.max_rollback_depth,
+            'stalls': self.stalls,
+            'desyncs': self.desyncs,
+            'packets_sent': self.transport.sent,
+            'packets_received': self.transport.received,
+        }
+
+
+def run_loopback(seconds=60.0, latency=0.05, jitter=0.01, loss=0.05, difficulty='normal', seed=0, input_delay=2):
+    """
+    Two AI-driven peers over real UDP sockets on 127.0.0.1 with simulated latency, jitter and loss.
+    Runs on a virtual clock (no sleeping), then checks both peers ended with identical state.
+    """
+    now = [0.0]
+    clock = lambda: now[0]
+    settings = match_settings(difficulty)
+    peers = []
+    for index, side in enumerate(('player', 'opponent')):
+        transport = LossyTransport.bind('127.0.0.1', 0, latency=latency, jitter=jitter, loss=loss,
+                                        rng=random.Random(f"{seed}:net{index}"), clock=clock)
+        state = GameState(difficulty, settings, seed=seed)
+        peers.append([transport, state, side])
+    sessions = []
+    for index, (transport, state, side) in enumerate(peers):
+        other = peers[1 - index][0]
+        session = RollbackSession(state, side, transport, other.address, input_delay=input_delay, clock=clock)
+        strategy = ai.HardAI(rng=state.make_rng(f"net-{side}"))
+        sessions.append((session, strategy, getattr(state, side)))
+
+    def tick(target=None):
+        now[0] += FIXED_DT
+        for session, strategy, paddle in sessions:
+            if target is None or session.state.frame < target:
+                session.advance(strategy.decide(paddle, session.state.ball, FIXED_DT, session.state))
+            else:
+                session.poll()
+                session.send()
+
+    while now[0] < seconds and not all(session.winner for session, _, _ in sessions):
+        tick()
+    # drain: bring both peers to the same frame, then let every input reach both sides
+    target = max(session.state.frame for session, _, _ in sessions)
+    for _ in range(round(2.0 / FIXED_DT)):
+        tick(target)
+    a, b = (session for session, _, _ in sessions)
+    frame = min(a.state.frame, b.state.frame)
+    states_match = None
+    if a.state.frame == b.state.frame and a.remote_confirmed >= frame and b.remote_confirmed >= frame:
+        states_match = a.state.snapshot() == b.state.snapshot()
+    for transport, _, _ in peers:
+        transport.close()
+    return [session.stats() for session, _, _ in sessions], states_match
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars netplay tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    loopback = commands.add_parser('loopback', help="AI vs AI over loopback UDP with a simulated bad network")
+    loopback.add_argument('--seconds', type=float, default=60.0, help="simulated seconds to play")
+    loopback.add_argument('--latency', type=float, default=50.0, help="one-way latency (ms)")
+    loopback.add_argument('--jitter', type=float, default=10.0, help="latency variation, ± ms")
+    loopback.add_argument('--loss', type=float, default=0.05, help="packet loss probability")
+    loopback.add_argument('--difficulty', default='normal', choices=list(DIFFICULTY_PRESETS))
+    loopback.add_argument('--seed', type=int, default=0)
+    loopback.add_argument('--input-delay', type=int, default=2, help="initial input delay (frames)")
+    args = parser.parse_args(argv)
+
+    stats, states_match = run_loopback(args.seconds, args.latency / 1000, args.jitter / 1000, args.loss,
+                                       args.difficulty, args.seed, args.input_delay)
+    for side, peer in zip(('host (player)', 'client (opponent)'), stats):
+        print(f"{side}: " + ", ".join(f"{name} {value:.1f}" if isinstance(value, float) else f"{name} {value}"
+                                      for name, value in peer.items()))
+    print("final states identical" if states_match else "final states differ or unconfirmed")
+    return 0 if states_match and not any(peer['desyncs'] for peer in stats) else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+"""
+Per-phase frame profiler for Pong game.
+Game.run times each phase of a frame (event polling, AI decisions, simulation update,
+drawing, display update) so stutter can be traced to the phase that blew the 16.6 ms budget.
+Shown on screen with the debug overlay ('D' key) and optionally written to CSV on exit.
+StartupTimer covers the rest: time to the first window and menu frame, and screen transitions.
+"""
+
+import csv
+import time
+from collections import deque
+from contextlib import contextmanager
+import pygame
+
+PHASES = ('events', 'ai', 'update', 'draw', 'flip')
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class FrameProfiler:
+    """
+    Collects per-phase timings (milliseconds) for every frame.
+    Keeps a rolling window for the on-screen percentiles and graph, and every frame
+    when keep_samples is set (for CSV export).
+    """
+
+    def __init__(self, window=240, keep_samples=False):
+        self.recent = deque(maxlen=window)  # recent frame work times (ms)
+        self.recent_phases = deque(maxlen=window)
+        self.keep_samples = keep_samples
+        self.samples = []
+        self.frame_index = 0
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.ai_calls = 0
+        self.interval_ms = 0.0
+        self._frame_start = None
+
+    def begin_frame(self, interval):
+        """Start timing a frame. interval: real seconds since the previous frame (clock.tick result)."""
+        self._frame_start = time.perf_counter()
+        self.interval_ms = interval * 1000
+        for name in PHASES:
+            self.current[name] = 0.0
+        self.ai_calls = 0
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block and add it to this frame's total for that phase (phases may repeat)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[name] += (time.perf_counter() - start) * 1000
+            if name == 'ai':
+                self.ai_calls += 1
+
+    def end_frame(self):
+        """Close the frame: record its total work time and per-phase breakdown."""
+        if self._frame_start is None:
+            return
+        frame_ms = (time.perf_counter() - self._frame_start) * 1000
+        self._frame_start = None
+        self.recent.append(frame_ms)
+        self.recent_phases.append(dict(self.current))
+        if self.keep_samples:
+            self.samples.append((self.frame_index, self.interval_ms, frame_ms, self.ai_calls)
+                                + tuple(self.current[name] for name in PHASES))
+        self.frame_index += 1
+
+    def percentile(self, pct):
+        """Nearest-rank percentile of recent frame times (ms), 0.0 if nothing recorded yet."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def phase_average(self, name):
+        """Mean time (ms) spent in one phase over the recent window."""
+        if not self.recent_phases:
+            return 0.0
+        return sum(frame[name] for frame in self.recent_phases) / len(self.recent_phases)
+
+    def write_csv(self, path):
+        """Write every kept frame sample to path, one row per frame."""
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(('frame', 'interval_ms', 'frame_ms', 'ai_calls') + tuple(f"{name}_ms" for name in PHASES))
+            for row in self.samples:
+                writer.writerow((row[0], f"{row[1]:.3f}", f"{row[2]:.3f}", row[3])
+                                + tuple(f"{value:.3f}" for value in row[4:]))
+
+
+class StartupTimer:
+    """
+    Wall-clock milestones from process start to first frame, and screen-to-screen transitions.
+    mark(label) records the time since the timer started (or since begin(label) for a transition).
+    """
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = []  # (label, ms since start, ms since transition began or None)
+        self._pending = {}
+
+    def mark(self, label):
+        now = time.perf_counter()
+        began = self._pending.pop(label, None)
+        self.marks.append((label, (now - self.start) * 1000, None if began is None else (now - began) * 1000))
+
+    def begin(self, label):
+        """Start timing a transition; the matching mark(label) records its duration."""
+        self._pending[label] = time.perf_counter()
+
+    def report(self):
+        lines = []
+        for label, since_start, duration in self.marks:
+            line = f"{label:<24} {since_start:>9.1f} ms"
+            if duration is not None:
+                line += f"  (took {duration:.1f} ms)"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class ProfilerOverlay(pygame.sprite.DirtySprite):
+    """
+    On-screen readout of a FrameProfiler: p50/p95/p99 frame time, per-phase averages and
+    a bar graph of recent frames against the 60 fps budget line.
+    """
+
+    def __init__(self, groups, profiler, atlas, position, size=(320, 200), layer=0):
+        self._layer = layer  # must be set before joining a LayeredDirty group
+        super().__init__(*groups)
+        self.profiler = profiler
+        self.atlas = atlas
+        self.image = pygame.Surface(size, pygame.SRCALPHA)
+        self.rect = self.image.get_rect(topleft=position)
+        self.graph_height = size[1] * 3 // 10  # 60 px at the default size
+        self.scale = self.graph_height / (FRAME_BUDGET_MS * 2)  # graph tops out at twice the budget
+
+    def update(self, *args, **kwargs):
+        if not self.visible:
+            return
+        profiler = self.profiler
+        image = self.image
+        image.fill((0, 0, 0, 160))
+        line = self.atlas.height
+        y = 4
+        self.atlas.blit(image, f"p50 {profiler.percentile(50):.1f}  p95 {profiler.percentile(95):.1f}  p99 {profiler.percentile(99):.1f} ms", (6, y))
+        y += line
+        for name in PHASES:
+            self.atlas.blit(image, f"{name} {profiler.phase_average(name):.2f} ms", (6, y))
+            y += line
+
+        # frame time graph: one bar per recent frame, newest on the right
+        width, height = image.get_size()
+        bottom = height - 4
+        budget_y = bottom - round(FRAME_BUDGET_MS * self.scale)
+        recent = list(profiler.recent)[-(width - 12):]
+        x = width - 6 - len(recent)
+        for frame_ms in recent:
+            bar = min(self.graph_height, round(frame_ms * self.scale))
+            color = (255, 80, 80) if frame_ms > FRAME_BUDGET_MS else (120, 230, 120)
+            pygame.draw.line(image, color, (x, bottom), (x, bottom - bar))
+            x += 1
+        pygame.draw.line(image, (255, 255, 0), (6, budget_y), (width - 6, budget_y))
+        self.dirty = 1
@@ -0,0 +1,240 @@
+"""
+Compact binary match replays for Pong game.
+A replay stores only what the deterministic simulation can't rebuild by itself: the match
+seed and settings, one byte of paddle input per fixed step, and a full-state keyframe every
+KEYFRAME_INTERVAL steps. Playback memory-maps the file and seeks to any step by restoring
+the nearest keyframe at or before it and re-simulating the few steps in between.
+
+File layout (little-endian, fixed-size records so seeking is plain arithmetic):
+    header
+    chunk 0: keyframe, input byte x KEYFRAME_INTERVAL
+    chunk 1: keyframe, input byte x KEYFRAME_INTERVAL
+    ...      (the last chunk may be short)
+
+Usage:
+    python replay.py record match.pwr --difficulty hard --seed 7     # AI vs AI, for testing
+    python replay.py info match.pwr
+    python replay.py seek match.pwr 12000
+    python replay.py verify match.pwr
+"""
+
+import argparse
+import mmap
+import struct
+
+import ai
+from settings import DIFFICULTY_PRESETS
+from simulation import GameState, step, FIXED_DT
+
+MAGIC = b'PWRP'
+VERSION = 1
+KEYFRAME_INTERVAL = 600  # steps between keyframes (5 s at 120 Hz): worst-case seek re-simulates this many
+SETTINGS_FIELDS = ('player', 'opponent', 'ball', 'paddle_height', 'ai_error', 'ball_accel')
+
+# magic, version, seed, dt, keyframe interval, difficulty name, settings values
+HEADER = struct.Struct('<4sHQdI16s' + 'd' * len(SETTINGS_FIELDS))
+# frame, time, ball x/y/dx/dy/speed, epoch, paddle hits, ball rng counter,
+# player y, opponent y, player score, opponent score
+KEYFRAME = struct.Struct('<Idddddd2IQddHH')
+INPUT_SIZE = 1  # both intents (-1, 0, +1) packed into one byte as (player + 1) * 3 + (opponent + 1)
+
+
+def encode_inputs(player, opponent):
+    return (int(player) + 1) * 3 + (int(opponent) + 1)
+
+
+def decode_inputs(byte):
+    """Inverse of encode_inputs: (player, opponent) intents."""
+    return byte // 3 - 1, byte % 3 - 1
+
+
+def pack_snapshot(snapshot):
+    """A seeded match's GameState.snapshot() as KEYFRAME bytes (the fields are in the same order)."""
+    return KEYFRAME.pack(*snapshot[:7], snapshot[7] & 0xFFFFFFFF, *snapshot[8:])
+
+
+def pack_keyframe(state):
+    return pack_snapshot(state.snapshot())
+
+
+def restore_keyframe(state, record):
+    """Overwrite a GameState (built with the replay's seed and settings) with an unpacked keyframe."""
+    state.restore(record)
+
+
+class ReplayWriter:
+    """
+    Streams a match to disk. Call record(state, inputs) just before each step(state, inputs, dt);
+    a keyframe of the pre-step state is written whenever state.frame is a multiple of the interval.
+    The match must be seeded with an integer and stepped with a constant dt.
+    """
+
+    def __init__(self, path, state, dt=FIXED_DT, keyframe_interval=KEYFRAME_INTERVAL):
+        if not isinstance(state.seed, int):
+            raise ValueError("replays need a match seeded with an integer (GameState(seed=...))")
+        if not 0 <= state.seed < 1 << 64:
+            raise ValueError(f"replay seeds are stored as unsigned 64-bit integers, not {state.seed}")
+        if state.frame != 0:
+            raise ValueError("start recording before the first step")
+        self.keyframe_interval = keyframe_interval
+        self.frames = 0
+        self.file = open(path, 'wb')
+        settings = state.difficulty_settings
+        self.file.write(HEADER.pack(MAGIC, VERSION, state.seed, dt, keyframe_interval,
+                                    str(state.difficulty).encode()[:16],
+                                    *(float(settings.get(name, 0)) for name in SETTINGS_FIELDS)))
+
+    def record(self, state, inputs):
+        if state.frame % self.keyframe_interval == 0:
+            self.file.write(pack_keyframe(state))
+        self.file.write(bytes((encode_inputs(inputs.get('player', 0), inputs.get('opponent', 0)),)))
+        self.frames += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayReader:
+    """
+    Memory-mapped replay. Nothing is parsed up front, so opening a long match is instant and
+    state_at(frame) only touches one keyframe and the inputs after it.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.seed, self.dt, self.keyframe_interval, difficulty,
+         *values) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} Pong Wars replay")
+        self.difficulty = difficulty.rstrip(b'\0').decode()
+        self.difficulty_settings = dict(DIFFICULTY_PRESETS.get(self.difficulty, {}))
+        # settings are stored as doubles; whole numbers go back to ints like the presets, anything
+        # else (a fractional speed or ball_accel) keeps its exact value so re-simulation matches
+        self.difficulty_settings.update((name, int(value) if value.is_integer() else value)
+                                        for name, value in zip(SETTINGS_FIELDS, values))
+        self.chunk_size = KEYFRAME.size + self.keyframe_interval * INPUT_SIZE
+        full, rest = divmod(len(self.data) - HEADER.size, self.chunk_size)
+        self.frame_count = full * self.keyframe_interval + max(0, rest - KEYFRAME.size) // INPUT_SIZE
+        self.keyframe_count = full + (rest > 0)
+
+    def _chunk_offset(self, index):
+        return HEADER.size + index * self.chunk_size
+
+    def keyframe(self, index):
+        """Unpacked keyframe `index` (the state at frame index * keyframe_interval)."""
+        return KEYFRAME.unpack_from(self.data, self._chunk_offset(index))
+
+    def inputs(self, frame):
+        """{'player': ..., 'opponent': ...} intents recorded for one step."""
+        index, offset = divmod(frame, self.keyframe_interval)
+        player, opponent = decode_inputs(self.data[self._chunk_offset(index) + KEYFRAME.size + offset])
+        return {'player': player, 'opponent': opponent}
+
+    def new_state(self):
+        return GameState(self.difficulty, self.difficulty_settings, seed=self.seed)
+
+    def state_at(self, frame):
+        """GameState after `frame` steps: restore the nearest keyframe, then re-simulate forward."""
+        if not 0 <= frame <= self.frame_count:
+            raise IndexError(f"frame {frame} outside 0..{self.frame_count}")
+        state = self.new_state()
+        if self.keyframe_count:
+            restore_keyframe(state, self.keyframe(min(frame // self.keyframe_interval, self.keyframe_count - 1)))
+        self.advance(state, frame)
+        return state
+
+    def advance(self, state, frame):
+        """Step a state forward with the recorded inputs until it reaches `frame`."""
+        while state.frame < frame:
+            step(state, self.inputs(state.frame), self.dt)
+        return state
+
+    def verify(self):
+        """Re-simulate the whole match from the start; return the keyframe frames that don't match (empty if intact)."""
+        state = self.new_state()
+        mismatches = []
+        for index in range(self.keyframe_count):
+            self.advance(state, index * self.keyframe_interval)
+            if pack_keyframe(state) != KEYFRAME.pack(*self.keyframe(index)):
+                mismatches.append(state.frame)
+                restore_keyframe(state, self.keyframe(index))
+        return mismatches
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record_match(path, difficulty='normal', seed=0, dt=FIXED_DT, max_time=3600.0):
+    """Play an AI-vs-AI match (HardAI on the player side) and record it; returns the winner."""
+    state = GameState(difficulty, seed=seed)
+    player_ai = ai.HardAI(rng=state.make_rng('player'))
+    opponent_ai = ai.create_difficulty_ai(difficulty, state.difficulty_settings, state.make_rng('opponent'))
+    with ReplayWriter(path, state, dt) as writer:
+        while state.winner is None and state.time < max_time:
+            inputs = {
+                'player': player_ai.decide(state.player, state.ball, dt, state),
+                'opponent': opponent_ai.decide(state.opponent, state.ball, dt, state),
+            }
+            writer.record(state, inputs)
+            step(state, inputs, dt)
+    return state.winner
+
+
+def describe(state):
+    ball = state.ball
+    return (f"frame {state.frame} ({state.time:.2f}s)  score {state.scoreboard.opponent}-{state.scoreboard.player}  "
+            f"ball ({ball.pos.x:.1f}, {ball.pos.y:.1f}) speed {ball.speed:.0f}  "
+            f"paddles player {state.player.pos.y:.1f} opponent {state.opponent.pos.y:.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars replay tool")
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help="record an AI-vs-AI match")
+    record.add_argument('path')
+    record.add_argument('--difficulty', default='normal', choices=list(DIFFICULTY_PRESETS))
+    record.add_argument('--seed', type=int, default=0)
+    commands.add_parser('info', help="print header and length").add_argument('path')
+    seek = commands.add_parser('seek', help="print the state at a frame")
+    seek.add_argument('path')
+    seek.add_argument('frame', type=int)
+    commands.add_parser('verify', help="re-simulate and check every keyframe").add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        print(record_match(args.path, args.difficulty, args.seed))
+        return 0
+    with ReplayReader(args.path) as replay:
+        if args.command == 'info':
+            print(f"seed {replay.seed}, difficulty {replay.difficulty}, dt {replay.dt:.6f}s, "
+                  f"{replay.frame_count} frames ({replay.frame_count * replay.dt:.1f}s), "
+                  f"keyframe every {replay.keyframe_interval} frames")
+            print(describe(replay.state_at(replay.frame_count)))
+        elif args.command == 'seek':
+            print(describe(replay.state_at(args.frame)))
+        else:
+            mismatches = replay.verify()
+            if mismatches:
+                print(f"{len(mismatches)} keyframe(s) differ from re-simulation, first at frame {mismatches[0]}")
+                return 1
+            print(f"ok: {replay.frame_count} frames re-simulate to the recorded keyframes")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
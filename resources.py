@@ -0,0 +1,152 @@
+"""
+Shared asset manager for Pong game.
+Fonts, colors and pre-rendered surfaces are loaded once per process and handed out from
+here, instead of every menu and match loading its own copy. Assets the next screen will need
+can be queued and loaded in the background while a menu sits idle.
+
+Preloading is cooperative rather than threaded: fonts and surfaces are not safe to create on
+another thread while the main thread renders, so menus call preload_step() on frames where
+nothing changed and spend a small time budget working through the queue.
+"""
+
+import time
+from collections import deque
+from os.path import join
+
+import pygame
+
+from settings import WINDOW_WIDTH, WINDOW_HEIGHT, WORLD_WIDTH, WORLD_HEIGHT, COLORS
+from textcache import text_cache
+
+FONT_PATH = join("assets", "AlfaSlabOne-Regular.ttf")
+PRELOAD_BUDGET = 0.004  # seconds of preloading per idle menu frame (well under a 60 fps frame)
+
+
+class Assets:
+    """Process-wide cache of fonts (by size), colors and named surfaces, plus a preload queue."""
+
+    def __init__(self, font_path=FONT_PATH):
+        self.font_path = font_path
+        self._fonts = {}
+        self._colors = {}
+        self._surfaces = {}
+        self._pending = deque()
+        self.load_time = 0.0     # seconds spent creating fonts and surfaces
+        self.preload_time = 0.0  # seconds spent in preload_step
+
+    def font(self, size):
+        """The game font at a size; falls back to the default system font if the file can't be loaded."""
+        font = self._fonts.get(size)
+        if font is None:
+            if not self._fonts:
+                pygame.register_quit(self.clear)  # quit callbacks run once, so register again after each quit
+            start = time.perf_counter()
+            try:
+                font = pygame.font.Font(self.font_path, size)
+            except Exception:
+                font = pygame.font.SysFont(None, size)
+            self._fonts[size] = font
+            self.load_time += time.perf_counter() - start
+        return font
+
+    def color(self, spec):
+        """A shared pygame.Color for a name or hex string (or a COLORS key such as 'paddle')."""
+        color = self._colors.get(spec)
+        if color is None:
+            color = self._colors[spec] = pygame.Color(COLORS.get(spec, spec))
+        return color
+
+    def surface(self, name, factory=None):
+        """A named surface, built by factory() the first time (or one of the built-in surfaces)."""
+        surface = self._surfaces.get(name)
+        if surface is None:
+            start = time.perf_counter()
+            surface = self._surfaces[name] = (factory or BUILTIN_SURFACES[name])()
+            self.load_time += time.perf_counter() - start
+        return surface
+
+    def scaled_surface(self, name, scale):
+        """A named surface resized by scale (nearest neighbour, for lower render resolutions); cached per scale."""
+        if scale == 1:
+            return self.surface(name)
+
+        def factory():
+            width, height = self.surface(name).get_size()
+            return pygame.transform.scale(self.surface(name), (max(1, round(width * scale)), max(1, round(height * scale))))
+        return self.surface(f"{name} x{scale}", factory)
+
+    def queue(self, *loaders):
+        """Queue zero-argument callables to run during idle frames (see preload_step)."""
+        self._pending.extend(loaders)
+
+    def queue_defaults(self):
+        """Queue everything the menus and a match need: fonts, text, background surfaces."""
+        white = self.color('white')
+        black = self.color('black')
+        for size in (96, 48, 28, 20, 14):
+            self.queue(lambda size=size: self.font(size))
+        for name in BUILTIN_SURFACES:
+            self.queue(lambda name=name: self.surface(name))
+        for title in ("Pong Wars", "Player Wins!", "Opponent Wins!"):
+            self.queue(lambda title=title: text_cache.render(self.font(96), title, white))
+        labels = ("Press Enter / Click Start to play — Esc to quit", "START", "QUIT", "Select Difficulty", "Use arrow keys (1, 2, 3, 4) or click", "EASY", "NORMAL", "HARD", "EXPERT",
+                  "First to 10 points!", "PLAY AGAIN", "MAIN MENU")
+        for label in labels:
+            for color in (white, black):
+                self.queue(lambda label=label, color=color: text_cache.render(self.font(28), label, color))
+        self.queue(lambda: text_cache.render(self.font(48), "Select Difficulty", white))
+        self.queue(lambda: text_cache.preload(self.font(20), [str(score) for score in range(11)], white))
+
+    def clear(self):
+        """Drop every cached asset; fonts don't survive pygame.quit(), so this runs on quit."""
+        self._fonts.clear()
+        self._surfaces.clear()
+        self._pending.clear()
+        text_cache.clear()  # keyed by the fonts just dropped
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def preload_step(self, budget=PRELOAD_BUDGET):
+        """Run queued loaders until the queue is empty or budget seconds have passed; returns how many ran."""
+        done = 0
+        start = time.perf_counter()
+        while self._pending and time.perf_counter() - start < budget:
+            self._pending.popleft()()
+            done += 1
+        self.preload_time += time.perf_counter() - start
+        return done
+
+    def preload_all(self):
+        """Finish the queue now (e.g. headless runs with no idle menu frames)."""
+        return self.preload_step(budget=float('inf'))
+
+
+def _background():
+    surface = pygame.Surface((WORLD_WIDTH, WORLD_HEIGHT))
+    surface.fill(COLORS['bg'])
+    return surface
+
+
+def _middle_line():
+    surface = pygame.Surface((4, WORLD_HEIGHT), pygame.SRCALPHA)
+    surface.fill((*pygame.Color('white')[:3], 128))  # RGBA with alpha for transparency
+    return surface
+
+
+BUILTIN_SURFACES = {
+    'background': _background,
+    'middle line': _middle_line,
+}
+
+# process-wide assets shared by the menus and every match
+assets = Assets()
+
+
+def display_surface(size=(WINDOW_WIDTH, WINDOW_HEIGHT)):
+    """The window surface, creating the window only if it doesn't exist yet (set_mode again recreates it)."""
+    surface = pygame.display.get_surface()
+    if surface is None or surface.get_size() != tuple(size):
+        surface = pygame.display.set_mode(size)
+    return surface
@@ -0,0 +1,445 @@
+"""
+Dedicated headless match server for Pong game.
+Runs many independent matches in one asyncio event loop. A single fixed-rate scheduler steps
+every match once per tick with the headless simulation (the same physics the sprites draw)
+and the ai.py strategies, so there is no pygame and no display. Clients connect over local
+TCP or Unix sockets, join a match against the AI or another client, send paddle intents and
+receive state updates.
+
+One event loop uses one core. To fill a host, run one server per core; the matches_per_core
+metric says how many matches one loop can carry at the current per-match cost.
+
+Usage:
+    python server.py serve --port 7878 --bots 200          # also keep 200 AI-vs-AI matches running
+    python server.py serve --unix /tmp/pong.sock
+    python server.py bench --matches 500 --clients 50 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import struct
+import time
+from collections import deque
+
+import ai
+from settings import DIFFICULTY_PRESETS
+from simulation import GameState, FIXED_DT, step
+
+TICK_RATE = round(1 / FIXED_DT)  # one simulation step per tick
+STATE_EVERY = 2                  # send state to clients every Nth tick (60 Hz)
+MAX_CATCH_UP = 8                 # ticks run back to back after a stall before the schedule is reset
+WRITE_BUFFER_LIMIT = 64 * 1024   # skip state updates to clients that aren't reading
+# presets clients may join: ExpertAI searches for ~2 ms per decision on the event loop, which a
+# few expert matches would turn into missed ticks for every match on the server
+SERVER_DIFFICULTIES = [difficulty for difficulty in DIFFICULTY_PRESETS if difficulty != 'expert']
+
+# client -> server
+JOIN = struct.Struct('<c16sB')   # b'J', difficulty, mode (MODE_AI or MODE_VERSUS)
+INPUT = struct.Struct('<cb')     # b'I', intent (-1, 0, +1)
+METRICS_REQUEST = b'M'
+# server -> client
+WELCOME = struct.Struct('<cIBQ')  # b'W', match id, side (0 player, 1 opponent), seed
+STATE = struct.Struct('<cIfffffffHH')  # b'S', frame, ball x/y/dx/dy/speed, player y, opponent y, scores
+END = struct.Struct('<cB')        # b'E', winner (0 none, 1 player, 2 opponent)
+METRICS = struct.Struct('<cI')    # b'D', length of the JSON that follows
+MODE_AI, MODE_VERSUS = 0, 1
+SIDES = ('player', 'opponent')
+WINNER_CODES = {None: 0, 'Player': 1, 'Opponent': 2}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile, 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class TickMetrics:
+    """Rolling scheduler statistics: work per tick, how late each tick started and overruns."""
+
+    def __init__(self, period, window=1200):
+        self.period = period
+        self.work = deque(maxlen=window)      # seconds spent stepping matches per tick
+        self.lateness = deque(maxlen=window)  # seconds each tick started after its scheduled time
+        self.ticks = 0
+        self.overruns = 0       # ticks whose work didn't fit in the period
+        self.skipped = 0        # ticks dropped after falling more than MAX_CATCH_UP behind
+        self.match_steps = 0
+
+    def record(self, work, lateness, matches):
+        self.ticks += 1
+        self.match_steps += matches
+        self.work.append(work)
+        self.lateness.append(lateness)
+        if work > self.period:
+            self.overruns += 1
+
+    def snapshot(self, matches, clients):
+        mean_work = sum(self.work) / len(self.work) if self.work else 0.0
+        utilisation = mean_work / self.period
+        per_match = mean_work / matches if matches else 0.0
+        return {
+            'matches': matches,
+            'clients': clients,
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'skipped_ticks': self.skipped,
+            'tick_ms_p50': percentile(self.work, 50) * 1000,
+            'tick_ms_p95': percentile(self.work, 95) * 1000,
+            'tick_ms_p99': percentile(self.work, 99) * 1000,
+            'tick_late_ms_p99': percentile(self.lateness, 99) * 1000,
+            'utilisation': utilisation,
+            'match_step_us': per_match * 1e6,
+            'matches_per_core': self.period / per_match if per_match else 0.0,
+        }
+
+
+class Match:
+    """One match: its GameState, the latest intent for each side and who supplies it (a client or an AI)."""
+
+    def __init__(self, match_id, difficulty='normal', seed=None):
+        self.match_id = match_id
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.state = GameState(difficulty, seed=self.seed)
+        self.intents = {'player': 0, 'opponent': 0}
+        self.clients = {}  # side -> Client
+        self.bots = {}     # side -> AI strategy
+        self.difficulty = difficulty
+        self.load_bot = False  # AI-vs-AI load match, replaced when it finishes
+
+    def add_bot(self, side):
+        settings = self.state.difficulty_settings
+        if side == 'opponent':
+            strategy = ai.create_difficulty_ai(self.difficulty, settings, self.state.make_rng('opponent'))
+        else:
+            strategy = ai.create_ai(ai.HardAI, settings, rng=self.state.make_rng('player'))
+        self.bots[side] = strategy
+
+    def tick(self, dt):
+        state = self.state
+        for side, strategy in self.bots.items():
+            self.intents[side] = strategy.decide(getattr(state, side), state.ball, dt, state)
+        step(state, self.intents, dt)
+
+    def pack_state(self):
+        state = self.state
+        ball = state.ball
+        return STATE.pack(b'S', state.frame, ball.pos.x, ball.pos.y, ball.direction.x, ball.direction.y,
+                          ball.speed, state.player.pos.y, state.opponent.pos.y,
+                          state.scoreboard.player, state.scoreboard.opponent)
+
+
+class Client:
+    """One connected socket and the match side it controls."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.match = None
+        self.side = None
+
+    def send(self, data):
+        """Queue data without waiting; drops it if the client has stopped reading."""
+        if self.writer.transport.get_write_buffer_size() < WRITE_BUFFER_LIMIT:
+            self.writer.write(data)
+
+
+class MatchServer:
+    """
+    Hosts matches and ticks all of them from one fixed-rate scheduler task.
+
+    Args:
+        bots: number of AI-vs-AI matches to keep running (restarted as they finish), for load.
+        tick_rate: scheduler ticks per second; each match takes one step of 1 / tick_rate.
+    """
+
+    def __init__(self, bots=0, bot_difficulty='normal', tick_rate=TICK_RATE, seed=0):
+        self.period = 1 / tick_rate
+        self.matches = {}
+        self.clients = set()
+        self.waiting = {}  # difficulty -> Client waiting for a versus opponent
+        self.bots = bots
+        self.bot_difficulty = bot_difficulty
+        self.metrics = TickMetrics(self.period)
+        self.rng = random.Random(seed)
+        self.next_match_id = 1
+        self.running = False
+        self.finished_matches = 0
+
+    def new_match(self, difficulty):
+        match = Match(self.next_match_id, difficulty, seed=self.rng.getrandbits(32))
+        self.next_match_id += 1
+        self.matches[match.match_id] = match
+        return match
+
+    def start_bot_match(self):
+        match = self.new_match(self.bot_difficulty)
+        match.add_bot('player')
+        match.add_bot('opponent')
+        match.load_bot = True
+
+    # --- Scheduler ---
+    async def run(self):
+        """Tick every match at a fixed rate until stop() is called."""
+        self.running = True
+        for _ in range(self.bots):
+            self.start_bot_match()
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while self.running:
+            lateness = loop.time() - next_tick
+            if lateness > MAX_CATCH_UP * self.period:
+                # hopelessly behind (e.g. the host was suspended): drop the missed ticks
+                missed = int(lateness / self.period)
+                self.metrics.skipped += missed
+                next_tick += missed * self.period
+                lateness -= missed * self.period
+            start = time.perf_counter()
+            count = len(self.matches)
+            self.tick()
+            self.metrics.record(time.perf_counter() - start, max(0.0, lateness), count)
+            next_tick += self.period
+            # behind schedule: run the next tick straight away (but still let socket I/O in)
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    def stop(self):
+        self.running = False
+
+    def tick(self):
+        send_state = self.metrics.ticks % STATE_EVERY == 0
+        finished = []
+        for match in self.matches.values():
+            match.tick(self.period)
+            if match.clients and (send_state or match.state.winner):
+                packet = match.pack_state()
+                for client in match.clients.values():
+                    client.send(packet)
+            if match.state.winner:
+                finished.append(match)
+        for match in finished:
+            self.end_match(match)
+
+    def end_match(self, match):
+        self.matches.pop(match.match_id, None)
+        self.finished_matches += 1
+        packet = END.pack(b'E', WINNER_CODES[match.state.winner])
+        for client in match.clients.values():
+            client.send(packet)
+            client.match = None
+        if match.load_bot and self.running:
+            self.start_bot_match()
+
+    # --- Clients ---
+    async def handle_client(self, reader, writer):
+        client = Client(reader, writer)
+        self.clients.add(client)
+        try:
+            while True:
+                kind = await reader.readexactly(1)
+                if kind == b'I':
+                    (intent,) = struct.unpack('<b', await reader.readexactly(INPUT.size - 1))
+                    if client.match is not None:
+                        client.match.intents[client.side] = max(-1, min(1, intent))
+                elif kind == b'J':
+                    difficulty, mode = struct.unpack('<16sB', await reader.readexactly(JOIN.size - 1))
+                    self.join(client, difficulty.rstrip(b'\0').decode(), mode)
+                elif kind == METRICS_REQUEST:
+                    body = json.dumps(self.snapshot()).encode()
+                    client.send(METRICS.pack(b'D', len(body)) + body)
+                else:
+                    break  # protocol error: drop the client
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.leave(client)
+            self.clients.discard(client)
+            writer.close()
+
+    def join(self, client, difficulty, mode):
+        if difficulty not in SERVER_DIFFICULTIES:
+            difficulty = 'normal'
+        self.leave(client)
+        if mode == MODE_VERSUS and difficulty not in self.waiting:
+            self.waiting[difficulty] = client  # wait for a second client
+            return
+        if mode == MODE_VERSUS:
+            other = self.waiting.pop(difficulty)
+            match = self.new_match(difficulty)
+            self._seat(match, other, 'player')
+            self._seat(match, client, 'opponent')
+        else:
+            match = self.new_match(difficulty)
+            self._seat(match, client, 'player')
+            match.add_bot('opponent')
+
+    def _seat(self, match, client, side):
+        client.match = match
+        client.side = side
+        match.clients[side] = client
+        client.send(WELCOME.pack(b'W', match.match_id, SIDES.index(side), match.seed))
+
+    def leave(self, client):
+        """Take a client out of its match; an abandoned match is dropped, a half-empty one plays on against the AI."""
+        for difficulty, waiting in list(self.waiting.items()):
+            if waiting is client:
+                del self.waiting[difficulty]
+        match = client.match
+        if match is not None:
+            del match.clients[client.side]
+            client.match = None
+            if match.clients:
+                match.add_bot(client.side)
+            else:
+                self.matches.pop(match.match_id, None)
+
+    def snapshot(self):
+        return self.metrics.snapshot(len(self.matches), len(self.clients))
+
+
+class MatchClient:
+    """Minimal asyncio client: join a match, send intents, read state updates."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.match_id = None
+        self.side = None
+        self.seed = None
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=None, path=None):
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def join(self, difficulty='normal', mode=MODE_AI):
+        self.writer.write(JOIN.pack(b'J', difficulty.encode()[:16], mode))
+        message = await self.receive()
+        if message[0] != 'welcome':
+            raise ConnectionError(f"expected WELCOME, got {message[0]}")
+        _, self.match_id, side, self.seed = message[1]
+        self.side = SIDES[side]
+        return self.side
+
+    def send_intent(self, intent):
+        self.writer.write(INPUT.pack(b'I', intent))
+
+    async def metrics(self):
+        self.writer.write(METRICS_REQUEST)
+        while True:
+            kind, payload = await self.receive()
+            if kind == 'metrics':
+                return payload
+
+    async def receive(self):
+        """Next message as ('welcome'|'state'|'end'|'metrics', payload)."""
+        kind = await self.reader.readexactly(1)
+        if kind == b'S':
+            return 'state', STATE.unpack(kind + await self.reader.readexactly(STATE.size - 1))
+        if kind == b'E':
+            (code,) = struct.unpack('<B', await self.reader.readexactly(END.size - 1))
+            return 'end', {value: key for key, value in WINNER_CODES.items()}[code]
+        if kind == b'W':
+            return 'welcome', WELCOME.unpack(kind + await self.reader.readexactly(WELCOME.size - 1))
+        if kind == b'D':
+            (length,) = struct.unpack('<I', await self.reader.readexactly(METRICS.size - 1))
+            return 'metrics', json.loads(await self.reader.readexactly(length))
+        raise ConnectionError(f"unknown message {kind!r}")
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def play_tracking_client(client, difficulty='normal', stop=None):
+    """Load-test client: join an AI match and follow the ball's y until the match ends (then rejoin) or `stop` is set."""
+    paddle_index = None
+    while stop is None or not stop.is_set():
+        side = await client.join(difficulty)
+        paddle_index = 7 if side == 'player' else 8
+        while True:
+            kind, payload = await client.receive()
+            if kind == 'end':
+                break
+            if kind == 'state':
+                delta = payload[3] - payload[paddle_index]
+                client.send_intent(0 if abs(delta) < 5 else int(math.copysign(1, delta)))
+            if stop is not None and stop.is_set():
+                return
+
+
+async def serve(args):
+    server = MatchServer(bots=args.bots, bot_difficulty=args.difficulty)
+    if args.unix:
+        listener = await asyncio.start_unix_server(server.handle_client, path=args.unix)
+    else:
+        listener = await asyncio.start_server(server.handle_client, args.host, args.port)
+    ticker = asyncio.create_task(server.run())
+    print(f"serving on {args.unix or f'{args.host}:{args.port}'}")
+    try:
+        while True:
+            await asyncio.sleep(args.metrics_interval)
+            print(json.dumps(server.snapshot()))
+    finally:
+        server.stop()
+        listener.close()
+        await ticker
+
+
+async def bench(args):
+    """Run `matches` AI-vs-AI matches plus `clients` local socket clients for `seconds`, then print metrics."""
+    server = MatchServer(bots=args.matches, bot_difficulty=args.difficulty)
+    listener = await asyncio.start_server(server.handle_client, '127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    ticker = asyncio.create_task(server.run())
+    stop = asyncio.Event()
+    clients = [await MatchClient.connect('127.0.0.1', port) for _ in range(args.clients)]
+    players = [asyncio.create_task(play_tracking_client(client, args.difficulty, stop)) for client in clients]
+    observer = await MatchClient.connect('127.0.0.1', port)  # reads metrics over the socket like a dashboard would
+    await asyncio.sleep(args.seconds)
+    metrics = await observer.metrics()
+    stop.set()
+    server.stop()
+    await ticker
+    for player in players:
+        player.cancel()
+    await asyncio.gather(*players, return_exceptions=True)
+    for client in clients + [observer]:
+        await client.close()
+    listener.close()
+    await listener.wait_closed()
+    metrics['finished_matches'] = server.finished_matches
+    print(json.dumps(metrics, indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars headless match server")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="run the server")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=7878)
+    serve_parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    serve_parser.add_argument('--bots', type=int, default=0, help="AI-vs-AI matches to keep running")
+    serve_parser.add_argument('--difficulty', default='normal', choices=SERVER_DIFFICULTIES)
+    serve_parser.add_argument('--metrics-interval', type=float, default=5.0, help="seconds between metrics lines")
+    bench_parser = commands.add_parser('bench', help="measure how many matches one event loop carries")
+    bench_parser.add_argument('--matches', type=int, default=500, help="AI-vs-AI matches")
+    bench_parser.add_argument('--clients', type=int, default=50, help="socket clients each playing a match against the AI")
+    bench_parser.add_argument('--seconds', type=float, default=10.0)
+    bench_parser.add_argument('--difficulty', default='normal', choices=SERVER_DIFFICULTIES)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args) if args.command == 'serve' else bench(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
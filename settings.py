@@ -1,12 +1,17 @@
-import pygame
 from os.path import join
 
-WINDOW_WIDTH, WINDOW_HEIGHT = 1280, 720
+# The court in world units: every position, size and speed below is in these units, and the
+# simulation never sees pixels. The window (and the menus) default to the same size; a match
+# can render at a lower internal resolution and be scaled up to the window (see RENDER_SCALE).
+WORLD_WIDTH, WORLD_HEIGHT = 1280, 720
+WINDOW_WIDTH, WINDOW_HEIGHT = WORLD_WIDTH, WORLD_HEIGHT
+# internal render resolution of a match as a fraction of the world size (0.5 draws 640x360)
+RENDER_SCALE = 1.0
 SIZE = {'paddle': (40, 100), 'ball': (30, 30)}
 POS = {
-    'ball': (WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2),
-    'player': (WINDOW_WIDTH - 50, WINDOW_HEIGHT / 2),
-    'opponent': (50, WINDOW_HEIGHT / 2)  # <-- 50 is near the left edge
+    'ball': (WORLD_WIDTH / 2, WORLD_HEIGHT / 2),
+    'player': (WORLD_WIDTH - 50, WORLD_HEIGHT / 2),
+    'opponent': (50, WORLD_HEIGHT / 2)  # <-- 50 is near the left edge
 }
 SPEED = {'player': 500, 'opponent': 250, 'ball': 450}
 COLORS = {
@@ -42,5 +47,13 @@ DIFFICULTY_PRESETS = {
         'paddle_height': 80,  # smaller paddles
         'ai_error': 0.02,     # very small AI error
         'ball_accel': 8       # stronger speed increase on bounce
+    },
+    'expert': {
+        'player': 500,
+        'opponent': 330,      # same court as hard; the opponent plans ahead instead (ExpertAI)
+        'ball': 520,
+        'paddle_height': 80,
+        'ai_error': 0.02,
+        'ball_accel': 8
     }
 }
\ No newline at end of file
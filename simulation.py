@@ -0,0 +1,475 @@
+"""
+Headless simulation core for Pong game.
+Holds all ball/paddle physics and scoring as plain Python state so whole matches
+can be stepped with no window, no wall clock and no SDL.
+The pygame sprites in sprites.py wrap these state objects and only draw them.
+Positions, sizes and speeds are in world units (settings.WORLD_WIDTH x WORLD_HEIGHT), whatever
+the window size or render scale, so a match plays out the same at any resolution.
+"""
+
+import hashlib
+import math
+import random
+from settings import WORLD_WIDTH, WORLD_HEIGHT, SIZE, POS, DIFFICULTY_PRESETS
+
+BALL_SPEED_CAP = 600  # ball never goes faster than this (world units per second)
+WIN_SCORE = 10        # first to this many points wins the match
+FIXED_DT = 1 / 120    # physics always advances in steps of this size (seconds)
+MAX_FRAME_TIME = 0.25 # longest frame fed into the accumulator, avoids a "spiral of death" after hitches
+MAX_IMPACTS_PER_STEP = 16  # safety limit on bounces resolved inside one swept step
+# order of the values in GameState.snapshot()
+SNAPSHOT_FIELDS = ('frame', 'time', 'ball_x', 'ball_y', 'ball_dx', 'ball_dy', 'ball_speed', 'epoch',
+                   'paddle_hits', 'rng', 'player_y', 'opponent_y', 'player_score', 'opponent_score')
+
+
+class Vec2:
+    """Minimal 2D vector with the same x/y attribute access as pygame.math.Vector2."""
+
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+    def normalize(self):
+        """Return a unit-length copy of this vector."""
+        length = math.hypot(self.x, self.y)
+        if length == 0:
+            raise ValueError("Can't normalize Vector of length Zero")
+        return Vec2(self.x / length, self.y / length)
+
+    def __repr__(self):
+        return f"Vec2({self.x}, {self.y})"
+
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN64 = 0x9E3779B97F4A7C15
+
+
+def _mix64(z):
+    """SplitMix64 finalizer: scrambles a 64-bit integer into a well-distributed one."""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class CounterRandom(random.Random):
+    """
+    Counter-based random stream (SplitMix64 over a draw counter) with the random.Random API.
+    Draw n depends only on (key, n), so the whole generator state is one counter: snapshots
+    and replay keyframes store it in 8 bytes instead of the 2.5 KB Mersenne Twister state.
+    """
+
+    def __init__(self, name):
+        self.key = 0
+        self.counter = 0
+        super().__init__(name)
+
+    def seed(self, a=None, version=2):
+        digest = hashlib.sha256(str(a).encode()).digest()
+        self.key = int.from_bytes(digest[:8], 'little')
+        self.counter = 0
+
+    def getrandbits(self, k):
+        bits = 0
+        filled = 0
+        while filled < k:
+            self.counter += 1
+            bits |= _mix64((self.key + self.counter * _GOLDEN64) & _MASK64) << filled
+            filled += 64
+        return bits & ((1 << k) - 1)
+
+    def random(self):
+        return self.getrandbits(53) * (1.0 / (1 << 53))
+
+    def getstate(self):
+        return self.key, self.counter
+
+    def setstate(self, state):
+        self.key, self.counter = state
+
+    def __reduce__(self):
+        # random.Random rebuilds with a bare cls(), but __init__ needs a seed; the key is restored
+        # from the state anyway, so any placeholder seed will do (for pickle, deepcopy and workers)
+        return CounterRandom, (None,), self.getstate()
+
+
+class BallState:
+    """Position, direction and speed of the ball, with its bounding box helpers."""
+
+    __slots__ = ('difficulty_settings', 'rng', 'width', 'height', 'pos', 'direction', 'speed', 'ball_accel', 'epoch', 'paddle_hits')
+
+    def __init__(self, position=POS['ball'], difficulty_settings=None, rng=None):
+        if difficulty_settings is None:
+            difficulty_settings = DIFFICULTY_PRESETS['normal']
+        self.difficulty_settings = difficulty_settings
+        # random source for launches and paddle deflections (global random module if not seeded)
+        self.rng = rng if rng is not None else random
+        self.width, self.height = SIZE['ball']
+        self.pos = Vec2(*position)
+        self.direction = Vec2()
+        self.speed = difficulty_settings.get('ball', 300)
+        self.ball_accel = difficulty_settings.get('ball_accel', 5)
+        # trajectory version: bumped on every bounce, paddle hit and relaunch so
+        # AI predictions can be cached until the straight-line path changes
+        self.epoch = 0
+        self.paddle_hits = 0  # total paddle returns this match (rally length statistics)
+
+    @property
+    def left(self):
+        return self.pos.x - self.width / 2
+
+    @property
+    def right(self):
+        return self.pos.x + self.width / 2
+
+    @property
+    def top(self):
+        return self.pos.y - self.height / 2
+
+    @property
+    def bottom(self):
+        return self.pos.y + self.height / 2
+
+
+class PaddleState:
+    """Position, vertical direction and speed of one paddle."""
+
+    __slots__ = ('width', 'height', 'pos', 'direction', 'speed')
+
+    def __init__(self, position, difficulty_settings=None):
+        if difficulty_settings is None:
+            difficulty_settings = DIFFICULTY_PRESETS['normal']
+        self.width = SIZE['paddle'][0]
+        # Use paddle_height from difficulty settings if available
+        self.height = difficulty_settings.get('paddle_height', SIZE['paddle'][1])
+        cx, cy = position
+        self.pos = Vec2(float(cx), float(cy))
+        self.direction = Vec2()
+        # choose speed based on side (player on right gets player speed)
+        if cx > WORLD_WIDTH / 2:
+            self.speed = difficulty_settings.get('player', 300)
+        else:
+            self.speed = difficulty_settings.get('opponent', 300)
+
+    @property
+    def left(self):
+        return self.pos.x - self.width / 2
+
+    @property
+    def right(self):
+        return self.pos.x + self.width / 2
+
+    @property
+    def top(self):
+        return self.pos.y - self.height / 2
+
+    @property
+    def bottom(self):
+        return self.pos.y + self.height / 2
+
+
+class Scoreboard:
+    __slots__ = ('player', 'opponent')
+
+    def __init__(self):
+        self.player = 0
+        self.opponent = 0
+
+    def player_scored(self):
+        self.player += 1
+
+    def opponent_scored(self):
+        self.opponent += 1
+
+
+class GameState:
+    """
+    Everything needed to advance one match: ball, both paddles, scores and elapsed time.
+    With a seed, the match is fully deterministic: the same seed and the same inputs
+    per step always give a bit-identical match.
+    State objects use __slots__ (no per-instance dict), and snapshot()/restore() copy the whole
+    match as one flat tuple, so rollback, search and replay seeking can save states cheaply.
+    copy.deepcopy() and pickle give an independent match that continues identically, random
+    streams included; they are much slower than a snapshot, but keep the settings and seed too.
+    """
+
+    __slots__ = ('difficulty', 'difficulty_settings', 'seed', 'rng', 'ball', 'player', 'opponent',
+                 'paddles', 'scoreboard', 'winner', 'time', 'frame')
+
+    def __init__(self, difficulty='normal', difficulty_settings=None, seed=None):
+        if difficulty_settings is None:
+            difficulty_settings = DIFFICULTY_PRESETS.get(difficulty, DIFFICULTY_PRESETS['normal'])
+        self.difficulty = difficulty
+        self.difficulty_settings = difficulty_settings
+        self.seed = seed
+        self.rng = self.make_rng('ball')
+        self.ball = BallState(POS['ball'], difficulty_settings, rng=self.rng)
+        self.player = PaddleState(POS['player'], difficulty_settings)
+        self.opponent = PaddleState(POS['opponent'], difficulty_settings)
+        self.paddles = (self.player, self.opponent)
+        self.scoreboard = Scoreboard()
+        self.winner = None
+        self.time = 0.0
+        self.frame = 0  # number of steps taken so far
+        launch(self.ball)
+
+    def make_rng(self, name):
+        """
+        Independent random stream for one consumer of this match (ball physics, each AI).
+        Derived from the match seed, so adding draws in one stream never shifts another.
+        """
+        if self.seed is None:
+            return random.Random()
+        return CounterRandom(f"{self.seed}:{name}")
+
+    def snapshot(self):
+        """
+        Everything that changes during a match as one flat tuple, in SNAPSHOT_FIELDS order.
+        Settings, seed and sizes are fixed for the match, so they are not included; the ball's
+        random stream is a single counter for seeded matches (the Mersenne Twister state otherwise).
+        """
+        ball = self.ball
+        rng = self.rng
+        return (self.frame, self.time,
+                ball.pos.x, ball.pos.y, ball.direction.x, ball.direction.y, ball.speed,
+                ball.epoch, ball.paddle_hits, rng.counter if type(rng) is CounterRandom else rng.getstate(),
+                self.player.pos.y, self.opponent.pos.y,
+                self.scoreboard.player, self.scoreboard.opponent)
+
+    def restore(self, snapshot):
+        """Put back a snapshot() taken from this match (or one with the same seed and settings)."""
+        (self.frame, self.time, x, y, dx, dy, speed, epoch, paddle_hits, rng_state,
+         player_y, opponent_y, player_score, opponent_score) = snapshot
+        ball = self.ball
+        ball.pos.x, ball.pos.y = x, y
+        ball.direction.x, ball.direction.y = dx, dy
+        ball.speed = speed
+        ball.epoch = epoch
+        ball.paddle_hits = paddle_hits
+        if type(self.rng) is CounterRandom:
+            self.rng.counter = rng_state
+        else:
+            self.rng.setstate(rng_state)
+        self.player.pos.y = player_y
+        self.opponent.pos.y = opponent_y
+        self.scoreboard.player = player_score
+        self.scoreboard.opponent = opponent_score
+        self.winner = check_winner(self.scoreboard)
+
+
+# --- Ball physics ---
+def update_position(ball, dt):
+    """Move ball according to direction, speed and elapsed time."""
+    ball.pos.x += ball.direction.x * ball.speed * dt
+    ball.pos.y += ball.direction.y * ball.speed * dt
+
+
+def handle_wall_collisions(ball):
+    """Invert vertical direction when touching top/bottom walls while moving into them."""
+    if (ball.top <= 0 and ball.direction.y < 0) or (ball.bottom >= WORLD_HEIGHT and ball.direction.y > 0):
+        ball.direction.y *= -1
+        ball.epoch += 1
+
+
+def handle_out_of_bounds(ball, scoreboard=None):
+    """
+    Detect left/right exit, update score and relaunch from center.
+    Returns 'player' or 'opponent' for whoever scored, otherwise None.
+    """
+    if ball.left <= 0:
+        # Player scored (opponent missed) — relaunch toward opponent (right)
+        launch(ball, direction_x=1)
+        if scoreboard is not None:
+            scoreboard.player_scored()
+        return 'player'
+    if ball.right >= WORLD_WIDTH:
+        # Opponent scored (player missed) — relaunch toward player (left)
+        launch(ball, direction_x=-1)
+        if scoreboard is not None:
+            scoreboard.opponent_scored()
+        return 'opponent'
+    return None
+
+
+def overlaps(ball, paddle):
+    """Axis-aligned bounding box overlap test between the ball and a paddle."""
+    return (ball.left < paddle.right and ball.right > paddle.left
+            and ball.top < paddle.bottom and ball.bottom > paddle.top)
+
+
+def deflect_off_paddle(ball):
+    """Bounce off a paddle face: reverse X, add small random vertical variation and speed up."""
+    ball.direction.x *= -1
+    ball.direction.y += ball.rng.uniform(-0.3, 0.3)  # small vertical variation
+    # Use difficulty-based acceleration
+    ball.speed = min(ball.speed + ball.ball_accel, BALL_SPEED_CAP)
+    ball.epoch += 1
+    ball.paddle_hits += 1
+
+
+def handle_paddle_collision(ball, paddles):
+    """
+    Discrete check: bounce off an overlapping paddle the ball is moving towards.
+    Ignoring paddles the ball is already leaving stops it re-flipping while still inside one.
+    """
+    for paddle in paddles:
+        if overlaps(ball, paddle) and (paddle.pos.x - ball.pos.x) * ball.direction.x > 0:
+            deflect_off_paddle(ball)
+            return True
+    return False
+
+
+def _wall_impact_time(ball, vy):
+    """Time until the ball touches the wall it is moving towards (0 if already touching), or None."""
+    if vy < 0:
+        return max(0.0, ball.top / -vy)
+    if vy > 0:
+        return max(0.0, (WORLD_HEIGHT - ball.bottom) / vy)
+    return None
+
+
+def _paddle_impact(ball, paddle, vx, vy):
+    """
+    Swept AABB test of the moving ball against a static paddle.
+    Works on the paddle grown by the ball's half size, so the ball becomes a point moving along a ray.
+    Returns (time_of_impact, hit_x_face) or None if the ball doesn't enter the paddle.
+    An overlap at the start (a paddle moved onto the ball) is an immediate face hit if the ball is
+    moving towards the paddle, like the discrete check; one it is already leaving is ignored, so
+    the ball can always get out of a paddle.
+    """
+    half_w = ball.width / 2
+    half_h = ball.height / 2
+    entry_x, exit_x = _slab(ball.pos.x, vx, paddle.left - half_w, paddle.right + half_w)
+    entry_y, exit_y = _slab(ball.pos.y, vy, paddle.top - half_h, paddle.bottom + half_h)
+    entry = max(entry_x, entry_y)
+    exit_ = min(exit_x, exit_y)
+    if entry >= exit_:
+        return None
+    if entry < 0:
+        if exit_ > 0 and (paddle.pos.x - ball.pos.x) * vx > 0:
+            return 0.0, True
+        return None
+    return entry, entry_x >= entry_y
+
+
+def _slab(start, velocity, low, high):
+    """Entry/exit times of a point moving along one axis through the open interval (low, high)."""
+    if velocity == 0:
+        if low < start < high:
+            return -math.inf, math.inf
+        return math.inf, -math.inf
+    t1 = (low - start) / velocity
+    t2 = (high - start) / velocity
+    return (t1, t2) if t1 < t2 else (t2, t1)
+
+
+def sweep_ball(ball, paddles, dt):
+    """
+    Continuous collision: move the ball dt seconds, finding the exact time of every wall and
+    paddle impact inside the step and reflecting at that point. Large steps can't tunnel through
+    a paddle or leave the ball stuck past a wall. Returns the number of impacts resolved.
+    """
+    remaining = dt
+    impacts = 0
+    while remaining > 0 and impacts < MAX_IMPACTS_PER_STEP:
+        vx = ball.direction.x * ball.speed
+        vy = ball.direction.y * ball.speed
+        # earliest impact within what's left of the step
+        impact_time = remaining
+        impact = None
+        wall_time = _wall_impact_time(ball, vy)
+        if wall_time is not None and wall_time <= impact_time:
+            impact_time, impact = wall_time, 'wall'
+        for paddle in paddles:
+            hit = _paddle_impact(ball, paddle, vx, vy)
+            if hit is not None and hit[0] <= impact_time:
+                impact_time, impact = hit[0], ('x face' if hit[1] else 'y face')
+
+        ball.pos.x += vx * impact_time
+        ball.pos.y += vy * impact_time
+        remaining -= impact_time
+        if impact is None:
+            break
+        impacts += 1
+        if impact == 'x face':
+            deflect_off_paddle(ball)
+        else:
+            # top/bottom wall or the top/bottom end of a paddle
+            ball.direction.y *= -1
+            ball.epoch += 1
+    return impacts
+
+
+def reset_position(ball):
+    """Place ball at center without changing direction."""
+    ball.pos = Vec2(WORLD_WIDTH // 2, WORLD_HEIGHT // 2)
+    ball.epoch += 1
+
+
+def launch(ball, direction_x=None, angle=None):
+    """Reset position and set a normalized direction.
+    direction_x: optional +1 (right) or -1 (left). If None, choose randomly.
+    angle: optional vertical component (y). If None, pick small random variation.
+    """
+    reset_position(ball)
+    ball.speed = ball.difficulty_settings.get('ball', 300)  # reset speed from difficulty
+    if direction_x is None:
+        direction_x = ball.rng.choice((-1, 1))
+    if angle is None:
+        angle = ball.rng.uniform(-0.5, 0.5)
+    ball.direction = Vec2(direction_x, angle).normalize()
+
+
+# --- Paddle physics ---
+def move_paddle(paddle, dt):
+    """Apply movement based on current direction and speed, clamped to the window."""
+    paddle.pos.y += paddle.direction.y * paddle.speed * dt
+    half_h = paddle.height / 2
+    paddle.pos.y = max(half_h, min(WORLD_HEIGHT - half_h, paddle.pos.y))
+
+
+# --- Match flow ---
+def check_winner(scoreboard):
+    """Return 'Player' or 'Opponent' once either side reaches WIN_SCORE, otherwise None."""
+    if scoreboard.player >= WIN_SCORE:
+        return "Player"
+    if scoreboard.opponent >= WIN_SCORE:
+        return "Opponent"
+    return None
+
+
+def step(state, inputs, dt):
+    """
+    Advance the match by dt seconds.
+    inputs: mapping with optional 'player' and 'opponent' vertical intents (-1, 0, +1).
+    Returns 'player'/'opponent' if a point was scored this step, otherwise None.
+    """
+    ball = state.ball
+    # ball first (swept against walls and the paddles' current positions), then paddles
+    sweep_ball(ball, state.paddles, dt)
+    scored = handle_out_of_bounds(ball, state.scoreboard)
+
+    state.player.direction.y = inputs.get('player', 0)
+    state.opponent.direction.y = inputs.get('opponent', 0)
+    move_paddle(state.player, dt)
+    move_paddle(state.opponent, dt)
+
+    state.time += dt
+    state.frame += 1
+    state.winner = check_winner(state.scoreboard)
+    return scored
+
+
+def run_match(state, player_ai, opponent_ai, dt=FIXED_DT, max_time=3600.0):
+    """
+    Play a whole match headlessly with an AI strategy on each side.
+    Returns the winner ('Player'/'Opponent'), or None if max_time (simulated seconds) ran out.
+    """
+    while state.winner is None and state.time < max_time:
+        inputs = {
+            'player': player_ai.decide(state.player, state.ball, dt, state),
+            'opponent': opponent_ai.decide(state.opponent, state.ball, dt, state),
+        }
+        step(state, inputs, dt)
+    return state.winner
@@ -0,0 +1,472 @@
+"""
+Spectator state stream for Pong game.
+Live matches are broadcast to spectators as quantized snapshots (ball, both paddles, scores),
+delta-encoded against the last snapshot each spectator acknowledged. Bounce and score events
+ride along with the exact frame and position, so spectators can interpolate between snapshots
+a few times a second instead of receiving the full state every tick.
+
+A SpectatorRelay fans one encoded stream out to many spectators over local UDP. Each packet is
+encoded once per distinct baseline and then shared. Spectators that keep up all acknowledge the
+same few recent snapshots, so encoding cost stays flat as the audience grows. Per-spectator
+cost is one sendto of a packet that doesn't grow with the audience.
+
+Usage:
+    python spectate.py bench --spectators 500 --seconds 20 --loss 0.05
+    python spectate.py watch --difficulty hard        # pygame viewer of a relayed AI match
+"""
+
+import argparse
+import random
+import socket
+import struct
+import time
+
+import ai
+from settings import WORLD_WIDTH, WORLD_HEIGHT, WINDOW_WIDTH, WINDOW_HEIGHT, SIZE, DIFFICULTY_PRESETS
+from simulation import GameState, FIXED_DT, step
+
+SNAPSHOT_EVERY = 6    # ticks between snapshots (20 Hz at 120 Hz physics)
+HISTORY = 64          # snapshots kept as possible delta baselines
+MAX_EVENTS = 16       # events repeated in one packet (oldest unacknowledged dropped first)
+SPECTATOR_TIMEOUT = 5.0
+RELAY_RECEIVE_BUFFER = 4 * 1024 * 1024
+NO_BASELINE = 0xFFFFFFFF
+
+# quantized snapshot fields and their scale (value * scale, rounded to int)
+FIELDS = ('ball_x', 'ball_y', 'ball_dx', 'ball_dy', 'ball_speed', 'player_y', 'opponent_y',
+          'player_score', 'opponent_score')
+POSITION_SCALE = 8        # 1/8 world unit
+DIRECTION_SCALE = 32767   # unit vector components
+SPEED_SCALE = 4           # 1/4 world unit per second
+
+DELTA_HEADER = struct.Struct('<cIIHB')  # b'D', frame, baseline frame (or NO_BASELINE), changed-field mask, event count
+EVENT = struct.Struct('<IBhh')          # frame, kind, x, y (quantized positions)
+ACK = struct.Struct('<cI')              # b'A', frame
+# event positions are int16; a larger world or finer POSITION_SCALE needs a wider EVENT format
+if max(WORLD_WIDTH, WORLD_HEIGHT) * POSITION_SCALE > 0x7FFF:
+    raise ValueError(f"a {WORLD_WIDTH}x{WORLD_HEIGHT} world at POSITION_SCALE {POSITION_SCALE} "
+                     f"overflows the int16 event coordinates")
+SUBSCRIBE = b'S'
+EVENT_KINDS = ('wall', 'paddle', 'score')
+
+
+def quantize(state):
+    """Snapshot of a GameState as a tuple of ints in FIELDS order."""
+    ball = state.ball
+    return (round(ball.pos.x * POSITION_SCALE), round(ball.pos.y * POSITION_SCALE),
+            round(ball.direction.x * DIRECTION_SCALE), round(ball.direction.y * DIRECTION_SCALE),
+            round(ball.speed * SPEED_SCALE),
+            round(state.player.pos.y * POSITION_SCALE), round(state.opponent.pos.y * POSITION_SCALE),
+            state.scoreboard.player, state.scoreboard.opponent)
+
+
+def dequantize(snapshot):
+    """Quantized snapshot tuple -> dict of floats keyed by FIELDS."""
+    ball_x, ball_y, ball_dx, ball_dy, speed, player_y, opponent_y, player_score, opponent_score = snapshot
+    return {
+        'ball_x': ball_x / POSITION_SCALE, 'ball_y': ball_y / POSITION_SCALE,
+        'ball_dx': ball_dx / DIRECTION_SCALE, 'ball_dy': ball_dy / DIRECTION_SCALE,
+        'ball_speed': speed / SPEED_SCALE,
+        'player_y': player_y / POSITION_SCALE, 'opponent_y': opponent_y / POSITION_SCALE,
+        'player_score': player_score, 'opponent_score': opponent_score,
+    }
+
+
+def write_varint(out, value):
+    """Append a zigzag LEB128 varint (small deltas of either sign take one byte)."""
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    """Inverse of write_varint: (value, new offset)."""
+    result = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), offset
+
+
+def encode_delta(frame, snapshot, baseline_frame, baseline, events):
+    """
+    One stream packet: fields that differ from the baseline as varint deltas, then events.
+    With no baseline (baseline_frame NO_BASELINE) the deltas are against all zeros, i.e. a full snapshot.
+    """
+    mask = 0
+    body = bytearray()
+    for index, (value, old) in enumerate(zip(snapshot, baseline)):
+        if value != old:
+            mask |= 1 << index
+            write_varint(body, value - old)
+    packet = bytearray(DELTA_HEADER.pack(b'D', frame, baseline_frame, mask, len(events)))
+    packet += body
+    for event in events:
+        packet += EVENT.pack(*event)
+    return bytes(packet)
+
+
+class StreamEncoder:
+    """
+    Captures quantized snapshots and events from a running match.
+    Call capture(state) after every step; every SNAPSHOT_EVERY frames a snapshot is taken and
+    packet(baseline_frame) returns the packet for it, encoded once per baseline and cached.
+    """
+
+    def __init__(self, snapshot_every=SNAPSHOT_EVERY):
+        self.snapshot_every = snapshot_every
+        self.history = {}  # frame -> snapshot, last HISTORY snapshots
+        self.events = []   # (frame, kind, x, y), last MAX_EVENTS * 4
+        self.frame = None  # frame of the latest snapshot
+        self._packets = {}
+        self._last = None  # (epoch, paddle hits, player score, opponent score) after the previous step
+        self.encoded = 0
+
+    def capture(self, state):
+        """Record events from the step just taken; returns True if a new snapshot was taken."""
+        ball = state.ball
+        marks = (ball.epoch, ball.paddle_hits, state.scoreboard.player, state.scoreboard.opponent)
+        if self._last is not None and marks != self._last:
+            if marks[2:] != self._last[2:]:
+                kind = 'score'
+            elif marks[1] != self._last[1]:
+                kind = 'paddle'
+            else:
+                kind = 'wall'
+            self.events.append((state.frame, EVENT_KINDS.index(kind),
+                                round(ball.pos.x * POSITION_SCALE), round(ball.pos.y * POSITION_SCALE)))
+            del self.events[:-MAX_EVENTS * 4]
+        self._last = marks
+        if state.frame % self.snapshot_every:
+            return False
+        self.frame = state.frame
+        self.history[state.frame] = quantize(state)
+        self.history.pop(state.frame - HISTORY * self.snapshot_every, None)
+        self._packets = {}
+        return True
+
+    def packet(self, baseline_frame=None):
+        """Packet for the latest snapshot against a baseline the receiver holds (None or unknown: full snapshot)."""
+        if baseline_frame not in self.history or baseline_frame == self.frame:
+            baseline_frame = NO_BASELINE
+        packet = self._packets.get(baseline_frame)
+        if packet is None:
+            baseline = self.history.get(baseline_frame, (0,) * len(FIELDS))
+            # events the receiver can't have seen yet (everything after its baseline)
+            since = -1 if baseline_frame == NO_BASELINE else baseline_frame
+            events = [event for event in self.events if event[0] > since][-MAX_EVENTS:]
+            if baseline_frame == NO_BASELINE:
+                events = events[-2:]  # joining or resyncing: recent events only
+            packet = encode_delta(self.frame, self.history[self.frame], baseline_frame, baseline, events)
+            self._packets[baseline_frame] = packet
+            self.encoded += 1
+        return packet
+
+
+class StreamDecoder:
+    """Spectator side: rebuilds snapshots from packets and collects events (each once)."""
+
+    def __init__(self):
+        self.history = {}
+        self.latest = None
+        self.events = {}  # (frame, kind) -> (x, y) in pixels
+        self.new_events = []
+
+    def decode(self, packet):
+        """Apply one packet; returns (frame, snapshot) or None if its baseline is unknown or it is stale."""
+        _, frame, baseline_frame, mask, event_count = DELTA_HEADER.unpack_from(packet)
+        if baseline_frame == NO_BASELINE:
+            baseline = (0,) * len(FIELDS)
+        elif baseline_frame in self.history:
+            baseline = self.history[baseline_frame]
+        else:
+            return None
+        offset = DELTA_HEADER.size
+        values = list(baseline)
+        for index in range(len(FIELDS)):
+            if mask & (1 << index):
+                delta, offset = read_varint(packet, offset)
+                values[index] += delta
+        self.new_events = []
+        for _ in range(event_count):
+            event_frame, kind, x, y = EVENT.unpack_from(packet, offset)
+            offset += EVENT.size
+            key = (event_frame, EVENT_KINDS[kind])
+            if key not in self.events:
+                self.events[key] = (x / POSITION_SCALE, y / POSITION_SCALE)
+                self.new_events.append(key)
+        snapshot = tuple(values)
+        self.history[frame] = snapshot
+        if self.latest is None or frame > self.latest:
+            self.latest = frame
+        for old in [old for old in self.history if old < self.latest - HISTORY * SNAPSHOT_EVERY]:
+            del self.history[old]
+        for key in [key for key in self.events if key[0] < self.latest - HISTORY * SNAPSHOT_EVERY]:
+            del self.events[key]
+        return frame, snapshot
+
+
+class Interpolator:
+    """
+    Renders a spectator's view `delay` frames behind the newest snapshot, blending between the
+    two snapshots around that frame. If a bounce or score happened in between, the ball goes
+    through the event's position instead of cutting the corner (or sliding across the court).
+    """
+
+    def __init__(self, decoder, delay=2 * SNAPSHOT_EVERY):
+        self.decoder = decoder
+        self.delay = delay
+
+    def sample(self, frame=None):
+        """View at `frame` (default: newest - delay) as a dict like dequantize(), or None before any snapshot."""
+        history = self.decoder.history
+        if not history:
+            return None
+        if frame is None:
+            frame = self.decoder.latest - self.delay
+        before = max((f for f in history if f <= frame), default=None)
+        after = min((f for f in history if f >= frame), default=None)
+        if before is None or after is None or before == after:
+            return dequantize(history[before if before is not None else after])
+        a, b = dequantize(history[before]), dequantize(history[after])
+        t = (frame - before) / (after - before)
+        view = {name: a[name] + (b[name] - a[name]) * t for name in ('player_y', 'opponent_y')}
+        view['player_score'], view['opponent_score'] = (a['player_score'], a['opponent_score']) if t < 1 else (b['player_score'], b['opponent_score'])
+        # ball: piecewise through the first event inside (before, after)
+        events = sorted((key, position) for key, position in self.decoder.events.items() if before < key[0] <= after)
+        start_frame, start = before, (a['ball_x'], a['ball_y'])
+        end_frame, end = after, (b['ball_x'], b['ball_y'])
+        if events:
+            (event_frame, kind), position = events[0]
+            if frame >= event_frame:
+                start_frame, start = event_frame, position  # score events are placed at the relaunch
+            elif kind == 'score':
+                # still flying out of the court: keep going the way it was
+                seconds = (frame - before) * FIXED_DT
+                view['ball_x'] = a['ball_x'] + a['ball_dx'] * a['ball_speed'] * seconds
+                view['ball_y'] = a['ball_y'] + a['ball_dy'] * a['ball_speed'] * seconds
+                return view
+            else:
+                end_frame, end = event_frame, position
+        u = (frame - start_frame) / (end_frame - start_frame) if end_frame != start_frame else 1.0
+        view['ball_x'] = start[0] + (end[0] - start[0]) * u
+        view['ball_y'] = start[1] + (end[1] - start[1]) * u
+        return view
+
+
+class SpectatorRelay:
+    """
+    Local UDP fan-out: spectators send SUBSCRIBE, then ACK every packet they decode.
+    broadcast() sends the encoder's latest snapshot to everyone, delta-encoded against each
+    spectator's last acknowledged snapshot (packets shared between spectators with the same one).
+    """
+
+    def __init__(self, encoder, host='127.0.0.1', port=0, clock=time.monotonic):
+        self.encoder = encoder
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # a burst of acks arrives after every broadcast; make room for a large audience
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RELAY_RECEIVE_BUFFER)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.clock = clock
+        self.spectators = {}  # address -> [acknowledged frame or None, last heard time]
+        self.bytes_sent = 0
+        self.packets_sent = 0
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def poll(self):
+        """Handle subscriptions and acknowledgements; forget spectators silent for SPECTATOR_TIMEOUT."""
+        now = self.clock()
+        while True:
+            try:
+                data, address = self.sock.recvfrom(64)
+            except (BlockingIOError, ConnectionError):
+                break
+            if data == SUBSCRIBE:
+                self.spectators.setdefault(address, [None, now])[1] = now
+            elif len(data) == ACK.size and data[:1] == b'A' and address in self.spectators:
+                entry = self.spectators[address]
+                (frame,) = ACK.unpack(data)[1:]
+                if entry[0] is None or frame > entry[0]:
+                    entry[0] = frame
+                entry[1] = now
+        for address in [address for address, entry in self.spectators.items() if now - entry[1] > SPECTATOR_TIMEOUT]:
+            del self.spectators[address]
+
+    def broadcast(self):
+        self.poll()
+        packet_for = self.encoder.packet
+        sendto = self.sock.sendto
+        for address, (acked, _) in self.spectators.items():
+            packet = packet_for(acked)
+            try:
+                sendto(packet, address)
+            except OSError:
+                continue
+            self.bytes_sent += len(packet)
+            self.packets_sent += 1
+
+    def close(self):
+        self.sock.close()
+
+
+class Spectator:
+    """UDP spectator client: subscribes to a relay, decodes packets, acknowledges them."""
+
+    def __init__(self, relay_address, loss=0.0, rng=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.setblocking(False)
+        self.relay_address = relay_address
+        self.decoder = StreamDecoder()
+        self.interpolator = Interpolator(self.decoder)
+        self.loss = loss  # simulated loss of incoming packets, for testing
+        self.rng = rng if rng is not None else random.Random()
+        self.received = 0
+        self.undecodable = 0
+        self.sock.sendto(SUBSCRIBE, relay_address)
+
+    def poll(self):
+        if self.decoder.latest is None:
+            self.sock.sendto(SUBSCRIBE, self.relay_address)  # until the first packet arrives (UDP may drop it)
+        while True:
+            try:
+                packet, _ = self.sock.recvfrom(2048)
+            except (BlockingIOError, ConnectionError):
+                return
+            if self.loss and self.rng.random() < self.loss:
+                continue
+            self.received += 1
+            decoded = self.decoder.decode(packet)
+            if decoded is None:
+                self.undecodable += 1
+                continue
+            self.sock.sendto(ACK.pack(b'A', decoded[0]), self.relay_address)
+
+    def close(self):
+        self.sock.close()
+
+
+def play_relayed_match(difficulty, seed, on_step):
+    """AI-vs-AI match generator used by the tools below: steps the match and calls on_step(state) after each step."""
+    state = GameState(difficulty, seed=seed)
+    player_ai = ai.create_ai(ai.HardAI, state.difficulty_settings, rng=state.make_rng('player'))
+    opponent_ai = ai.create_difficulty_ai(difficulty, state.difficulty_settings, state.make_rng('opponent'))
+    while state.winner is None:
+        inputs = {
+            'player': player_ai.decide(state.player, state.ball, FIXED_DT, state),
+            'opponent': opponent_ai.decide(state.opponent, state.ball, FIXED_DT, state),
+        }
+        step(state, inputs, FIXED_DT)
+        if on_step(state) is False:
+            break
+    return state
+
+
+def bench(spectators, seconds, loss, difficulty, seed):
+    """One relay, many local spectators; reports per-spectator bandwidth and relay CPU and checks decoding."""
+    encoder = StreamEncoder()
+    relay = SpectatorRelay(encoder)
+    audience = [Spectator(relay.address, loss, random.Random(index)) for index in range(spectators)]
+    relay_time = [0.0]
+    frames = round(seconds / FIXED_DT)
+    mismatches = [0]
+
+    def on_step(state):
+        if encoder.capture(state):
+            start = time.perf_counter()
+            relay.broadcast()
+            relay_time[0] += time.perf_counter() - start
+            for spectator in audience:
+                spectator.poll()
+                decoded = spectator.decoder.latest
+                if decoded is not None and spectator.decoder.history[decoded] != encoder.history[decoded]:
+                    mismatches[0] += 1
+        return state.frame < frames
+
+    state = play_relayed_match(difficulty, seed, on_step)
+    elapsed = state.frame * FIXED_DT
+    naive = struct.calcsize('<I7f2H') / FIXED_DT  # full float state every tick
+    print(f"{spectators} spectators, {elapsed:.1f}s of play, {loss:.0%} packet loss")
+    print(f"per spectator: {relay.bytes_sent / spectators / elapsed:.0f} B/s "
+          f"(full state every tick would be {naive:.0f} B/s), "
+          f"{relay.bytes_sent / max(1, relay.packets_sent):.1f} B/packet")
+    print(f"relay CPU per spectator per snapshot: {relay_time[0] / max(1, relay.packets_sent) * 1e6:.2f} us, "
+          f"packets encoded {encoder.encoded} for {relay.packets_sent} sent")
+    print(f"undecodable packets: {sum(s.undecodable for s in audience)}, decode mismatches: {mismatches[0]}")
+    for spectator in audience:
+        spectator.close()
+    relay.close()
+    return 1 if mismatches[0] else 0
+
+
+def watch(difficulty, seed, loss):
+    """Pygame window showing what a spectator sees: a relayed AI match drawn from interpolated snapshots."""
+    import pygame
+    from settings import COLORS
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption("Pong Wars - spectator")
+    clock = pygame.time.Clock()
+    encoder = StreamEncoder()
+    relay = SpectatorRelay(encoder)
+    spectator = Spectator(relay.address, loss)
+    paddle_w, paddle_h = SIZE['paddle'][0], DIFFICULTY_PRESETS[difficulty].get('paddle_height', SIZE['paddle'][1])
+    ball_w, ball_h = SIZE['ball']
+    tick_budget = [0.0]
+
+    def on_step(state):
+        if encoder.capture(state):
+            relay.broadcast()
+            spectator.poll()
+        tick_budget[0] -= FIXED_DT
+        if tick_budget[0] > 0:
+            return True
+        # draw one frame per 1/60 s of play
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+        view = spectator.interpolator.sample()
+        screen.fill(COLORS['bg'])
+        if view:
+            for x, y in ((state.player.pos.x, view['player_y']), (state.opponent.pos.x, view['opponent_y'])):
+                pygame.draw.rect(screen, COLORS['paddle'], pygame.Rect(0, 0, paddle_w, paddle_h).move(x - paddle_w / 2, y - paddle_h / 2))
+            pygame.draw.ellipse(screen, COLORS['ball'], pygame.Rect(0, 0, ball_w, ball_h).move(view['ball_x'] - ball_w / 2, view['ball_y'] - ball_h / 2))
+        pygame.display.flip()
+        tick_budget[0] += clock.tick(60) / 1000
+        return True
+
+    play_relayed_match(difficulty, seed, on_step)
+    pygame.quit()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars spectator stream tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench_parser = commands.add_parser('bench', help="measure per-spectator bandwidth and relay CPU")
+    bench_parser.add_argument('--spectators', type=int, default=200)
+    bench_parser.add_argument('--seconds', type=float, default=20.0, help="seconds of play to relay")
+    bench_parser.add_argument('--loss', type=float, default=0.0, help="simulated packet loss at the spectators")
+    watch_parser = commands.add_parser('watch', help="watch a relayed AI match in a window")
+    watch_parser.add_argument('--loss', type=float, default=0.0)
+    for sub in (bench_parser, watch_parser):
+        sub.add_argument('--difficulty', default='normal', choices=list(DIFFICULTY_PRESETS))
+        sub.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.command == 'bench':
+        return bench(args.spectators, args.seconds, args.loss, args.difficulty, args.seed)
+    return watch(args.difficulty, args.seed, args.loss)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,47 +1,71 @@
 import pygame
 from settings import *
-import random
 from ai import *
+import simulation
+from simulation import BallState, PaddleState, Scoreboard
+from textcache import render_text
+from aiworker import AsyncAI
 
-class Paddle(pygame.sprite.Sprite):
-    def __init__(self, groups, position, is_player=False, ball=None, difficulty_settings=None, difficulty='normal'):
+class Paddle(pygame.sprite.DirtySprite):
+    def __init__(self, groups, position, is_player=False, ball=None, difficulty_settings=None, difficulty='normal', state=None, rng=None, scale=1.0):
         # add the sprite to any groups passed from Game
         super().__init__(*groups)
+        # reference to the Ball instance (may be None)
+        self.ball = ball
+        self.image = None
+        # pixels per world unit of the surface this sprite is drawn on (see Game's render scale)
+        self.scale = scale
+        # physics state lives in simulation.PaddleState; the sprite only draws it
+        if state is None:
+            state = PaddleState(position, difficulty_settings)
+        self.configure(state, is_player, difficulty, difficulty_settings, rng)
 
+    def configure(self, state, is_player=False, difficulty='normal', difficulty_settings=None, rng=None, ai_worker=None):
+        """
+        Point the sprite at a (new) PaddleState and rebuild its AI; used for rematches without new sprites.
+        ai_worker ('thread' or 'process') runs the AI's decisions off the render loop (see aiworker.py).
+        """
         # Load difficulty settings (default to normal preset)
         if difficulty_settings is None:
             from settings import DIFFICULTY_PRESETS
             difficulty_settings = DIFFICULTY_PRESETS['normal']
         self.difficulty_settings = difficulty_settings
         self.ai_error = difficulty_settings.get('ai_error', 0.10)
+        self.release_ai()
         self.ai = None
         if not is_player:
-            if difficulty == 'easy':
-                self.ai = EasyAI(reaction_time=difficulty_settings.get('reaction_time', 0.3), inaccuracy=self.ai_error)
-            elif difficulty == 'normal':
-                self.ai = MediumAI(reaction_time=difficulty_settings.get('reaction_time', 0.15), inaccuracy=self.ai_error)
-            elif difficulty == 'hard':
-                self.ai = HardAI(reaction_time=difficulty_settings.get('reaction_time', 0.05), inaccuracy=self.ai_error)
-
-        # create a surface and fill it with the paddle color
-        # Use paddle_height from difficulty settings if available
-        paddle_height = difficulty_settings.get('paddle_height', SIZE['paddle'][1])
-        self.image = pygame.Surface((SIZE['paddle'][0], paddle_height), pygame.SRCALPHA)
-        self.image.fill(pygame.Color(COLORS['paddle']))
+            self.ai = create_difficulty_ai(difficulty, difficulty_settings, rng)
+            if self.ai and ai_worker:
+                self.ai = AsyncAI(self.ai, ai_worker)
         self.is_player = is_player
-        # reference to the Ball instance (may be None)
-        self.ball = ball
-        self.direction = pygame.math.Vector2()
-        # choose speed based on side (player on right gets player speed)
-        cx, cy = position
-        if cx > WINDOW_WIDTH / 2:
-            self.speed = difficulty_settings.get('player', 300)
-        else:
-            self.speed = difficulty_settings.get('opponent', 300)
+        self.state = state
 
-        self.rect = self.image.get_rect(center=(int(cx), int(cy)))
-        # float position for smooth sub-pixel movement
-        self.pos = pygame.math.Vector2(self.rect.center)
+        # create a surface and fill it with the paddle color (again only if the paddle height changed)
+        size = (round(self.state.width * self.scale), round(self.state.height * self.scale))
+        if self.image is None or self.image.get_size() != size:
+            self.image = pygame.Surface(size, pygame.SRCALPHA)
+            self.image.fill(pygame.Color(COLORS['paddle']))
+            self.rect = self.image.get_rect()
+        self.remember_position()
+        self.sync_rect()
+        self.dirty = 1
+
+    # --- State accessors (kept so AI and debug code can read paddle.pos etc.) ---
+    @property
+    def pos(self):
+        return self.state.pos
+
+    @property
+    def direction(self):
+        return self.state.direction
+
+    @property
+    def speed(self):
+        return self.state.speed
+
+    @property
+    def height(self):
+        return self.state.height
 
     # --- Paddle control helpers ---
     def set_ball(self, ball):
@@ -53,150 +77,272 @@ class Paddle(pygame.sprite.Sprite):
         keys = pygame.key.get_pressed()
         self.direction.y = int(keys[pygame.K_DOWN]) - int(keys[pygame.K_UP])
 
-    def ai_move(self, dt=0):
+    def release_ai(self):
+        """Stop the AI's worker, if it has one (the AI keeps its last direction afterwards)."""
+        close = getattr(getattr(self, 'ai', None), 'close', None)
+        if close:
+            close()
+
+    def ai_move(self, dt=0, game_state=None):
         """Use attached AI strategy to set vertical direction for opponent paddle."""
         if self.ai and self.ball:
-            self.direction.y = self.ai.decide(self, self.ball, dt)  # dt can be passed if needed for timing
-            
+            self.direction.y = self.ai.decide(self, self.ball, dt, game_state)
 
-    def move(self, dt):
-        """Apply movement based on current direction and speed, update rect."""
-        self.pos.y += self.direction.y * self.speed * dt
-        self.rect.center = (round(self.pos.x), round(self.pos.y))
-        self._clamp_to_window()
-
-    def _clamp_to_window(self):
-        """Ensure paddle stays within vertical window bounds."""
-        half_h = self.rect.height // 2
-        y = max(half_h, min(WINDOW_HEIGHT - half_h, self.rect.centery))
-        self.rect.centery = y
-        self.pos.y = float(self.rect.centery)
-
-    def update(self, dt=0):
+    def read_intent(self, dt=0, game_state=None):
+        """Return this frame's vertical intent from the keyboard or the AI."""
         if self.is_player:
             self.handle_input()
         else:
-            self.ai_move(dt)
-        self.move(dt)
+            self.ai_move(dt, game_state)
+        return self.direction.y
+
+    def move(self, dt):
+        """Apply movement based on current direction and speed, update rect."""
+        simulation.move_paddle(self.state, dt)
+        self.sync_rect()
+
+    def remember_position(self):
+        """Store the position before a physics step, used for render interpolation."""
+        self.prev_x, self.prev_y = self.state.pos.x, self.state.pos.y
+
+    def sync_rect(self, alpha=1.0):
+        """Copy the simulated position into the rect, blended from the previous step by alpha."""
+        x = self.prev_x + (self.state.pos.x - self.prev_x) * alpha
+        y = self.prev_y + (self.state.pos.y - self.prev_y) * alpha
+        center = (round(x * self.scale), round(y * self.scale))
+        if center != self.rect.center:
+            self.rect.center = center
+            self.dirty = 1  # only redraw when the sprite actually moved
+
+    def update(self, dt=0, alpha=1.0):
+        """Render from state: physics is advanced by simulation.step."""
+        self.sync_rect(alpha)
 
-class Ball(pygame.sprite.Sprite):
-    def __init__(self, groups, position, paddles=None, scoreboard=None, difficulty_settings=None):
+class Ball(pygame.sprite.DirtySprite):
+    def __init__(self, groups, position, paddles=None, scoreboard=None, difficulty_settings=None, state=None, rng=None, scale=1.0):
         # add the sprite to any groups passed from Game
         super().__init__(*groups)
+        # pixels per world unit of the surface this sprite is drawn on (see Game's render scale)
+        self.scale = scale
 
         # create a surface and fill it with the ball color
-        self.image = pygame.Surface(SIZE['ball'], pygame.SRCALPHA)
+        self.image = pygame.Surface([round(side * scale) for side in SIZE['ball']], pygame.SRCALPHA)
         self.image.fill(pygame.Color(COLORS['ball']))
-        self.direction = pygame.math.Vector2()
         # reference to paddle sprites group for collision checks
         self.paddles = paddles
-        # optional scoreboard object (keeps backward compatibility with direct score attrs)
-        self.scoreboard = scoreboard
-        
+        self.rect = self.image.get_rect()
+        # physics state lives in simulation.BallState; the sprite only draws it
+        if state is None:
+            state = BallState(position, difficulty_settings, rng=rng)
+        self.configure(state, scoreboard, difficulty_settings)
+
+    def configure(self, state, scoreboard=None, difficulty_settings=None):
+        """Point the sprite at a (new) BallState and scoreboard; used for rematches without new sprites."""
+        # scoreboard object; scores are read from here
+        self.scoreboard = scoreboard if scoreboard is not None else Scoreboard()
+
         # Load difficulty settings (default to normal preset)
         if difficulty_settings is None:
             from settings import DIFFICULTY_PRESETS
             difficulty_settings = DIFFICULTY_PRESETS['normal']
         self.difficulty_settings = difficulty_settings
-        self.speed = difficulty_settings.get('ball', 300)
-        self.ball_accel = difficulty_settings.get('ball_accel', 5)
+        self.state = state
+        self.remember_position()
+        self.sync_rect()
+        self.dirty = 1
+
+    # --- State accessors (kept so AI and debug code can read ball.pos etc.) ---
+    @property
+    def pos(self):
+        return self.state.pos
+
+    @property
+    def direction(self):
+        return self.state.direction
+
+    @property
+    def speed(self):
+        return self.state.speed
 
-        # keep numeric scores for compatibility with existing code
-        self.playerScore = 0
-        self.opponentScore = 0
+    @property
+    def ball_accel(self):
+        return self.state.ball_accel
 
-        # ensure integer center coordinates (settings used / which may produce floats)
-        cx, cy = position
-        self.rect = self.image.get_rect(center=(int(cx), int(cy)))
-        # float position for smooth sub-pixel movement
-        self.pos = pygame.math.Vector2(self.rect.center)
+    @property
+    def epoch(self):
+        """Trajectory version; changes whenever the ball's straight-line path changes."""
+        return self.state.epoch
+
+    # keep numeric scores for compatibility with existing code
+    @property
+    def playerScore(self):
+        return self.scoreboard.player
+
+    @property
+    def opponentScore(self):
+        return self.scoreboard.opponent
 
     # --- Ball update helpers ---
-    def update(self, dt=0):
-        """High-level update: move, handle collisions and scoring."""
-        self.update_position(dt)
-        self.handle_wall_collisions()
+    def update(self, dt=0, alpha=1.0):
+        """Render from state: physics is advanced by simulation.step."""
+        self.sync_rect(alpha)
+
+    def remember_position(self):
+        """Store the position before a physics step, used for render interpolation."""
+        self.prev_x, self.prev_y = self.state.pos.x, self.state.pos.y
+
+    def sync_rect(self, alpha=1.0):
+        """Copy the simulated position into the rect, blended from the previous step by alpha."""
+        x = self.prev_x + (self.state.pos.x - self.prev_x) * alpha
+        y = self.prev_y + (self.state.pos.y - self.prev_y) * alpha
+        center = (round(x * self.scale), round(y * self.scale))
+        if center != self.rect.center:
+            self.rect.center = center
+            self.dirty = 1  # only redraw when the sprite actually moved
+
+    def step(self, dt):
+        """Standalone physics step: swept move with wall/paddle bounces, then scoring."""
+        paddles = [paddle.state for paddle in self.paddles] if self.paddles else []
+        simulation.sweep_ball(self.state, paddles, dt)
+        self.sync_rect()
         self.handle_out_of_bounds()
-        self.handle_paddle_collision()
 
     def update_position(self, dt):
         """Move ball according to direction, speed and elapsed time."""
-        self.pos += self.direction * self.speed * dt
-        self.rect.center = (round(self.pos.x), round(self.pos.y))
+        simulation.update_position(self.state, dt)
+        self.sync_rect()
 
     def handle_wall_collisions(self):
         """Invert vertical direction when hitting top/bottom walls."""
-        if self.rect.top <= 0 or self.rect.bottom >= WINDOW_HEIGHT:
-            self.direction.y *= -1
+        simulation.handle_wall_collisions(self.state)
 
     def handle_out_of_bounds(self):
         """Detect left/right exit, update score(s) and relaunch from center."""
-        if self.rect.left <= 0:
-            # Player scored (opponent missed) — relaunch toward opponent (right)
-            self.launch(direction_x=1)
-            self.playerScore += 1
-            if self.scoreboard and hasattr(self.scoreboard, "player_scored"):
-                self.scoreboard.player_scored()
-        elif self.rect.right >= WINDOW_WIDTH:
-            # Opponent scored (player missed) — relaunch toward player (left)
-            self.launch(direction_x=-1)
-            self.opponentScore += 1
-            if self.scoreboard and hasattr(self.scoreboard, "opponent_scored"):
-                self.scoreboard.opponent_scored()
+        scored = simulation.handle_out_of_bounds(self.state, self.scoreboard)
+        self.sync_rect()
+        return scored
 
     def handle_paddle_collision(self):
         """Check for paddle collision and apply bounce, variation and speed increase."""
-        if self.paddles and pygame.sprite.spritecollideany(self, self.paddles):
-            self.bounce_horizontal()
-            self.direction.y += random.uniform(-0.3, 0.3)  # small vertical variation
-            # Use difficulty-based acceleration
-            self.speed = min(self.speed + self.ball_accel, 600)
+        if self.paddles:
+            return simulation.handle_paddle_collision(self.state, [paddle.state for paddle in self.paddles])
+        return False
 
     def bounce_horizontal(self):
         """Invert horizontal direction component."""
         self.direction.x *= -1
+        self.state.epoch += 1
 
     def bounce_vertical(self):
         """Invert vertical direction component."""
         self.direction.y *= -1
+        self.state.epoch += 1
 
-    def increase_speed(self, amount=5, cap=600):
+    def increase_speed(self, amount=5, cap=simulation.BALL_SPEED_CAP):
         """Increase speed with cap."""
-        self.speed = min(self.speed + amount, cap)
+        self.state.speed = min(self.state.speed + amount, cap)
+        self.state.epoch += 1
 
     def reset_position(self):
         """Place ball at center without changing direction."""
-        self.pos = pygame.math.Vector2(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-        self.rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+        simulation.reset_position(self.state)
+        self.sync_rect()
 
     def attach_paddles(self, paddles):
         """Attach or update the paddle sprite group used for collision checks."""
         self.paddles = paddles
 
     def attach_scoreboard(self, scoreboard):
-        """Attach or update scoreboard object; this is optional."""
+        """Attach or update scoreboard object."""
         self.scoreboard = scoreboard
 
     def launch(self, direction_x=None, angle=None):
-        """Reset position and set a normalized direction.
-        direction_x: optional +1 (right) or -1 (left). If None, choose randomly.
-        angle: optional vertical component (y). If None, pick small random variation.
-        """
-        self.reset_position()
-        self.speed = self.difficulty_settings.get('ball', 300)  # reset speed from difficulty
-        if direction_x is None:
-            direction_x = random.choice((-1, 1))
-        if angle is None:
-            angle = random.uniform(-0.5, 0.5)
-        self.direction = pygame.math.Vector2(direction_x, angle).normalize()
-
-class Scoreboard:
-    def __init__(self):
-        self.player = 0
-        self.opponent = 0
-
-    def player_scored(self):
-        self.player += 1
-
-    def opponent_scored(self):
-        self.opponent += 1
+        """Reset position and set a normalized direction (see simulation.launch)."""
+        simulation.launch(self.state, direction_x, angle)
+        self.sync_rect()
+
+
+class StaticSprite(pygame.sprite.DirtySprite):
+    """Fixed image at a fixed place (e.g. the middle line); drawn once, then only repaired."""
+
+    def __init__(self, groups, image, position, layer=0):
+        self._layer = layer  # must be set before joining a LayeredDirty group
+        super().__init__(*groups)
+        self.image = image
+        self.rect = image.get_rect(topleft=position)
+
+
+class TextSprite(pygame.sprite.DirtySprite):
+    """
+    Text that re-renders only when its string changes (scores, debug readouts).
+    get_text: callable returning the string to show this frame.
+    anchor: rect attribute to pin, e.g. 'midtop' or 'topleft'.
+    atlas: optional textcache.GlyphAtlas for text that changes every frame; glyphs are
+           blitted into a reused surface instead of going through the shared text cache.
+    """
+
+    def __init__(self, groups, font, get_text, color, anchor, position, layer=0, atlas=None):
+        self._layer = layer  # must be set before joining a LayeredDirty group
+        super().__init__(*groups)
+        self.font = font
+        self.get_text = get_text
+        self.color = color
+        self.anchor = anchor
+        self.position = position
+        self.atlas = atlas
+        self.image = None
+        self.text = None
+        self.refresh()
+
+    def refresh(self):
+        text = self.get_text()
+        if text == self.text:
+            return
+        self.text = text
+        if self.atlas is None:
+            self.image = render_text(self.font, text, self.color)
+        else:
+            self._compose(text)
+        self.rect = self.image.get_rect(**{self.anchor: self.position})
+        self.dirty = 1
+
+    def _compose(self, text):
+        """Blit glyphs into the existing image, growing it only when the text gets wider."""
+        size = self.atlas.size(text)
+        if self.image is None or self.image.get_width() < size[0]:
+            self.image = pygame.Surface(size, pygame.SRCALPHA)
+        else:
+            self.image.fill((0, 0, 0, 0))
+        self.atlas.blit(self.image, text, (0, 0))
+
+    def update(self, *args, **kwargs):
+        if self.visible:
+            self.refresh()
+
+
+class MarkerSprite(pygame.sprite.DirtySprite):
+    """
+    Small filled circle that follows a point, e.g. the AI's predicted landing spot.
+    get_position returns world coordinates; scale converts them to pixels like the ball and paddles.
+    """
+
+    def __init__(self, groups, get_position, color, radius=5, layer=0, scale=1.0):
+        self._layer = layer  # must be set before joining a LayeredDirty group
+        super().__init__(*groups)
+        self.get_position = get_position
+        self.scale = scale
+        self.image = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(self.image, color, (radius, radius), radius)
+        self.rect = self.image.get_rect(center=self.screen_position())
+
+    def screen_position(self):
+        x, y = self.get_position()
+        return round(x * self.scale), round(y * self.scale)
+
+    def update(self, *args, **kwargs):
+        if not self.visible:
+            return
+        center = self.screen_position()
+        if center != self.rect.center:
+            self.rect.center = center
+            self.dirty = 1
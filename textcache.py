@@ -0,0 +1,120 @@
+"""
+Shared text surface cache for Pong game.
+font.render allocates a new surface on every call, which made text the biggest
+per-frame allocation in the game loop and menus. Everything that draws text goes
+through the process-wide cache here instead.
+"""
+
+from collections import OrderedDict
+import pygame
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024  # cap on pixel memory held by the shared cache
+
+
+def _color_key(color):
+    """pygame.Color is unhashable; use its RGBA tuple in cache keys."""
+    return tuple(pygame.Color(color))
+
+
+def _surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces keyed by (font, text, color, antialias).
+    Least recently used entries are evicted once the cached pixels exceed max_bytes.
+    Cached surfaces are shared, so callers must not draw onto them.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        """Drop-in for font.render(text, antialias, color) that reuses earlier results."""
+        key = (font, text, _color_key(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        self.used_bytes += _surface_bytes(surface)
+        self._evict()
+        return surface
+
+    def preload(self, font, texts, color, antialias=True):
+        """Render a known set of strings up front (e.g. score digits) so the first frame doesn't pay for them."""
+        for text in texts:
+            self.render(font, text, color, antialias)
+
+    def clear(self):
+        self._surfaces.clear()
+        self.used_bytes = 0
+
+    def _evict(self):
+        # always keep the newest entry, even if it alone is over the cap
+        while self.used_bytes > self.max_bytes and len(self._surfaces) > 1:
+            _, surface = self._surfaces.popitem(last=False)
+            self.used_bytes -= _surface_bytes(surface)
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+class GlyphAtlas:
+    """
+    Per-character surfaces for one font and color, used for text that changes every frame
+    (debug numbers). Strings are composed by blitting cached glyphs side by side, so a new
+    number costs one small blit per character instead of a full font.render.
+    """
+
+    def __init__(self, font, color, antialias=True, preload="0123456789.-"):
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.height = font.get_linesize()
+        self._glyphs = {}
+        for char in preload:
+            self.glyph(char)
+
+    def glyph(self, char):
+        surface = self._glyphs.get(char)
+        if surface is None:
+            surface = self.font.render(char, self.antialias, self.color)
+            self._glyphs[char] = surface
+        return surface
+
+    def size(self, text):
+        return sum(self.glyph(char).get_width() for char in text), self.height
+
+    def blit(self, target, text, position):
+        """Draw text onto target with its top-left at position; returns the covered rect."""
+        x, y = position
+        start_x = x
+        for char in text:
+            surface = self.glyph(char)
+            target.blit(surface, (x, y))
+            x += surface.get_width()
+        return pygame.Rect(start_x, y, x - start_x, self.height)
+
+    def render(self, text):
+        """Compose text into a new transparent surface (same use as font.render)."""
+        surface = pygame.Surface(self.size(text), pygame.SRCALPHA)
+        self.blit(surface, text, (0, 0))
+        return surface
+
+
+# process-wide cache shared by the game loop and every menu
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    """Cached font.render through the shared text_cache."""
+    return text_cache.render(font, text, color, antialias)
@@ -0,0 +1,190 @@
+"""
+AI-vs-AI tournament runner for Pong game.
+Plays every pairing of the AI strategies (both sides of the court, since the player side
+is faster) under each difficulty preset, headlessly and spread over all cores with a
+process pool. Results are aggregated into win rates with 95% confidence intervals and
+Elo ratings.
+
+Usage:
+    python tournament.py --matches 1000
+    python tournament.py --strategies EasyAI HardAI mybots:SearchBot --presets hard --json results.json
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import ai
+from settings import DIFFICULTY_PRESETS
+from simulation import GameState, run_match, FIXED_DT
+
+# built-in strategies and the reaction time they use as an opponent
+BUILTIN_STRATEGIES = {ai_class.__name__: (ai_class, reaction_time) for ai_class, reaction_time in ai.DIFFICULTY_AI.values()}
+# entered when --strategies isn't given: ExpertAI searches on every decision and makes a default
+# tournament take hours, so it only plays when named (with a fixed search size, see ai.make_reproducible)
+DEFAULT_STRATEGIES = [name for name in BUILTIN_STRATEGIES if name != ai.ExpertAI.__name__]
+DRAW = None  # winner value for a match that hit the time limit
+
+
+def resolve_strategy(name):
+    """Map a strategy name to (class, default reaction time). Custom strategies are given as 'module:Class'."""
+    if name in BUILTIN_STRATEGIES:
+        return BUILTIN_STRATEGIES[name]
+    if ':' not in name:
+        raise ValueError(f"unknown strategy {name!r}; use one of {', '.join(BUILTIN_STRATEGIES)} or 'module:Class'")
+    module_name, class_name = name.split(':', 1)
+    return getattr(importlib.import_module(module_name), class_name), None
+
+
+def play_batch(task):
+    """
+    Worker: play every seed of one (preset, player strategy, opponent strategy) pairing.
+    Returns a list of (seed, winner, player_points, opponent_points) tuples.
+    """
+    preset, player_name, opponent_name, seeds, dt, max_time = task
+    settings = DIFFICULTY_PRESETS[preset]
+    player_class, player_reaction = resolve_strategy(player_name)
+    opponent_class, opponent_reaction = resolve_strategy(opponent_name)
+    results = []
+    for seed in seeds:
+        state = GameState(preset, settings, seed=seed)
+        # seeded matches must not depend on CPU speed
+        player_ai = ai.make_reproducible(ai.create_ai(player_class, settings, player_reaction, state.make_rng('player')))
+        opponent_ai = ai.make_reproducible(ai.create_ai(opponent_class, settings, opponent_reaction, state.make_rng('opponent')))
+        winner = run_match(state, player_ai, opponent_ai, dt=dt, max_time=max_time)
+        results.append((seed, winner, state.scoreboard.player, state.scoreboard.opponent))
+    return results
+
+
+def wilson_interval(wins, games, z=1.96):
+    """95% Wilson score interval for a win rate (draws count as half a win)."""
+    if games == 0:
+        return 0.0, 1.0
+    rate = wins / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def elo_ratings(scores, iterations=200):
+    """
+    Elo ratings from pairwise results, fitted with the Bradley-Terry MM algorithm so the
+    order matches were played in doesn't matter. scores[(a, b)] = (points a scored vs b, games).
+    Ratings are centred on 1500 on the usual 400-point logistic scale.
+    """
+    names = sorted({name for pair in scores for name in pair})
+    strength = dict.fromkeys(names, 1.0)
+    for _ in range(iterations):
+        updated = {}
+        for name in names:
+            # a little prior (one draw against an average opponent) keeps unbeaten strategies finite
+            won = 0.5
+            denominator = 1.0 / (strength[name] + 1.0)
+            for (a, b), (points, games) in scores.items():
+                if a == name:
+                    won += points
+                    denominator += games / (strength[a] + strength[b])
+                elif b == name:
+                    won += games - points
+                    denominator += games / (strength[a] + strength[b])
+            updated[name] = won / denominator
+        mean_log = sum(math.log(value) for value in updated.values()) / len(updated)
+        strength = {name: value / math.exp(mean_log) for name, value in updated.items()}
+    return {name: 1500 + 400 * math.log10(value) for name, value in strength.items()}
+
+
+def summarise(results):
+    """
+    Aggregate raw results into per-preset standings.
+    results: {(preset, player_name, opponent_name): [(seed, winner, player_points, opponent_points), ...]}
+    """
+    summary = {}
+    for preset in dict.fromkeys(key[0] for key in results):
+        pair_scores = {}
+        totals = {}
+        for (match_preset, player_name, opponent_name), matches in results.items():
+            if match_preset != preset:
+                continue
+            points = sum(1.0 if winner == "Player" else 0.5 if winner is DRAW else 0.0 for _, winner, _, _ in matches)
+            games = len(matches)
+            previous = pair_scores.get((player_name, opponent_name), (0.0, 0))
+            pair_scores[(player_name, opponent_name)] = (previous[0] + points, previous[1] + games)
+            for name, scored in ((player_name, points), (opponent_name, games - points)):
+                won, played = totals.get(name, (0.0, 0))
+                totals[name] = (won + scored, played + games)
+        ratings = elo_ratings(pair_scores)
+        standings = []
+        for name, (won, played) in totals.items():
+            low, high = wilson_interval(won, played)
+            standings.append({'strategy': name, 'games': played, 'win_rate': won / played,
+                              'ci_low': low, 'ci_high': high, 'elo': ratings[name]})
+        standings.sort(key=lambda row: row['elo'], reverse=True)
+        pairings = [{'player': a, 'opponent': b, 'games': games, 'player_win_rate': points / games}
+                    for (a, b), (points, games) in sorted(pair_scores.items())]
+        summary[preset] = {'standings': standings, 'pairings': pairings}
+    return summary
+
+
+def run_tournament(strategies, presets, matches, seed=0, dt=FIXED_DT, max_time=1200.0, workers=None, chunk=25):
+    """Play `matches` games for every ordered pairing under every preset; returns raw results keyed by (preset, player, opponent)."""
+    for name in strategies:
+        resolve_strategy(name)  # fail fast on typos before starting workers
+    tasks = []
+    for preset in presets:
+        for player_name, opponent_name in itertools.permutations(strategies, 2):
+            seeds = [seed + index for index in range(matches)]
+            for start in range(0, matches, chunk):
+                tasks.append((preset, player_name, opponent_name, seeds[start:start + chunk], dt, max_time))
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for task, batch in zip(tasks, pool.map(play_batch, tasks)):
+            results.setdefault(task[:3], []).extend(batch)
+    return results
+
+
+def print_summary(summary):
+    for preset, data in summary.items():
+        print(f"\n== {preset} ==")
+        print(f"{'strategy':<24}{'games':>8}{'win rate':>10}{'95% CI':>18}{'elo':>8}")
+        for row in data['standings']:
+            ci = f"[{row['ci_low']:.3f}, {row['ci_high']:.3f}]"
+            print(f"{row['strategy']:<24}{row['games']:>8}{row['win_rate']:>10.3f}{ci:>18}{row['elo']:>8.0f}")
+        for row in data['pairings']:
+            print(f"  {row['player']} (player side) vs {row['opponent']}: {row['player_win_rate']:.3f} over {row['games']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars AI tournament")
+    parser.add_argument('--strategies', nargs='+', default=DEFAULT_STRATEGIES,
+                        help="strategies to enter: built-in class names or 'module:Class'")
+    parser.add_argument('--presets', nargs='+', default=list(DIFFICULTY_PRESETS), choices=list(DIFFICULTY_PRESETS))
+    parser.add_argument('--matches', type=int, default=1000, help="first-to-10 matches per pairing, side and preset")
+    parser.add_argument('--seed', type=int, default=0, help="first match seed")
+    parser.add_argument('--dt', type=float, default=FIXED_DT, help="simulation step (seconds)")
+    parser.add_argument('--max-time', type=float, default=1200.0, help="simulated seconds before a match is a draw")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--json', metavar='PATH', help="also write the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_tournament(args.strategies, args.presets, args.matches, args.seed, args.dt, args.max_time, args.workers)
+    elapsed = time.perf_counter() - start
+    summary = summarise(results)
+    print_summary(summary)
+    total = sum(len(matches) for matches in results.values())
+    print(f"\n{total} matches in {elapsed:.1f}s on {args.workers} worker(s)")
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(summary, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
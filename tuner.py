@@ -0,0 +1,211 @@
+"""
+Difficulty preset auto-tuner for Pong game.
+Searches over the DIFFICULTY_PRESETS parameters (opponent speed, ball speed, paddle_height,
+ai_error, ball_accel) for values that give a target player win rate and rally length against
+a reference player model. Candidates are evaluated in parallel worker processes and every
+(parameters, seed) result is cached on disk, so restarting a sweep or changing the targets
+only simulates configurations that were never evaluated.
+
+Usage:
+    python tuner.py --candidates 64 --matches 40
+    python tuner.py --target hard=0.3,8 --cache tuner_cache.sqlite
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import ai
+from settings import DIFFICULTY_PRESETS
+from simulation import GameState, run_match
+
+# search space: parameter -> (low, high, integer?)
+SEARCH_SPACE = {
+    'opponent': (150, 450, True),
+    'ball': (250, 600, True),
+    'paddle_height': (60, 160, True),
+    'ai_error': (0.0, 0.4, False),
+    'ball_accel': (0, 15, True),
+}
+# default targets per difficulty: (player win rate, paddle hits per point)
+DEFAULT_TARGETS = {'easy': (0.8, 4.0), 'normal': (0.5, 6.0), 'hard': (0.25, 8.0)}
+WIN_RATE_TOLERANCE = 0.05  # loss scale: 0.05 off the target win rate costs as much as...
+RALLY_TOLERANCE = 1.0      # ...one paddle hit per point off the target rally length
+
+# reference player model: a human-ish strategy standing in for a real player
+REFERENCE_PLAYER = {'strategy': 'MediumAI', 'reaction_time': 0.25, 'inaccuracy': 0.3}
+MATCH_DT = 1 / 60
+MATCH_MAX_TIME = 900.0
+
+
+def code_fingerprint():
+    """Hash of the simulation and AI sources; cached results are ignored once the physics changes."""
+    digest = hashlib.sha1()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ('simulation.py', 'ai.py'):
+        with open(os.path.join(here, name), 'rb') as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:12]
+
+
+class ResultCache:
+    """On-disk (parameters, seed) -> match result store, backed by SQLite. Only the main process writes to it."""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, player_won REAL, points INTEGER, paddle_hits INTEGER)")
+
+    @staticmethod
+    def key(difficulty, params, seed, context):
+        return json.dumps([context, difficulty, params, seed], sort_keys=True)
+
+    def get(self, key):
+        row = self.connection.execute("SELECT player_won, points, paddle_hits FROM results WHERE key = ?", (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def put_many(self, items):
+        self.connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                    [(key,) + tuple(result) for key, result in items])
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def candidate_settings(difficulty, params):
+    """Full preset dict for a candidate: the current preset with the searched parameters replaced."""
+    settings = dict(DIFFICULTY_PRESETS[difficulty])
+    settings.update(params)
+    return settings
+
+
+def evaluate(task):
+    """
+    Worker: play one candidate preset against the reference player for each seed.
+    Returns [(seed, (player_won, points, paddle_hits)), ...]; a drawn match counts as half a win.
+    """
+    difficulty, params, seeds, player = task
+    settings = candidate_settings(difficulty, params)
+    player_class = getattr(ai, player['strategy'])
+    results = []
+    for seed in seeds:
+        state = GameState(difficulty, settings, seed=seed)
+        # a fixed search size for ExpertAI: cached results must not depend on CPU speed
+        player_ai = ai.make_reproducible(player_class(reaction_time=player['reaction_time'], inaccuracy=player['inaccuracy'],
+                                                      rng=state.make_rng('player')))
+        opponent_ai = ai.make_reproducible(ai.create_difficulty_ai(difficulty, settings, state.make_rng('opponent')))
+        winner = run_match(state, player_ai, opponent_ai, dt=MATCH_DT, max_time=MATCH_MAX_TIME)
+        player_won = 1.0 if winner == "Player" else 0.0 if winner == "Opponent" else 0.5
+        points = state.scoreboard.player + state.scoreboard.opponent
+        results.append((seed, (player_won, points, state.ball.paddle_hits)))
+    return results
+
+
+def sample_candidates(difficulty, count, rng):
+    """The current preset first, then `count - 1` random points in SEARCH_SPACE (same list every run for a given seed)."""
+    current = {name: DIFFICULTY_PRESETS[difficulty][name] for name in SEARCH_SPACE}
+    candidates = [current]
+    for _ in range(count - 1):
+        params = {}
+        for name, (low, high, integer) in SEARCH_SPACE.items():
+            params[name] = rng.randint(low, high) if integer else round(rng.uniform(low, high), 3)
+        candidates.append(params)
+    return candidates
+
+
+def score(results, target):
+    """(loss, win_rate, rally_length) for a candidate's match results against (target win rate, target rally)."""
+    win_rate = sum(result[0] for result in results) / len(results)
+    points = sum(result[1] for result in results)
+    rally = sum(result[2] for result in results) / max(1, points)
+    loss = ((win_rate - target[0]) / WIN_RATE_TOLERANCE) ** 2 + ((rally - target[1]) / RALLY_TOLERANCE) ** 2
+    return loss, win_rate, rally
+
+
+def tune(difficulties, targets, candidates, matches, cache_path, seed=0, workers=None, player=REFERENCE_PLAYER):
+    """Evaluate candidates for each difficulty (cached) and return {difficulty: [(loss, win_rate, rally, params), ...]} best first."""
+    cache = ResultCache(cache_path)
+    context = {'code': code_fingerprint(), 'player': player, 'dt': MATCH_DT, 'max_time': MATCH_MAX_TIME}
+    seeds = list(range(seed, seed + matches))
+    rng = random.Random(seed)
+    plan = {difficulty: sample_candidates(difficulty, candidates, rng) for difficulty in difficulties}
+
+    # only simulate (parameters, seed) pairs the cache hasn't seen
+    tasks = []
+    cached = 0
+    for difficulty, params_list in plan.items():
+        for params in params_list:
+            missing = [s for s in seeds if cache.get(ResultCache.key(difficulty, params, s, context)) is None]
+            cached += len(seeds) - len(missing)
+            if missing:
+                tasks.append((difficulty, params, missing, player))
+    print(f"{cached} results from cache, {sum(len(task[2]) for task in tasks)} matches to simulate")
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for task, results in zip(tasks, pool.map(evaluate, tasks)):
+                difficulty, params = task[0], task[1]
+                cache.put_many([(ResultCache.key(difficulty, params, s, context), result) for s, result in results])
+
+    ranking = {}
+    for difficulty, params_list in plan.items():
+        rows = []
+        for params in params_list:
+            results = [cache.get(ResultCache.key(difficulty, params, s, context)) for s in seeds]
+            rows.append(score(results, targets[difficulty]) + (params,))
+        rows.sort(key=lambda row: row[0])
+        ranking[difficulty] = rows
+    cache.close()
+    return ranking
+
+
+def parse_target(text):
+    """'hard=0.3,8' -> ('hard', (0.3, 8.0))"""
+    difficulty, values = text.split('=', 1)
+    win_rate, rally = values.split(',')
+    return difficulty, (float(win_rate), float(rally))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pong Wars difficulty preset tuner")
+    parser.add_argument('--difficulties', nargs='+', default=list(DEFAULT_TARGETS), choices=list(DIFFICULTY_PRESETS),
+                        help="presets to tune (default: those with a default target; others need --target)")
+    parser.add_argument('--target', action='append', type=parse_target, default=[],
+                        help="difficulty=win_rate,rally_length (player win rate and paddle hits per point)")
+    parser.add_argument('--candidates', type=int, default=32, help="candidate presets per difficulty (incl. the current one)")
+    parser.add_argument('--matches', type=int, default=40, help="matches (seeds) per candidate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', default='tuner_cache.sqlite', help="SQLite file for cached results")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--json', metavar='PATH', help="write the best preset per difficulty to this JSON file")
+    args = parser.parse_args(argv)
+
+    targets = dict(DEFAULT_TARGETS)
+    targets.update(dict(args.target))
+    untargeted = [difficulty for difficulty in args.difficulties if difficulty not in targets]
+    if untargeted:
+        parser.error(f"no target for {', '.join(untargeted)}; pass --target difficulty=win_rate,rally_length")
+    ranking = tune(args.difficulties, targets, args.candidates, args.matches, args.cache, args.seed, args.workers)
+
+    best = {}
+    for difficulty, rows in ranking.items():
+        loss, win_rate, rally, params = rows[0]
+        current = next(row for row in rows if row[3] == {name: DIFFICULTY_PRESETS[difficulty][name] for name in SEARCH_SPACE})
+        print(f"\n== {difficulty} (target win rate {targets[difficulty][0]:.2f}, rally {targets[difficulty][1]:.1f}) ==")
+        print(f"current: win rate {current[1]:.3f}, rally {current[2]:.2f}, loss {current[0]:.2f}")
+        print(f"best:    win rate {win_rate:.3f}, rally {rally:.2f}, loss {loss:.2f}")
+        best[difficulty] = candidate_settings(difficulty, params)
+        print(f"'{difficulty}': {best[difficulty]},")
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(best, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,31 +1,29 @@
 import sys
 import pygame
-from os.path import join
 from settings import COLORS
+from textcache import render_text
+from resources import assets
 
-def _load_font(path, size):
-    try:
-        return pygame.font.Font(path, size)
-    except Exception:
-        return pygame.font.SysFont(None, size)
-
-def difficulty_menu(screen, clock):
-    """Blocking difficulty menu. Returns 'easy', 'normal', or 'hard'."""
+def difficulty_menu(screen, clock, on_first_frame=None):
+    """Blocking difficulty menu. Returns 'easy', 'normal', 'hard' or 'expert'."""
     pygame.event.clear()
-    title_font = _load_font(join("assets", "AlfaSlabOne-Regular.ttf"), 48)
-    small_font = _load_font(join("assets", "AlfaSlabOne-Regular.ttf"), 28)
+    title_font = assets.font(48)
+    small_font = assets.font(28)
 
     w, h = screen.get_size()
     easy_btn = pygame.Rect(0, 0, 200, 60)
-    easy_btn.center = (w // 2 - 250, h // 2 + 40)
+    easy_btn.center = (w // 2 - 375, h // 2 + 40)
     normal_btn = pygame.Rect(0, 0, 200, 60)
-    normal_btn.center = (w // 2, h // 2 + 40)
+    normal_btn.center = (w // 2 - 125, h // 2 + 40)
     hard_btn = pygame.Rect(0, 0, 200, 60)
-    hard_btn.center = (w // 2 + 250, h // 2 + 40)
+    hard_btn.center = (w // 2 + 125, h // 2 + 40)
+    expert_btn = pygame.Rect(0, 0, 200, 60)
+    expert_btn.center = (w // 2 + 375, h // 2 + 40)
 
-    hover_color = pygame.Color("white")
-    base_color = pygame.Color("#86D3FF")
-    text_color = pygame.Color("white")
+    hover_color = assets.color("white")
+    base_color = assets.color("paddle")
+    text_color = assets.color("white")
+    last_hover = None  # hover state last drawn; None forces a full redraw
 
     while True:
         dt = clock.tick(60) / 1000
@@ -33,6 +31,8 @@ def difficulty_menu(screen, clock):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            if event.type == pygame.WINDOWEXPOSED:
+                last_hover = None
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     return 'normal'  # Default to normal if ESC
@@ -42,6 +42,8 @@ def difficulty_menu(screen, clock):
                     return 'normal'
                 if event.key == pygame.K_3:
                     return 'hard'
+                if event.key == pygame.K_4:
+                    return 'expert'
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 mx, my = event.pos
                 if easy_btn.collidepoint((mx, my)):
@@ -50,49 +52,70 @@ def difficulty_menu(screen, clock):
                     return 'normal'
                 if hard_btn.collidepoint((mx, my)):
                     return 'hard'
+                if expert_btn.collidepoint((mx, my)):
+                    return 'expert'
 
         mx, my = pygame.mouse.get_pos()
         is_hover_easy = easy_btn.collidepoint((mx, my))
         is_hover_normal = normal_btn.collidepoint((mx, my))
         is_hover_hard = hard_btn.collidepoint((mx, my))
+        is_hover_expert = expert_btn.collidepoint((mx, my))
+        hover = (is_hover_easy, is_hover_normal, is_hover_hard, is_hover_expert)
+        if hover == last_hover:
+            assets.preload_step()  # idle frame: load what later screens need instead
+            continue  # nothing changed on screen; skip drawing and presenting
 
         # Draw
         screen.fill(COLORS.get('bg', '#000000'))
         # Title
-        title_surf = title_font.render("Select Difficulty", True, text_color)
+        title_surf = render_text(title_font, "Select Difficulty", text_color)
         title_rect = title_surf.get_rect(center=(w // 2, h // 2 - 80))
         screen.blit(title_surf, title_rect)
 
         # Hint
-        hint = small_font.render("Use arrow keys (1, 2, 3) or click", True, text_color)
+        hint = render_text(small_font, "Use arrow keys (1, 2, 3, 4) or click", text_color)
         hint_rect = hint.get_rect(center=(w // 2, h // 2 - 20))
         screen.blit(hint, hint_rect)
 
         # Easy button
         pygame.draw.rect(screen, hover_color if is_hover_easy else base_color, easy_btn, border_radius=8)
-        easy_text = small_font.render("EASY", True, pygame.Color("black") if is_hover_easy else pygame.Color("white"))
+        easy_text = render_text(small_font, "EASY", assets.color("black") if is_hover_easy else assets.color("white"))
         easy_rect = easy_text.get_rect(center=easy_btn.center)
         screen.blit(easy_text, easy_rect)
 
         # Normal button
         pygame.draw.rect(screen, hover_color if is_hover_normal else base_color, normal_btn, border_radius=8)
-        normal_text = small_font.render("NORMAL", True, pygame.Color("black") if is_hover_normal else pygame.Color("white"))
+        normal_text = render_text(small_font, "NORMAL", assets.color("black") if is_hover_normal else assets.color("white"))
         normal_rect = normal_text.get_rect(center=normal_btn.center)
         screen.blit(normal_text, normal_rect)
 
         # Hard button
         pygame.draw.rect(screen, hover_color if is_hover_hard else base_color, hard_btn, border_radius=8)
-        hard_text = small_font.render("HARD", True, pygame.Color("black") if is_hover_hard else pygame.Color("white"))
+        hard_text = render_text(small_font, "HARD", assets.color("black") if is_hover_hard else assets.color("white"))
         hard_rect = hard_text.get_rect(center=hard_btn.center)
         screen.blit(hard_text, hard_rect)
 
-        pygame.display.flip()
-
-def game_over_menu(screen, clock, winner):
+        # Expert button
+        pygame.draw.rect(screen, hover_color if is_hover_expert else base_color, expert_btn, border_radius=8)
+        expert_text = render_text(small_font, "EXPERT", assets.color("black") if is_hover_expert else assets.color("white"))
+        expert_rect = expert_text.get_rect(center=expert_btn.center)
+        screen.blit(expert_text, expert_rect)
+
+        # Only the buttons change after the first frame, so push just their rects
+        if last_hover is None:
+            pygame.display.flip()
+            if on_first_frame:
+                on_first_frame()
+                on_first_frame = None
+        else:
+            pygame.display.update([easy_btn, normal_btn, hard_btn, expert_btn])
+        last_hover = hover
+
+def game_over_menu(screen, clock, winner, on_first_frame=None):
     """Blocking game over menu. Returns True to play again, False to return to main menu."""
     pygame.event.clear()
-    title_font = _load_font(join("assets", "AlfaSlabOne-Regular.ttf"), 96)
-    small_font = _load_font(join("assets", "AlfaSlabOne-Regular.ttf"), 28)
+    title_font = assets.font(96)
+    small_font = assets.font(28)
 
     w, h = screen.get_size()
     play_again_btn = pygame.Rect(0, 0, 300, 72)
@@ -100,9 +123,10 @@ def game_over_menu(screen, clock, winner):
     main_menu_btn = pygame.Rect(0, 0, 300, 72)
     main_menu_btn.center = (w // 2, h // 2 + 130)
 
-    hover_color = pygame.Color("white")
-    base_color = pygame.Color("#86D3FF")
-    text_color = pygame.Color("white")
+    hover_color = assets.color("white")
+    base_color = assets.color("paddle")
+    text_color = assets.color("white")
+    last_hover = None  # hover state last drawn; None forces a full redraw
 
     while True:
         dt = clock.tick(60) / 1000
@@ -110,6 +134,8 @@ def game_over_menu(screen, clock, winner):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            if event.type == pygame.WINDOWEXPOSED:
+                last_hover = None
             if event.type == pygame.KEYDOWN:
                 if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER, pygame.K_SPACE):
                     return True
@@ -125,39 +151,51 @@ def game_over_menu(screen, clock, winner):
         mx, my = pygame.mouse.get_pos()
         is_hover_play_again = play_again_btn.collidepoint((mx, my))
         is_hover_main_menu = main_menu_btn.collidepoint((mx, my))
+        hover = (is_hover_play_again, is_hover_main_menu)
+        if hover == last_hover:
+            assets.preload_step()  # idle frame: load what later screens need instead
+            continue  # nothing changed on screen; skip drawing and presenting
 
         # Draw
         screen.fill(COLORS.get('bg', '#000000'))
         # Winner title
         winner_text = f"{winner} Wins!"
-        winner_surf = title_font.render(winner_text, True, text_color)
+        winner_surf = render_text(title_font, winner_text, text_color)
         winner_rect = winner_surf.get_rect(center=(w // 2, h // 2 - 100))
         screen.blit(winner_surf, winner_rect)
 
         # Subtitle
-        hint = small_font.render("First to 10 points!", True, text_color)
+        hint = render_text(small_font, "First to 10 points!", text_color)
         hint_rect = hint.get_rect(center=(w // 2, h // 2 - 20))
         screen.blit(hint, hint_rect)
 
         # Play Again button
         pygame.draw.rect(screen, hover_color if is_hover_play_again else base_color, play_again_btn, border_radius=8)
-        play_again_text = small_font.render("PLAY AGAIN", True, pygame.Color("black") if is_hover_play_again else pygame.Color("white"))
+        play_again_text = render_text(small_font, "PLAY AGAIN", assets.color("black") if is_hover_play_again else assets.color("white"))
         play_again_rect = play_again_text.get_rect(center=play_again_btn.center)
         screen.blit(play_again_text, play_again_rect)
 
         # Main Menu button
         pygame.draw.rect(screen, hover_color if is_hover_main_menu else base_color, main_menu_btn, border_radius=8)
-        main_menu_text = small_font.render("MAIN MENU", True, pygame.Color("black") if is_hover_main_menu else pygame.Color("white"))
+        main_menu_text = render_text(small_font, "MAIN MENU", assets.color("black") if is_hover_main_menu else assets.color("white"))
         main_menu_rect = main_menu_text.get_rect(center=main_menu_btn.center)
         screen.blit(main_menu_text, main_menu_rect)
 
-        pygame.display.flip()
-
-def main_menu(screen, clock, title_text="Pong Wars"):
+        # Only the buttons change after the first frame, so push just their rects
+        if last_hover is None:
+            pygame.display.flip()
+            if on_first_frame:
+                on_first_frame()
+                on_first_frame = None
+        else:
+            pygame.display.update([play_again_btn, main_menu_btn])
+        last_hover = hover
+
+def main_menu(screen, clock, title_text="Pong Wars", on_first_frame=None):
     """Blocking menu. Returns True to start the game, False to quit."""
     pygame.event.clear()
-    title_font = _load_font(join("assets", "AlfaSlabOne-Regular.ttf"), 96)
-    small_font = _load_font(join("assets", "AlfaSlabOne-Regular.ttf"), 28)
+    title_font = assets.font(96)
+    small_font = assets.font(28)
 
     w, h = screen.get_size()
     start_btn = pygame.Rect(0, 0, 320, 72)
@@ -165,9 +203,10 @@ def main_menu(screen, clock, title_text="Pong Wars"):
     quit_btn = pygame.Rect(0, 0, 160, 56)
     quit_btn.center = (w // 2, h // 2 + 130)
 
-    hover_color = pygame.Color("white")
-    base_color = pygame.Color("#86D3FF")
-    text_color = pygame.Color("white")
+    hover_color = assets.color("white")
+    base_color = assets.color("paddle")
+    text_color = assets.color("white")
+    last_hover = None  # hover state last drawn; None forces a full redraw
 
     while True:
         dt = clock.tick(60) / 1000
@@ -175,6 +214,8 @@ def main_menu(screen, clock, title_text="Pong Wars"):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            if event.type == pygame.WINDOWEXPOSED:
+                last_hover = None
             if event.type == pygame.KEYDOWN:
                 if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER, pygame.K_SPACE):
                     return True
@@ -190,29 +231,41 @@ def main_menu(screen, clock, title_text="Pong Wars"):
         mx, my = pygame.mouse.get_pos()
         is_hover_start = start_btn.collidepoint((mx, my))
         is_hover_quit = quit_btn.collidepoint((mx, my))
+        hover = (is_hover_start, is_hover_quit)
+        if hover == last_hover:
+            assets.preload_step()  # idle frame: load what later screens need instead
+            continue  # nothing changed on screen; skip drawing and presenting
 
         # Draw
         screen.fill(COLORS.get('bg', '#000000'))
         # Title
-        title_surf = title_font.render(title_text, True, text_color)
+        title_surf = render_text(title_font, title_text, text_color)
         title_rect = title_surf.get_rect(center=(w // 2, h // 2 - 80))
         screen.blit(title_surf, title_rect)
 
         # Subtitle / hint
-        hint = small_font.render("Press Enter / Click Start to play — Esc to quit", True, text_color)
+        hint = render_text(small_font, "Press Enter / Click Start to play — Esc to quit", text_color)
         hint_rect = hint.get_rect(center=(w // 2, h // 2 - 20))
         screen.blit(hint, hint_rect)
 
         # Start button
         pygame.draw.rect(screen, hover_color if is_hover_start else base_color, start_btn, border_radius=8)
-        start_text = small_font.render("START", True, pygame.Color("black") if is_hover_start else pygame.Color("white"))
+        start_text = render_text(small_font, "START", assets.color("black") if is_hover_start else assets.color("white"))
         start_rect = start_text.get_rect(center=start_btn.center)
         screen.blit(start_text, start_rect)
 
         # Quit button
         pygame.draw.rect(screen, hover_color if is_hover_quit else base_color, quit_btn, border_radius=8)
-        quit_text = small_font.render("QUIT", True, pygame.Color("black") if is_hover_quit else pygame.Color("white"))
+        quit_text = render_text(small_font, "QUIT", assets.color("black") if is_hover_quit else assets.color("white"))
         quit_rect = quit_text.get_rect(center=quit_btn.center)
         screen.blit(quit_text, quit_rect)
 
-        pygame.display.flip()
\ No newline at end of file
+        # Only the buttons change after the first frame, so push just their rects
+        if last_hover is None:
+            pygame.display.flip()
+            if on_first_frame:
+                on_first_frame()
+                on_first_frame = None
+        else:
+            pygame.display.update([start_btn, quit_btn])
+        last_hover = hover
\ No newline at end of file